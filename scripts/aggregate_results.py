@@ -24,6 +24,22 @@ def parse_args() -> argparse.Namespace:
         default="run*_summary_*.csv",
         help="Glob pattern for summary files inside each agent summary dir.",
     )
+    parser.add_argument(
+        "--store",
+        default=None,
+        metavar="DIR",
+        help="Read runs from the Parquet results store in DIR instead of summary CSVs.",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="Summary cache file (default: .summary_cache.json).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-read every summary CSV instead of using the cache.",
+    )
     parser.add_argument(
         "--out-mean",
         default="results_mean.csv",
@@ -37,23 +53,55 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
+def load_csv_summaries(agents, pattern: str) -> pd.DataFrame:
     rows = []
-
-    for agent in args.agents:
+    for agent in agents:
         summary_dir = f"{agent}_agent/summary"
-        for path in glob.glob(os.path.join(summary_dir, args.pattern)):
+        for path in glob.glob(os.path.join(summary_dir, pattern)):
             df = pd.read_csv(path, index_col=0)
             row = {"agent": agent, "summary_path": path}
             for metric, value in df["Value"].items():
                 row[metric] = value
             rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def load_cached_summaries(agents, pattern: str, cache_path: str | None) -> pd.DataFrame:
+    from summary_cache import DEFAULT_CACHE, SummaryCache
+
+    cache = SummaryCache(cache_path or DEFAULT_CACHE)
+    entries = cache.collect(agents, pattern)
+    print(f"Summary cache: {cache.hits} cached, {cache.misses} read")
+    return pd.DataFrame(
+        [
+            {"agent": entry["agent"], "summary_path": entry["summary_path"], **entry["metrics"]}
+            for entry in entries
+        ]
+    )
+
+
+def load_store_summaries(agents, store_dir: str) -> pd.DataFrame:
+    from results_store import ResultsStore
+
+    df = ResultsStore(store_dir).run_summaries(agents)
+    return df.drop(columns=["config", "seed"], errors="ignore").rename(
+        columns={"run_id": "summary_path"}
+    )
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.store is not None:
+        all_df = load_store_summaries(args.agents, args.store)
+    elif args.no_cache:
+        all_df = load_csv_summaries(args.agents, args.pattern)
+    else:
+        all_df = load_cached_summaries(args.agents, args.pattern, args.cache)
 
-    if not rows:
+    if all_df.empty:
         raise SystemExit("No summary CSVs found. Run evals first.")
 
-    all_df = pd.DataFrame(rows)
     metrics = [c for c in all_df.columns if c not in ("agent", "summary_path")]
     mean_df = all_df.groupby("agent")[metrics].mean()
     std_df = all_df.groupby("agent")[metrics].std()
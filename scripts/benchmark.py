@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Reproducible performance benchmarks of the simulator, policies and pipeline.
+
+Benchmarks (each a grid of cases, every case run with each --workers count):
+
+    env_step        random-action steps of highway-v0 / highway-fast-v0 under
+                    each env_config variant, per traffic density
+    predict         per-agent deterministic predict() latency (SB3 and, when
+                    exported, the TorchScript fast path)
+    eval_episode    a full eval.py episode (env + policy + metrics) per agent
+                    and traffic density
+    aggregate       loading + averaging N run summaries (aggregate_results.py)
+                    from the CSVs, the warm summary cache and, with pyarrow
+                    installed, the Parquet results store
+    reward_wrapper  per-step overhead of LaneCenteringOvertakeReward
+
+Traffic density d sets vehicles_density=d and vehicles_count=20*d. With
+--workers W a case runs in W processes at once and the reported throughput is
+the combined ops/sec. Everything is seeded, so reruns time the same work.
+
+Results are appended to a history CSV with the git revision and host. Each
+case is compared with the baseline: the latest earlier run on the same host,
+or --baseline REV. Cases slower by more than --threshold are flagged, and
+the script exits non-zero.
+
+    python scripts/benchmark.py
+    python scripts/benchmark.py --benchmarks env_step --densities 1 2 4 --workers 1 2 4
+    python scripts/benchmark.py --baseline 3a0b6e0
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+AGENTS = ["dqn", "ppo", "sac", "td3"]
+ENV_IDS = ["highway-v0", "highway-fast-v0"]
+VARIANTS = ["default", "ppo", "continuous"]
+BENCHMARKS = ["env_step", "predict", "eval_episode", "aggregate", "reward_wrapper"]
+FIELDS = [
+    "timestamp",
+    "git_rev",
+    "host",
+    "benchmark",
+    "case",
+    "workers",
+    "ops",
+    "ops_per_sec",
+    "p50_ms",
+    "p90_ms",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark simulator, policy and pipeline.")
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        default=BENCHMARKS,
+        choices=BENCHMARKS,
+        help="Benchmarks to run.",
+    )
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=[1.0, 2.0],
+        help="Traffic densities (vehicles_density=d, vehicles_count=20*d).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2],
+        help="Concurrent processes per case.",
+    )
+    parser.add_argument("--agents", nargs="+", default=AGENTS, choices=AGENTS)
+    parser.add_argument("--env-ids", nargs="+", default=ENV_IDS, choices=ENV_IDS)
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--steps", type=int, default=100, help="Env steps timed per case.")
+    parser.add_argument(
+        "--episodes", type=int, default=2, help="Episodes timed per eval_episode case."
+    )
+    parser.add_argument(
+        "--predict-calls", type=int, default=500, help="predict() calls per case."
+    )
+    parser.add_argument(
+        "--summary-files",
+        type=int,
+        nargs="+",
+        default=[100, 1000],
+        help="Number of run summaries (CSVs or stored runs) in the aggregate cases.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for envs and actions.")
+    parser.add_argument(
+        "--history",
+        default="benchmark_history.csv",
+        help="CSV the results are appended to.",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="git revision to compare with (default: latest earlier run on this host).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Relative throughput drop vs the baseline that is flagged.",
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't append the results to the history."
+    )
+    args = parser.parse_args()
+    if min(args.workers) < 1:
+        parser.error("--workers values must be >= 1")
+    return args
+
+
+def traffic_config(density: float) -> dict:
+    return {"vehicles_density": density, "vehicles_count": int(round(20 * density))}
+
+
+def make_env(env_id: str, variant: str, density: float, seed: int, reward_wrapper=False):
+    import gymnasium as gym
+    import highway_env  # noqa: F401  (registers highway-v0)
+    from env_config import get_continuous_env_config, get_env_config, get_ppo_env_config
+    from reward_wrappers import LaneCenteringOvertakeReward
+
+    config = {
+        "default": get_env_config,
+        "ppo": get_ppo_env_config,
+        "continuous": get_continuous_env_config,
+    }[variant]()
+    env = gym.make(env_id)
+    if env_id == "highway-fast-v0":
+        # Its lower simulation frequency is part of what makes it fast.
+        config.pop("simulation_frequency")
+    env.unwrapped.config.update({**config, **traffic_config(density)})
+    if reward_wrapper:
+        env = LaneCenteringOvertakeReward(env)
+    env.reset(seed=seed)
+    env.action_space.seed(seed)
+    return env
+
+
+def step_times(env, steps: int, seed: int) -> list[float]:
+    times = []
+    episode = 0
+    for _ in range(steps):
+        action = env.action_space.sample()
+        start = time.perf_counter()
+        _, _, done, truncated, _ = env.step(action)
+        times.append(time.perf_counter() - start)
+        if done or truncated:
+            episode += 1
+            env.reset(seed=seed + episode)
+    return times
+
+
+class _InnerTimer:
+    """Records the duration of the wrapped env's step()."""
+
+    def __init__(self, env) -> None:
+        self.env = env
+        self.times: list[float] = []
+        self._step = env.step
+        env.step = self.step
+
+    def step(self, action):
+        start = time.perf_counter()
+        result = self._step(action)
+        self.times.append(time.perf_counter() - start)
+        return result
+
+
+def bench_env_step(case: dict, args: argparse.Namespace) -> list[float]:
+    env = make_env(case["env_id"], case["variant"], case["density"], args.seed)
+    try:
+        return step_times(env, args.steps, args.seed)
+    finally:
+        env.close()
+
+
+def bench_reward_wrapper(case: dict, args: argparse.Namespace) -> list[float]:
+    env = make_env("highway-v0", "continuous", case["density"], args.seed, reward_wrapper=True)
+    inner = _InnerTimer(env.env)
+    try:
+        outer = step_times(env, args.steps, args.seed)
+    finally:
+        env.close()
+    return [max(o - i, 0.0) for o, i in zip(outer, inner.times)]
+
+
+def bench_predict(case: dict, args: argparse.Namespace) -> list[float]:
+    import torch
+    from eval import AGENT_DIRS, load_policy
+
+    torch.set_num_threads(1)
+    agent = case["agent"]
+    model = load_policy(agent, AGENT_DIRS[agent], fast=case["policy"] == "fast")
+    rng = np.random.default_rng(args.seed)
+    observations = rng.standard_normal((args.predict_calls, 5, 5)).astype(np.float32)
+    model.predict(observations[0], deterministic=True)
+    times = []
+    for obs in observations:
+        start = time.perf_counter()
+        model.predict(obs, deterministic=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_eval_episode(case: dict, args: argparse.Namespace) -> list[float]:
+    import torch
+    from eval import AGENT_DIRS, episode_seed_for, load_model, make_eval_env, run_episode
+
+    torch.set_num_threads(1)
+    agent = case["agent"]
+    model = load_model(agent, AGENT_DIRS[agent])
+    env, eval_env, _ = make_eval_env(agent, AGENT_DIRS[agent], render=False)
+    eval_env.unwrapped.config.update(traffic_config(case["density"]))
+    times = []
+    try:
+        for ep in range(args.episodes):
+            start = time.perf_counter()
+            stats = run_episode(model, env, eval_env, agent, episode_seed_for(args.seed, 0, ep))
+            # Per-step time, so episodes that end in a crash are comparable.
+            times.extend([(time.perf_counter() - start) / stats["steps"]] * stats["steps"])
+    finally:
+        env.close()
+    return times
+
+
+def write_summaries(root: str, n_files: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    metrics = ["total_reward", "steps", "avg_speed_ms", "avg_ttc", "collision", "success"]
+    for i in range(n_files):
+        agent = AGENTS[i % len(AGENTS)]
+        summary_dir = os.path.join(root, f"{agent}_agent", "summary")
+        os.makedirs(summary_dir, exist_ok=True)
+        with open(os.path.join(summary_dir, f"run{i}_summary_bench.csv"), "w") as handle:
+            handle.write(",Value\n")
+            for metric, value in zip(metrics, rng.random(len(metrics))):
+                handle.write(f"{metric},{value}\n")
+
+
+def write_store(root: str, n_runs: int, seed: int, episodes: int = 20) -> None:
+    import pandas as pd
+    from results_store import ResultsStore
+
+    rng = np.random.default_rng(seed)
+    metrics = ["total_reward", "steps", "avg_speed_ms", "avg_ttc", "collision", "success"]
+    store = ResultsStore(os.path.join(root, "results_store"))
+    for i in range(n_runs):
+        frame = pd.DataFrame(rng.random((episodes, len(metrics))), columns=metrics)
+        store.append_run(AGENTS[i % len(AGENTS)], frame, {"bench": True}, seed, i + 1)
+
+
+def bench_aggregate(case: dict, args: argparse.Namespace) -> list[float]:
+    import pandas as pd
+    from aggregate_results import load_csv_summaries, load_store_summaries
+    from summary_cache import SummaryCache
+
+    pattern = "run*_summary_*.csv"
+    loaders = {
+        "csv": lambda: load_csv_summaries(AGENTS, pattern),
+        "cache": lambda: pd.DataFrame(
+            [
+                {"agent": entry["agent"], **entry["metrics"]}
+                for entry in SummaryCache("summary_cache.json").collect(AGENTS, pattern)
+            ]
+        ),
+        "store": lambda: load_store_summaries(AGENTS, "results_store"),
+    }
+
+    root = tempfile.mkdtemp(prefix="bench_aggregate_")
+    cwd = os.getcwd()
+    try:
+        if case["source"] == "store":
+            write_store(root, case["files"], args.seed)
+        else:
+            write_summaries(root, case["files"], args.seed)
+        # The loaders read <agent>_agent/summary (and the cache/store) relative to the cwd.
+        os.chdir(root)
+        if case["source"] == "cache":
+            loaders["cache"]()  # Warm the cache; the timed loads are all hits.
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            df = loaders[case["source"]]()
+            metrics = [
+                c for c in df.columns if c not in ("agent", "summary_path", "run_id", "run")
+            ]
+            df.groupby("agent")[metrics].mean()
+            times.append(time.perf_counter() - start)
+        return times
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+BENCHMARK_FUNCS = {
+    "env_step": bench_env_step,
+    "predict": bench_predict,
+    "eval_episode": bench_eval_episode,
+    "aggregate": bench_aggregate,
+    "reward_wrapper": bench_reward_wrapper,
+}
+
+
+def benchmark_cases(name: str, args: argparse.Namespace) -> list[dict]:
+    if name == "env_step":
+        return [
+            {"env_id": env_id, "variant": variant, "density": density}
+            for env_id in args.env_ids
+            for variant in args.variants
+            for density in args.densities
+        ]
+    if name == "predict":
+        from eval import AGENT_DIRS
+        from export_policy import FAST_POLICY_FILE
+
+        cases = []
+        for agent in args.agents:
+            cases.append({"agent": agent, "policy": "sb3"})
+            if os.path.exists(os.path.join(AGENT_DIRS[agent], FAST_POLICY_FILE)):
+                cases.append({"agent": agent, "policy": "fast"})
+        return cases
+    if name == "eval_episode":
+        return [
+            {"agent": agent, "density": density}
+            for agent in args.agents
+            for density in args.densities
+        ]
+    if name == "aggregate":
+        sources = ["csv", "cache"]
+        try:
+            import pyarrow  # noqa: F401
+
+            sources.append("store")
+        except ImportError:
+            pass
+        return [
+            {"files": n_files, "source": source}
+            for n_files in args.summary_files
+            for source in sources
+        ]
+    return [{"density": density} for density in args.densities]
+
+
+def _run_benchmark(name: str, case: dict, args: argparse.Namespace) -> list[float]:
+    return BENCHMARK_FUNCS[name](case, args)
+
+
+def run_case(name: str, case: dict, args: argparse.Namespace, workers: int) -> dict:
+    """
+    Run a case in `workers` concurrent processes.
+
+    ops_per_sec is the sum of the per-process rates, so contention between
+    the workers shows up as lower per-process rates. Setup (env creation,
+    model loading) is excluded.
+    """
+    if workers == 1:
+        results = [_run_benchmark(name, case, args)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context("spawn")
+        ) as pool:
+            futures = [pool.submit(_run_benchmark, name, case, args) for _ in range(workers)]
+            results = [future.result() for future in futures]
+    ops_per_sec = sum(len(times) / sum(times) for times in results if sum(times) > 0)
+    times = np.concatenate([np.asarray(times) for times in results]) * 1e3
+    p50, p90 = np.percentile(times, [50, 90])
+    return {
+        "ops": int(times.size),
+        "ops_per_sec": ops_per_sec,
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+    }
+
+
+def case_key(case: dict) -> str:
+    return json.dumps(case, sort_keys=True)
+
+
+def load_history(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def baseline_rows(history: list[dict], host: str, rev: str | None) -> dict:
+    """(benchmark, case, workers) -> ops_per_sec of the baseline run."""
+    rows = [row for row in history if row["host"] == host]
+    if rev is not None:
+        rows = [row for row in rows if row["git_rev"].startswith(rev)]
+    baseline = {}
+    # Later rows override earlier ones, so each case compares with its latest run.
+    for row in rows:
+        key = (row["benchmark"], row["case"], int(row["workers"]))
+        baseline[key] = float(row["ops_per_sec"])
+    return baseline
+
+
+def main() -> None:
+    from startup_time import git_rev
+
+    args = parse_args()
+    host = platform.node()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rev = git_rev()
+    baseline = baseline_rows(load_history(args.history), host, args.baseline)
+
+    rows = []
+    regressions = []
+    for name in args.benchmarks:
+        print(f"\n🏁 {name}")
+        print(f"{'case':<58}{'workers':>8}{'ops/s':>12}{'p50':>11}{'p90':>11}{'baseline':>12}")
+        for case in benchmark_cases(name, args):
+            for workers in args.workers:
+                result = run_case(name, case, args, workers)
+                key = case_key(case)
+                rows.append(
+                    {
+                        "timestamp": timestamp,
+                        "git_rev": rev,
+                        "host": host,
+                        "benchmark": name,
+                        "case": key,
+                        "workers": workers,
+                        "ops": result["ops"],
+                        "ops_per_sec": f"{result['ops_per_sec']:.4f}",
+                        "p50_ms": f"{result['p50_ms']:.4f}",
+                        "p90_ms": f"{result['p90_ms']:.4f}",
+                    }
+                )
+                before = baseline.get((name, key, workers))
+                flag = ""
+                if before is not None and result["ops_per_sec"] < before * (1 - args.threshold):
+                    flag = "  ⚠️ slower"
+                    regressions.append(f"{name} {key} x{workers}")
+                label = " ".join(f"{k}={v}" for k, v in case.items())
+                before_text = f"{before:.1f}" if before is not None else "-"
+                print(
+                    f"{label:<58}{workers:>8}{result['ops_per_sec']:>12.1f}"
+                    f"{result['p50_ms']:>9.3f}ms{result['p90_ms']:>9.3f}ms"
+                    f"{before_text:>12}{flag}"
+                )
+
+    if not args.no_save:
+        write_header = not os.path.exists(args.history)
+        with open(args.history, "a", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n📁 Appended {len(rows)} results to {args.history}")
+    if regressions:
+        raise SystemExit("Benchmark regressions:\n  " + "\n  ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
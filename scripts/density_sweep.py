@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Evaluate agents over a traffic density x vehicle-count grid.
+
+Every grid point runs the same seeded episodes as `eval.py --seed` with
+vehicles_density / vehicles_count overridden, and reports the eval.py metrics,
+the SI/EI/CI/RCI/GPS indicators and the wall-clock cost per step, split into
+env.step, predict and metric update. Grid points run in parallel worker
+processes.
+
+    python scripts/density_sweep.py --agents dqn sac --densities 1 2 3 --vehicles 20 50 100
+    python scripts/density_sweep.py --agents ppo --episodes 5 --workers 4
+
+Results are written to density_sweep/sweep_<timestamp>.csv. The script also
+fits how the per-step cost of each phase grows with the vehicle count
+(cost ~ N^k). The metric update reads the road into arrays once per step,
+so it should stay close to linear (k ~ 1). The simulator itself is not
+linear in N.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+PHASES = ["env.step", "predict", "metrics"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Traffic density sweep evaluation.")
+    parser.add_argument(
+        "--agents",
+        nargs="+",
+        default=["dqn", "ppo", "sac", "td3"],
+        choices=["dqn", "ppo", "sac", "td3"],
+        help="Agents to evaluate.",
+    )
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=[1.0, 2.0],
+        help="vehicles_density values.",
+    )
+    parser.add_argument(
+        "--vehicles",
+        type=int,
+        nargs="+",
+        default=[20, 50, 100],
+        help="vehicles_count values.",
+    )
+    parser.add_argument("--episodes", type=int, default=3, help="Episodes per grid point.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed (as in eval.py).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Grid points evaluated in parallel.",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default="density_sweep",
+        help="Directory for the results CSV.",
+    )
+    args = parser.parse_args()
+    if args.episodes < 1:
+        parser.error("--episodes must be >= 1")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    return args
+
+
+def evaluate_grid_point(
+    agent_type: str, density: float, vehicles: int, episodes: int, seed: int
+) -> dict:
+    """Run one grid point and return its mean metrics and per-step cost."""
+    import pandas as pd
+    import torch
+    from eval import AGENT_DIRS, episode_seed_for, load_model, make_eval_env, run_episode
+    from indicators import compute_indicators
+    from step_profiler import StepProfiler, disable, enable
+
+    # One BLAS/torch thread per worker; parallelism comes from the pool.
+    torch.set_num_threads(1)
+    agent_dir = AGENT_DIRS[agent_type]
+    model = load_model(agent_type, agent_dir)
+    env, eval_env, _ = make_eval_env(agent_type, agent_dir, render=False)
+    # Applied by the reset at the start of each episode.
+    eval_env.unwrapped.config.update({"vehicles_density": density, "vehicles_count": vehicles})
+
+    profiler = enable(StepProfiler())
+    start = time.perf_counter()
+    try:
+        stats = [
+            run_episode(model, env, eval_env, agent_type, episode_seed_for(seed, 0, ep))
+            for ep in range(episodes)
+        ]
+    finally:
+        disable()
+        env.close()
+    wall = time.perf_counter() - start
+    profile = profiler.summary(wall)
+
+    means = pd.DataFrame(stats).mean(numeric_only=True)
+    steps = int(sum(s["steps"] for s in stats))
+    row = {
+        "agent": agent_type,
+        "vehicles_density": density,
+        "vehicles_count": vehicles,
+        "episodes": episodes,
+        **means.to_dict(),
+        **compute_indicators(means),
+        "wall_s": wall,
+        "total_steps": steps,
+        "ms_per_step": wall * 1e3 / steps if steps else float("nan"),
+    }
+    for phase in PHASES:
+        phase_stats = profile["phases"].get(phase)
+        row[f"{phase.replace('.', '_')}_ms"] = phase_stats["mean_ms"] if phase_stats else 0.0
+    return row
+
+
+def _run_point(point: tuple) -> dict:
+    return evaluate_grid_point(*point)
+
+
+def scaling_exponents(df) -> dict[tuple[str, str], float]:
+    """Fitted k in cost ~ vehicles_count^k per (agent, phase), over the whole grid."""
+    exponents = {}
+    for agent, group in df.groupby("agent"):
+        if group["vehicles_count"].nunique() < 2:
+            continue
+        log_n = np.log(group["vehicles_count"].to_numpy(dtype=float))
+        for column in ["ms_per_step", *[f"{p.replace('.', '_')}_ms" for p in PHASES]]:
+            cost = group[column].to_numpy(dtype=float)
+            if np.all(cost > 0):
+                exponents[(agent, column)] = float(np.polyfit(log_n, np.log(cost), 1)[0])
+    return exponents
+
+
+def main() -> None:
+    import pandas as pd
+
+    args = parse_args()
+    points = [
+        (agent, density, vehicles, args.episodes, args.seed)
+        for agent in args.agents
+        for density in args.densities
+        for vehicles in args.vehicles
+    ]
+    print(
+        f"🚦 Density sweep: {len(args.agents)} agents x {len(args.densities)} densities x "
+        f"{len(args.vehicles)} vehicle counts, {args.episodes} episodes each "
+        f"({min(args.workers, len(points))} workers)"
+    )
+
+    rows = []
+    if args.workers == 1:
+        results = map(_run_point, points)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=min(args.workers, len(points)), mp_context=mp.get_context("spawn")
+        )
+        results = pool.map(_run_point, points)
+    try:
+        for row in results:
+            rows.append(row)
+            print(
+                f"  {row['agent'].upper():<4} density={row['vehicles_density']:<4g} "
+                f"vehicles={row['vehicles_count']:<4d} GPS={row['GPS']:.3f} "
+                f"collision={row['collision']:.2f} {row['ms_per_step']:.1f} ms/step "
+                f"(env {row['env_step_ms']:.1f}, predict {row['predict_ms']:.2f}, "
+                f"metrics {row['metrics_ms']:.2f})"
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    df = pd.DataFrame(rows)
+    os.makedirs(args.out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(args.out_dir, f"sweep_{timestamp}.csv")
+    df.to_csv(out_path, index=False)
+
+    exponents = scaling_exponents(df)
+    if exponents:
+        print("\nPer-step cost scaling with vehicle count (cost ~ N^k):")
+        for (agent, column), k in exponents.items():
+            print(f"  {agent.upper():<4} {column:<14} k={k:.2f}")
+    print(f"\n📁 Results saved to: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Vectorized driving metrics shared by evaluation and reward shaping.
+
+Each step the road is snapshotted once into NumPy arrays (positions, speeds,
+lane ids of the surrounding traffic); TTC, lane changes and jerk are then
+computed with array operations instead of per-vehicle Python comparisons.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+SAFE_TTC_THRESHOLD = 2.0
+# Lane id used in snapshot arrays for vehicles without a lane_index.
+NO_LANE = -1
+# Closing speeds below this (m/s) are treated as "not approaching".
+MIN_CLOSING_SPEED = 0.01
+# Keys of EpisodeMetrics.summary().
+SUMMARY_KEYS = (
+    "avg_speed_ms",
+    "lane_changes",
+    "avg_jerk",
+    "max_jerk",
+    "avg_ttc",
+    "min_ttc",
+    "ttc_violation_rate",
+)
+
+
+def lane_id(vehicle) -> int | None:
+    """Return the lane number of a vehicle, or None when it is off the network."""
+    return vehicle.lane_index[2] if vehicle.lane_index is not None else None
+
+
+@dataclass
+class RoadSnapshot:
+    """Array view of the road around the ego vehicle at a single step."""
+
+    ego_x: float
+    ego_speed: float
+    ego_lane: int | None
+    vehicles: list
+    x: np.ndarray
+    speed: np.ndarray
+    lane: np.ndarray
+
+    @property
+    def rel_x(self) -> np.ndarray:
+        return self.x - self.ego_x
+
+
+def snapshot_road(road, ego) -> RoadSnapshot:
+    """Read ego and traffic state into arrays (one pass over road.vehicles)."""
+    others = [v for v in road.vehicles if v is not ego]
+    n = len(others)
+    x = np.fromiter((v.position[0] for v in others), dtype=float, count=n)
+    speed = np.fromiter((v.speed for v in others), dtype=float, count=n)
+    lane = np.fromiter(
+        (v.lane_index[2] if v.lane_index is not None else NO_LANE for v in others),
+        dtype=np.int64,
+        count=n,
+    )
+    return RoadSnapshot(
+        ego_x=float(ego.position[0]),
+        ego_speed=float(ego.speed),
+        ego_lane=lane_id(ego),
+        vehicles=others,
+        x=x,
+        speed=speed,
+        lane=lane,
+    )
+
+
+def road_snapshot(env) -> RoadSnapshot:
+    """
+    snapshot_road() of env's current step, taken at most once per step.
+
+    The reward wrapper, EpisodeMetrics and the trajectory recorder all read
+    the same step; the snapshot is cached on the unwrapped env, keyed by its
+    road object and step counter (reset builds a new road).
+    """
+    base = env.unwrapped
+    cached = getattr(base, "_road_snapshot", None)
+    if cached is not None and cached[0] is base.road and cached[1] == base.steps:
+        return cached[2]
+    snapshot = snapshot_road(base.road, base.vehicle)
+    base._road_snapshot = (base.road, base.steps, snapshot)
+    return snapshot
+
+
+def leader_ttc(snapshot: RoadSnapshot) -> float:
+    """
+    Minimum time-to-collision to vehicles ahead in the ego lane.
+
+    Returns inf when no same-lane vehicle ahead is being closed in on.
+    """
+    if snapshot.ego_lane is None or snapshot.x.size == 0:
+        return float("inf")
+    rel_x = snapshot.rel_x
+    rel_v = snapshot.ego_speed - snapshot.speed
+    mask = (snapshot.lane == snapshot.ego_lane) & (rel_x > 0) & (rel_v > MIN_CLOSING_SPEED)
+    if not mask.any():
+        return float("inf")
+    return float(np.min(rel_x[mask] / rel_v[mask]))
+
+
+def count_lane_changes(lanes) -> int:
+    """Count lane switches in a sequence of lane ids (None/NO_LANE breaks a pair)."""
+    lanes = np.asarray(
+        [NO_LANE if lane is None else lane for lane in lanes], dtype=np.int64
+    )
+    if lanes.size < 2:
+        return 0
+    prev, cur = lanes[:-1], lanes[1:]
+    return int(np.count_nonzero((prev != NO_LANE) & (cur != NO_LANE) & (prev != cur)))
+
+
+def jerk_series(speeds) -> np.ndarray:
+    """Absolute per-step jerk from ego speeds, starting from rest (v=0, a=0)."""
+    speeds = np.asarray(speeds, dtype=float)
+    acc = np.diff(speeds, prepend=0.0)
+    return np.abs(np.diff(acc, prepend=0.0))
+
+
+class EpisodeMetrics:
+    """
+    Accumulate ego metrics over one episode.
+
+    Call reset() after env.reset() and update() with road_snapshot(env)
+    after every env.step(); summary() returns the per-episode columns
+    written by eval.py.
+    """
+
+    def __init__(self, ttc_threshold: float = SAFE_TTC_THRESHOLD) -> None:
+        self.ttc_threshold = ttc_threshold
+        self.reset(None)
+
+    def reset(self, ego) -> None:
+        self._speeds: list[float] = []
+        self._ttcs: list[float] = []
+        self._lanes: list[int | None] = [lane_id(ego)] if ego is not None else []
+
+    @property
+    def steps(self) -> int:
+        return len(self._speeds)
+
+    def update(self, snapshot: RoadSnapshot) -> None:
+        self._speeds.append(snapshot.ego_speed)
+        self._lanes.append(snapshot.ego_lane)
+        min_ttc = leader_ttc(snapshot)
+        if min_ttc != float("inf"):
+            self._ttcs.append(min_ttc)
+
+    def summary(self) -> dict[str, float]:
+        steps = self.steps
+        jerk_values = jerk_series(self._speeds)
+        ttc_values = np.asarray(self._ttcs, dtype=float)
+        ttc_violations = int(np.count_nonzero(ttc_values < self.ttc_threshold))
+        return {
+            "avg_speed_ms": float(np.sum(self._speeds)) / (steps + 1e-6),
+            "lane_changes": count_lane_changes(self._lanes),
+            "avg_jerk": float(np.mean(jerk_values)) if jerk_values.size else 0.0,
+            "max_jerk": float(np.max(jerk_values)) if jerk_values.size else 0.0,
+            "avg_ttc": float(np.mean(ttc_values)) if ttc_values.size else -1.0,
+            "min_ttc": float(np.min(ttc_values)) if ttc_values.size else -1.0,
+            "ttc_violation_rate": ttc_violations / (steps + 1e-6),
+        }
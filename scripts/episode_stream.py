@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL stream of per-episode eval records (eval.py --stream).
+
+eval.py writes one line per finished episode and flushes it to disk right
+away. A run that dies part-way still leaves every finished episode on disk,
+and `eval.py --stream PATH --resume` picks the run up from there. Each line
+is one of:
+
+    {"type": "start", "agent", "seed", "runs", "episodes", "time"}
+    {"type": "episode", "agent", "run", "episode", "seed", <eval.py stats>, "time"}
+    {"type": "end", "time"}
+
+Consumers read a stream with read_records(), or follow it while it grows
+with follow(). LiveAggregate keeps running means/stds and the SI/EI/CI/RCI/GPS
+indicators per agent. Run this module as a script to watch one or more
+streams live:
+
+    python scripts/episode_stream.py dqn_agent/streams/*.jsonl --follow
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Episode record fields that are not metrics.
+KEY_FIELDS = ("type", "agent", "run", "episode", "seed", "time")
+
+
+def _json_default(value):
+    # numpy scalars (np.float64, np.bool_) in the stats dicts.
+    return value.item()
+
+
+class EpisodeStream:
+    """Writer of one stream file; every record is flushed and fsynced."""
+
+    def __init__(self, path: str, header: dict | None = None) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        resumed = os.path.exists(path) and os.path.getsize(path) > 0
+        self._handle = open(path, "a")
+        if resumed:
+            _drop_partial_line(path, self._handle)
+        elif header is not None:
+            self._write({"type": "start", **header})
+
+    def _write(self, record: dict) -> None:
+        record.setdefault("time", time.time())
+        self._handle.write(json.dumps(record, default=_json_default) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def episode(self, agent: str, run_idx: int, ep: int, seed: int | None, stats: dict) -> None:
+        self._write(
+            {
+                "type": "episode",
+                "agent": agent,
+                "run": run_idx + 1,
+                "episode": ep + 1,
+                "seed": seed,
+                **stats,
+            }
+        )
+
+    def close(self) -> None:
+        self._write({"type": "end"})
+        self._handle.close()
+
+
+def _drop_partial_line(path: str, handle) -> None:
+    # A crash mid-write can leave a line without its newline; cut it off so
+    # the next record starts on a line of its own.
+    with open(path, "rb") as reader:
+        data = reader.read()
+    if data and not data.endswith(b"\n"):
+        handle.truncate(data.rfind(b"\n") + 1)
+
+
+def read_records(path: str) -> list[dict]:
+    """All complete records of a stream (a torn last line is skipped)."""
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.endswith("\n")]
+
+
+def completed_episodes(path: str) -> tuple[dict | None, dict[tuple[int, int], dict]]:
+    """(start record, {(run_idx, ep): stats}) of a stream, for resuming it."""
+    header = None
+    episodes = {}
+    for record in read_records(path):
+        if record["type"] == "start" and header is None:
+            header = record
+        elif record["type"] == "episode":
+            stats = {k: v for k, v in record.items() if k not in KEY_FIELDS}
+            episodes[(record["run"] - 1, record["episode"] - 1)] = stats
+    return header, episodes
+
+
+def follow(paths: list[str], poll: float = 0.5, stop_at_end: bool = True):
+    """
+    Yield (path, record) as the streams grow, like `tail -f`.
+
+    Partial lines wait until they are complete. With stop_at_end, the
+    generator returns once every stream has written its "end" record.
+    """
+    offsets = dict.fromkeys(paths, 0)
+    buffers = dict.fromkeys(paths, "")
+    ended = set()
+    while True:
+        grew = False
+        for path in paths:
+            if path in ended or not os.path.exists(path):
+                continue
+            with open(path) as handle:
+                handle.seek(offsets[path])
+                chunk = handle.read()
+                offsets[path] = handle.tell()
+            if not chunk:
+                continue
+            grew = True
+            lines = (buffers[path] + chunk).split("\n")
+            buffers[path] = lines.pop()
+            for line in lines:
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record["type"] == "end":
+                    ended.add(path)
+                yield path, record
+        if stop_at_end and len(ended) == len(paths):
+            return
+        if not grew:
+            time.sleep(poll)
+
+
+class LiveAggregate:
+    """Running per-agent mean/std of episode metrics (Welford) plus indicators."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, dict[str, list[float]]] = {}
+        self.episodes: dict[str, int] = {}
+
+    def update(self, record: dict) -> None:
+        if record["type"] != "episode":
+            return
+        agent = record["agent"]
+        self.episodes[agent] = n = self.episodes.get(agent, 0) + 1
+        stats = self._stats.setdefault(agent, {})
+        for key, value in record.items():
+            if key in KEY_FIELDS or not isinstance(value, (int, float)):
+                continue
+            mean, m2 = stats.get(key, (0.0, 0.0))
+            delta = float(value) - mean
+            mean += delta / n
+            stats[key] = (mean, m2 + delta * (float(value) - mean))
+
+    def summary(self):
+        """One row per agent: episodes, <metric>_mean/_std and the indicators."""
+        import pandas as pd
+        from indicators import compute_indicators
+
+        rows = []
+        for agent, stats in self._stats.items():
+            n = self.episodes[agent]
+            means = {key: mean for key, (mean, _) in stats.items()}
+            row = {"agent": agent, "episodes": n}
+            for key, (mean, m2) in stats.items():
+                row[f"{key}_mean"] = mean
+                row[f"{key}_std"] = math.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+            row.update(compute_indicators(means))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def print_summary(aggregate: LiveAggregate) -> None:
+    columns = ["collision", "avg_speed_ms", "avg_ttc", "total_reward"]
+    indicators = ["SI", "EI", "CI", "RCI", "GPS"]
+    header = f"{'agent':<6}{'eps':>6}" + "".join(f"{c:>14}" for c in columns + indicators)
+    print(header)
+    for row in aggregate.summary().to_dict("records"):
+        values = [row[f"{c}_mean"] for c in columns] + [row[i] for i in indicators]
+        print(
+            f"{row['agent'].upper():<6}{row['episodes']:>6}"
+            + "".join(f"{v:>14.4f}" for v in values)
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Aggregate eval.py episode streams live.")
+    parser.add_argument("paths", nargs="+", help="Stream files (JSONL) written by eval.py --stream.")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep reading as the streams grow, until every stream has ended.",
+    )
+    parser.add_argument(
+        "--every", type=int, default=1, help="Print the aggregates every N episodes."
+    )
+    parser.add_argument("--poll", type=float, default=0.5, help="Poll interval in seconds.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    aggregate = LiveAggregate()
+    if args.follow:
+        seen = 0
+        for _, record in follow(args.paths, args.poll):
+            aggregate.update(record)
+            if record["type"] == "episode":
+                seen += 1
+                if seen % args.every == 0:
+                    print(f"\n📡 {seen} episodes")
+                    print_summary(aggregate)
+        print(f"\n🏁 All streams ended after {seen} episodes")
+        if seen % args.every:
+            print_summary(aggregate)
+    else:
+        for path in args.paths:
+            for record in read_records(path):
+                aggregate.update(record)
+        print_summary(aggregate)
+
+
+if __name__ == "__main__":
+    main()
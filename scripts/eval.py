@@ -4,26 +4,45 @@ Unified evaluation script for DQN/PPO/SAC/TD3.
 
 Uses consistent environment configs and saves per-episode stats + summary CSV.
 Loads VecNormalize for PPO to ensure correct observation normalization.
+With --workers N, episodes are spread over a process pool; each worker builds
+its own env and loads the model once, and results are gathered back in episode
+order so seeded runs match the serial path. With --n-envs K, K environments
+are stepped in lockstep behind a VecEnv and the policy runs one batched
+predict per step. With --adaptive, seeded episodes are added in batches
+until the confidence intervals of the target metrics are narrow enough.
+
+Heavy modules (highway_env, stable_baselines3/torch, pandas) are imported
+on the code path that needs them, so `--help` and the --workers parent
+process start fast; scripts/startup_time.py tracks CLI startup cost.
 """
 
 from __future__ import annotations
 
 import argparse
+import multiprocessing as mp
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import partial
 import sys
 
 import numpy as np
-import pandas as pd
-import gymnasium as gym
-import highway_env
-from stable_baselines3 import DQN, PPO, SAC, TD3
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from env_config import get_env_config, get_continuous_env_config
-from reward_wrappers import LaneCenteringOvertakeReward
+from driving_metrics import SAFE_TTC_THRESHOLD, SUMMARY_KEYS, EpisodeMetrics, road_snapshot
+from step_profiler import profile
+
 
+AGENT_DIRS = {
+    "ppo": "ppo_agent",
+    "dqn": "dqn_agent",
+    "sac": "sac_agent",
+    "td3": "td3_agent",
+}
+
+# Columns of the per-episode stats returned by run_episode.
+EPISODE_STATS = ["total_reward", "steps", *SUMMARY_KEYS, "collision", "success"]
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate a trained agent.")
@@ -51,53 +70,227 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Random seed for evaluation.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes (1 = serial, in-process evaluation).",
+    )
+    parser.add_argument(
+        "--n-envs",
+        type=int,
+        default=1,
+        help="Environments stepped in lockstep with one batched predict (1 = off).",
+    )
+    parser.add_argument(
+        "--vec-backend",
+        choices=["dummy", "subproc"],
+        default="dummy",
+        help="VecEnv used with --n-envs > 1.",
+    )
+    parser.add_argument(
+        "--fast-policy",
+        action="store_true",
+        help="Run the TorchScript export (<agent>_agent/policy_fast.pt) instead of SB3 predict.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time predict / env.step / reward terms / metrics per step and save a report.",
+    )
+    parser.add_argument(
+        "--record-trajectories",
+        action="store_true",
+        help="Save per-episode ego/traffic trajectories under <agent>_agent/trajectories/.",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "Run seeded episodes in batches until every --target-width is met or "
+            "--max-episodes is reached (replaces --episodes/--runs)."
+        ),
+    )
+    parser.add_argument(
+        "--target-width",
+        action="extend",
+        nargs="+",
+        default=None,
+        metavar="METRIC=WIDTH",
+        help=(
+            "Target confidence-interval widths for --adaptive (default "
+            "collision=0.1, GPS=0.03, avg_speed_ms=0.5)."
+        ),
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence level for --adaptive."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10, help="Episodes per --adaptive batch."
+    )
+    parser.add_argument(
+        "--min-episodes", type=int, default=20, help="Episodes before --adaptive may stop."
+    )
+    parser.add_argument(
+        "--max-episodes", type=int, default=300, help="Episode budget for --adaptive."
+    )
+    parser.add_argument(
+        "--scenario-cache",
+        nargs="?",
+        const=".scenario_cache",
+        default=None,
+        metavar="DIR",
+        help="Restore seeded initial scenarios from a cache (memory + DIR) instead of regenerating.",
+    )
+    parser.add_argument(
+        "--capture",
+        nargs="+",
+        default=None,
+        metavar="RULE",
+        help=(
+            "Record headless frames of selected episodes: all, collision, "
+            "min-ttc:SECONDS, worst-ttc:K (see frame_capture.py)."
+        ),
+    )
+    parser.add_argument(
+        "--capture-format",
+        choices=["npz", "mp4"],
+        default="npz",
+        help="Compressed frame archive (npz) or video (mp4, needs imageio-ffmpeg).",
+    )
+    parser.add_argument(
+        "--stream",
+        nargs="?",
+        const="auto",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Append every finished episode to a JSONL stream, flushed per episode "
+            "(default path: <agent>_agent/streams/stream_<timestamp>.jsonl)."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the episodes already recorded in --stream PATH and continue the run.",
+    )
+    parser.add_argument(
+        "--results-store",
+        default=None,
+        metavar="DIR",
+        help="Append episodes to the Parquet results store in DIR instead of writing CSVs.",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.n_envs < 1:
+        parser.error("--n-envs must be >= 1")
+    if args.workers > 1 and args.n_envs > 1:
+        parser.error("--workers and --n-envs cannot be combined")
+    if (args.workers > 1 or args.n_envs > 1) and args.render:
+        parser.error("--render is only supported with --workers 1 and --n-envs 1")
+    if args.capture:
+        if args.render:
+            parser.error("--capture renders offscreen and cannot be combined with --render")
+        from frame_capture import parse_rules
+
+        try:
+            parse_rules(args.capture)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.adaptive:
+        if args.n_envs > 1:
+            parser.error("--adaptive cannot be combined with --n-envs")
+        if args.runs != 1:
+            parser.error("--adaptive evaluates a single run; drop --runs")
+        if args.batch_size < 1 or args.max_episodes < 1:
+            parser.error("--batch-size and --max-episodes must be >= 1")
+        from indicators import INDICATOR_NAMES
+        from sequential import parse_targets
+
+        try:
+            args.target_width = parse_targets(
+                args.target_width, known=[*EPISODE_STATS, *INDICATOR_NAMES]
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+    elif args.target_width:
+        parser.error("--target-width requires --adaptive")
+    if args.resume:
+        if args.stream in (None, "auto"):
+            parser.error("--resume needs the stream to continue: --stream PATH")
+        if args.adaptive:
+            parser.error("--resume cannot be combined with --adaptive")
+    return args
+
+
+def agent_env_config(agent_type: str) -> dict:
+    if agent_type in ("sac", "td3"):
+        return get_continuous_env_config()
+    return get_env_config()
 
 
 def build_env(agent_type: str, render: bool):
-    render_mode = "human" if render else None
+    import gymnasium as gym
+    import highway_env  # noqa: F401  (registers highway-v0)
+    from reward_wrappers import LaneCenteringOvertakeReward
+
+    import frame_capture
+
+    capturing = frame_capture.active() is not None
+    render_mode = "human" if render else ("rgb_array" if capturing else None)
     env = gym.make("highway-v0", render_mode=render_mode)
-    if agent_type in ("sac", "td3"):
-        config = get_continuous_env_config()
-    else:
-        config = get_env_config()
+    config = agent_env_config(agent_type)
     env.unwrapped.config.update(config)
+    from scenario_cache import ScenarioCacheWrapper, active
+
+    if active() is not None:
+        # Below the reward wrapper, so its reset() still runs.
+        env = ScenarioCacheWrapper(env, active())
     if agent_type in ("sac", "td3"):
         env = LaneCenteringOvertakeReward(env)
+    if capturing:
+        env = frame_capture.wrap(env)
     return env, config
 
 
 def load_model(agent_type: str, agent_dir: str):
-    if agent_type == "ppo":
-        return PPO.load(f"{agent_dir}/model")
-    if agent_type == "dqn":
-        return DQN.load(f"{agent_dir}/model")
-    if agent_type == "sac":
-        return SAC.load(f"{agent_dir}/model")
-    if agent_type == "td3":
-        return TD3.load(f"{agent_dir}/model")
-    raise ValueError(f"Unsupported agent: {agent_type}")
+    # Deferred so --help and the --workers parent never load SB3/torch.
+    # SB3's package __init__ imports every algorithm, so importing a single
+    # class saves nothing over importing all four.
+    from stable_baselines3 import DQN, PPO, SAC, TD3
 
+    algorithms = {"ppo": PPO, "dqn": DQN, "sac": SAC, "td3": TD3}
+    if agent_type not in algorithms:
+        raise ValueError(f"Unsupported agent: {agent_type}")
+    return algorithms[agent_type].load(f"{agent_dir}/model")
 
-def main() -> None:
-    args = parse_args()
 
-    agent_dir = {
-        "ppo": "ppo_agent",
-        "dqn": "dqn_agent",
-        "sac": "sac_agent",
-        "td3": "td3_agent",
-    }[args.agent]
+def load_policy(agent_type: str, agent_dir: str, fast: bool = False):
+    """SB3 model, or with fast=True the exported FastPolicy (same predict())."""
+    if fast:
+        from export_policy import FastPolicy
 
-    os.makedirs(f"{agent_dir}/instant_runs", exist_ok=True)
-    os.makedirs(f"{agent_dir}/summary", exist_ok=True)
+        return FastPolicy.load(agent_dir)
+    return load_model(agent_type, agent_dir)
 
-    model = load_model(args.agent, agent_dir)
 
-    base_env, config = build_env(args.agent, args.render)
+def make_eval_env(agent_type: str, agent_dir: str, render: bool, normalize_obs: bool = True):
+    """
+    Build the environment used for evaluation.
+
+    Returns (env, eval_env, config): `env` is what the policy steps (a
+    VecNormalize for PPO), `eval_env` is the underlying gym env used to read
+    the ego vehicle and road state. normalize_obs=False keeps PPO's
+    VecNormalize wrapper but hands out raw observations, for policies with
+    the normalization folded in (FastPolicy).
+    """
+    base_env, config = build_env(agent_type, render)
 
     # PPO uses VecNormalize during training; load it for evaluation.
-    if args.agent == "ppo":
+    if agent_type == "ppo":
+        from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
         vec_env = DummyVecEnv([lambda: base_env])
         norm_path = os.path.join(agent_dir, "vec_normalize.pkl")
         if not os.path.exists(norm_path):
@@ -105,165 +298,736 @@ def main() -> None:
         env = VecNormalize.load(norm_path, vec_env)
         env.training = False
         env.norm_reward = False
+        env.norm_obs = env.norm_obs and normalize_obs
         eval_env = env.envs[0]
     else:
         env = base_env
         eval_env = env
+    return env, eval_env, config
 
-    print("\n" + "=" * 70)
-    print(f"🚗 Evaluating {args.agent.upper()} Agent")
-    print("=" * 70)
-    print("Environment: highway-v0")
+
+def episode_seed_for(base_seed: int | None, run_idx: int, ep: int) -> int | None:
+    if base_seed is None:
+        return None
+    return base_seed + (run_idx * 1000) + ep
+
+
+def run_episode(
+    model, env, eval_env, agent_type: str, episode_seed: int | None, recorder=None
+):
+    """
+    Roll out one deterministic episode and return its stats dict.
+
+    With a TrajectoryRecorder, the episode's ego/traffic state is recorded too.
+    """
+    with profile("reset"):
+        if agent_type == "ppo":
+            if episode_seed is not None:
+                env.seed(episode_seed)
+            obs = env.reset()[0]
+        else:
+            obs, _ = env.reset(seed=episode_seed)
+    done = truncated = False
+    info = {}
+
+    ep_reward = 0.0
+    ep_steps = 0
+    metrics = EpisodeMetrics(SAFE_TTC_THRESHOLD)
+    metrics.reset(eval_env.unwrapped.vehicle)
+    if recorder is not None:
+        recorder.reset(eval_env.unwrapped.vehicle, road_snapshot(eval_env))
+
+    while not (done or truncated):
+        with profile("predict"):
+            action, _ = model.predict(obs, deterministic=True)
+        if agent_type == "ppo":
+            # Step the gym env under the VecNormalize directly: the VecEnv would
+            # auto-reset on the terminal step, before the metrics below read the
+            # final state (EpisodeStatsWrapper in --n-envs reads it pre-reset).
+            if np.ndim(action) > 0:
+                action = action[0]
+            with profile("env.step"):
+                obs, reward, done, truncated, info = eval_env.step(action)
+                obs = env.normalize_obs(obs)
+            reward = float(reward)
+        else:
+            with profile("env.step"):
+                obs, reward, done, truncated, info = env.step(action)
+            reward = float(reward)
+        ep_reward += reward
+        ep_steps += 1
+
+        with profile("metrics"):
+            snapshot = road_snapshot(eval_env)
+            metrics.update(snapshot)
+        if recorder is not None:
+            with profile("trajectory"):
+                recorder.record(
+                    eval_env.unwrapped.vehicle, snapshot, action, reward, info.get("crashed", False)
+                )
+
+    return {
+        "total_reward": ep_reward,
+        "steps": ep_steps,
+        **metrics.summary(),
+        "collision": info.get("crashed", False),
+        "success": not info.get("crashed", False),
+    }
+
+
+def evaluate_model(
+    agent_type: str, agent_dir: str, episodes: int, seed: int | None = None
+) -> list[dict]:
+    """
+    Evaluate the model saved in agent_dir on the standard eval env.
+
+    Convenience entry point for other tools (sweeps, training hooks); runs
+    serially in-process and returns the per-episode stats dicts.
+    """
+    model = load_model(agent_type, agent_dir)
+    env, eval_env, _ = make_eval_env(agent_type, agent_dir, render=False)
+    try:
+        return [
+            {
+                "episode": ep + 1,
+                **run_episode(
+                    model, env, eval_env, agent_type, episode_seed_for(seed, 0, ep)
+                ),
+            }
+            for ep in range(episodes)
+        ]
+    finally:
+        env.close()
+
+
+def _make_stats_env(
+    agent_type: str,
+    episodes,
+    record: bool = False,
+    profiled: bool = False,
+    scenario_cache: str | None = None,
+    capture: dict | None = None,
+):
+    from stats_wrappers import EpisodeStatsWrapper
+
+    if scenario_cache is not None:
+        import scenario_cache as scenarios
+
+        if scenarios.active() is None:
+            scenarios.enable(scenario_cache)
+    if capture is not None:
+        import frame_capture
+
+        if frame_capture.active() is None:
+            frame_capture.enable(**capture)
+    env, _ = build_env(agent_type, render=False)
+    return EpisodeStatsWrapper(env, episodes, record=record, profiled=profiled)
+
+
+def make_batched_env(
+    agent_type: str,
+    agent_dir: str,
+    slots,
+    backend: str = "dummy",
+    record: bool = False,
+    normalize_obs: bool = True,
+    profiled: bool = False,
+    scenario_cache: str | None = None,
+    capture: dict | None = None,
+):
+    """
+    Build a VecEnv with one EpisodeStatsWrapper per slot.
+
+    `slots` holds one list of (episode_key, seed) per environment. PPO gets
+    its training VecNormalize statistics applied on top.
+    """
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecNormalize
+
+    env_fns = [
+        partial(
+            _make_stats_env, agent_type, episodes, record, profiled, scenario_cache, capture
+        )
+        for episodes in slots
+    ]
+    vec_cls = SubprocVecEnv if backend == "subproc" else DummyVecEnv
+    vec_env = vec_cls(env_fns)
+    if agent_type == "ppo":
+        norm_path = os.path.join(agent_dir, "vec_normalize.pkl")
+        if not os.path.exists(norm_path):
+            raise FileNotFoundError(f"Missing VecNormalize file: {norm_path}")
+        vec_env = VecNormalize.load(norm_path, vec_env)
+        vec_env.training = False
+        vec_env.norm_reward = False
+        vec_env.norm_obs = vec_env.norm_obs and normalize_obs
+    return vec_env
+
+
+def run_batched(
+    model, vec_env, n_episodes: int, trajectories: dict | None = None, on_episode=None
+) -> dict:
+    """
+    Step all envs in lockstep until `n_episodes` keyed episodes finished.
+
+    Returns {episode_key: stats}; recorded trajectories (when the envs were
+    built with record=True) are put in `trajectories` under the same keys.
+    on_episode(key, stats) is called as soon as each keyed episode finishes.
+    """
+    from step_profiler import active
+
+    results = {}
+    obs = vec_env.reset()
+    while len(results) < n_episodes:
+        with profile("predict"):
+            actions, _ = model.predict(obs, deterministic=True)
+        obs, _, _, infos = vec_env.step(actions)
+        for info in infos:
+            if "profile" in info and active() is not None:
+                active().merge(info["profile"])
+            finished = info.get("episode_stats")
+            if finished is not None and finished["key"] is not None:
+                results[finished["key"]] = finished["stats"]
+                if on_episode is not None:
+                    on_episode(finished["key"], finished["stats"])
+                if trajectories is not None and "trajectory" in finished:
+                    trajectories[finished["key"]] = finished["trajectory"]
+    return results
+
+
+# Per-process state for --workers mode: (agent_type, model, env, eval_env).
+_WORKER_STATE: dict = {}
+
+
+def _init_worker(
+    agent_type: str,
+    agent_dir: str,
+    record: bool = False,
+    fast: bool = False,
+    profiled: bool = False,
+    scenario_cache: str | None = None,
+    capture: dict | None = None,
+) -> None:
+    # One BLAS/torch thread per worker; parallelism comes from the pool.
+    import torch
+
+    torch.set_num_threads(1)
+    if scenario_cache is not None:
+        import scenario_cache as scenarios
+
+        scenarios.enable(scenario_cache)
+    if capture is not None:
+        import frame_capture
+
+        frame_capture.enable(**capture)
+    if profiled:
+        from step_profiler import enable
+
+        enable()
+    model = load_policy(agent_type, agent_dir, fast)
+    env, eval_env, _ = make_eval_env(
+        agent_type, agent_dir, render=False, normalize_obs=not fast
+    )
+    _WORKER_STATE.update(
+        agent_type=agent_type, model=model, env=env, eval_env=eval_env, record=record
+    )
+
+
+def _run_episode_task(task: tuple[int, int, int | None]):
+    run_idx, ep, episode_seed = task
+    recorder = None
+    if _WORKER_STATE["record"]:
+        from trajectory import TrajectoryRecorder
+
+        recorder = TrajectoryRecorder()
+    stats = run_episode(
+        _WORKER_STATE["model"],
+        _WORKER_STATE["env"],
+        _WORKER_STATE["eval_env"],
+        _WORKER_STATE["agent_type"],
+        episode_seed,
+        recorder,
+    )
+    from frame_capture import finish_episode
+    from step_profiler import active
+
+    finish_episode(_WORKER_STATE["eval_env"], (run_idx, ep), stats, episode_seed)
+
+    trajectory = recorder.arrays() if recorder is not None else None
+    samples = active().drain() if active() is not None else None
+    return run_idx, ep, stats, trajectory, samples
+
+
+def stream_episode(args: argparse.Namespace, run_idx: int, ep: int, stats: dict) -> None:
+    """Append a finished episode to the --stream file, if any."""
+    if args.episode_stream is not None:
+        args.episode_stream.episode(
+            args.agent, run_idx, ep, episode_seed_for(args.seed, run_idx, ep), stats
+        )
+
+
+def print_episode(ep: int, episodes: int, stats: dict) -> None:
     print(
-        f"Action Space: {'Continuous (Box)' if args.agent in ('sac', 'td3') else 'Discrete(5)'}"
+        f"Episode {ep+1}/{episodes}: Reward={stats['total_reward']:.2f}, "
+        f"Steps={stats['steps']}, Crashed={stats['collision']}"
     )
-    print(f"Vehicles: {config['vehicles_count']}")
-    print(f"Duration: {config['duration']}s")
-    print(f"Policy frequency: {config['policy_frequency']} Hz")
-    print("=" * 70 + "\n")
 
-    SAFE_TTC_THRESHOLD = 2.0
+
+def store_config(agent_type: str, agent_dir: str) -> dict:
+    """What identifies a result set in the results store: env config + model bytes."""
+    from results_store import file_sha1
+
+    return {
+        "agent": agent_type,
+        "env_config": agent_env_config(agent_type),
+        "model_sha1": file_sha1(os.path.join(agent_dir, "model.zip")),
+    }
+
+
+def save_trajectory_run(
+    args: argparse.Namespace, agent_dir: str, run_idx: int, timestamp: str, trajectories
+) -> None:
+    from trajectory import save_trajectories
+
+    run_dir = os.path.join(agent_dir, "trajectories", f"run{run_idx + 1}_{timestamp}")
+    save_trajectories(
+        run_dir,
+        trajectories,
+        meta={
+            "agent": args.agent,
+            "seed": args.seed,
+            "run": run_idx + 1,
+            "episode_seeds": [
+                episode_seed_for(args.seed, run_idx, ep) for ep in range(args.episodes)
+            ],
+            "env_config": agent_env_config(args.agent),
+            "ttc_threshold": SAFE_TTC_THRESHOLD,
+        },
+    )
+    print(f"🎞️  Trajectories saved to: {run_dir}")
+
+
+def save_run(
+    args: argparse.Namespace,
+    agent_dir: str,
+    run_idx: int,
+    all_episode_stats,
+    trajectories=None,
+) -> None:
+    """Save one run's episodes; `trajectories` is a list of (episode, steps, traffic)."""
+    import pandas as pd
+
+    df = pd.DataFrame(all_episode_stats)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if trajectories:
+        save_trajectory_run(args, agent_dir, run_idx, timestamp, trajectories)
+
+    if args.results_store is not None:
+        from results_store import ResultsStore
+
+        path = ResultsStore(args.results_store).append_run(
+            args.agent,
+            df,
+            config=store_config(args.agent, agent_dir),
+            seed=args.seed,
+            run=run_idx + 1,
+        )
+        print(f"\n{'='*70}")
+        print(f"✅ {args.agent.upper()} Run {run_idx + 1} Complete!")
+        print(f"📁 Results appended to: {path}")
+        print(f"{'='*70}")
+        return
+
+    run_tag = f"run{run_idx + 1}_"
+
+    df.to_csv(f"{agent_dir}/instant_runs/{run_tag}run_{timestamp}.csv", index=False)
+    df.mean(numeric_only=True).to_frame("Value").to_csv(
+        f"{agent_dir}/summary/{run_tag}summary_{timestamp}.csv"
+    )
+
+    print(f"\n{'='*70}")
+    print(f"✅ {args.agent.upper()} Run {run_idx + 1} Complete!")
+    print(
+        f"📁 Results saved to: {agent_dir}/instant_runs/{run_tag}run_{timestamp}.csv"
+    )
+    print(f"{'='*70}")
+
+
+def evaluate_serial(args: argparse.Namespace, agent_dir: str, model, env, eval_env) -> None:
+    from frame_capture import finish_episode
+
+    recorder = None
+    if args.record_trajectories:
+        from trajectory import TrajectoryRecorder
+
+        recorder = TrajectoryRecorder()
     for run_idx in range(args.runs):
         all_episode_stats = []
+        trajectories = []
         print(f"\nRun {run_idx + 1}/{args.runs}")
         for ep in range(args.episodes):
-            if args.seed is not None:
-                episode_seed = args.seed + (run_idx * 1000) + ep
-            else:
-                episode_seed = None
-            if args.agent == "ppo":
-                if episode_seed is not None:
-                    env.seed(episode_seed)
-                obs = env.reset()[0]
+            if (run_idx, ep) in args.completed:
+                stats = args.completed[(run_idx, ep)]
+                all_episode_stats.append({"episode": ep + 1, **stats})
+                print_episode(ep, args.episodes, stats)
+                continue
+            episode_seed = episode_seed_for(args.seed, run_idx, ep)
+            stats = run_episode(model, env, eval_env, args.agent, episode_seed, recorder)
+            finish_episode(eval_env, (run_idx, ep), stats, episode_seed)
+            stream_episode(args, run_idx, ep, stats)
+            all_episode_stats.append({"episode": ep + 1, **stats})
+            if recorder is not None:
+                trajectories.append((ep + 1, *recorder.arrays()))
+            print_episode(ep, args.episodes, stats)
+
+        save_run(args, agent_dir, run_idx, all_episode_stats, trajectories)
+
+
+def evaluate_parallel(args: argparse.Namespace, agent_dir: str) -> None:
+    tasks = [
+        (run_idx, ep, episode_seed_for(args.seed, run_idx, ep))
+        for run_idx in range(args.runs)
+        for ep in range(args.episodes)
+    ]
+    # Spawn (not fork) so workers never inherit torch/pygame state.
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(
+            args.agent,
+            agent_dir,
+            args.record_trajectories,
+            args.fast_policy,
+            args.profile,
+            args.scenario_cache,
+            args.capture_options,
+        ),
+    ) as pool:
+        # map() yields in submission order, so each run is saved in episode order.
+        pending = [task for task in tasks if task[:2] not in args.completed]
+        results = pool.map(_run_episode_task, pending)
+        run_stats: list[dict] = []
+        trajectories = []
+        for run_idx, ep, _ in tasks:
+            if (run_idx, ep) in args.completed:
+                stats, trajectory = args.completed[(run_idx, ep)], None
             else:
-                obs, _ = env.reset(seed=episode_seed)
-            done = truncated = False
-
-            ep_reward = 0.0
-            ep_steps = 0
-            ep_speed_sum = 0.0
-            ep_lane_changes = 0
-
-            previous_speed = 0.0
-            previous_acc = 0.0
-            jerk_values = []
-            ttc_values = []
-
-            ego_vehicle = eval_env.unwrapped.vehicle
-            previous_lane_index = (
-                ego_vehicle.lane_index[2] if ego_vehicle.lane_index is not None else None
-            )
+                _, _, stats, trajectory, samples = next(results)
+                if samples is not None:
+                    from step_profiler import active
+
+                    active().merge(samples)
+                stream_episode(args, run_idx, ep, stats)
+            if ep == 0:
+                print(f"\nRun {run_idx + 1}/{args.runs}")
+            run_stats.append({"episode": ep + 1, **stats})
+            if trajectory is not None:
+                trajectories.append((ep + 1, *trajectory))
+            print_episode(ep, args.episodes, stats)
+            if ep == args.episodes - 1:
+                save_run(args, agent_dir, run_idx, run_stats, trajectories)
+                run_stats = []
+                trajectories = []
 
-            while not (done or truncated):
-                action, _ = model.predict(obs, deterministic=True)
-                if args.agent == "ppo":
-                    if not hasattr(action, "__len__") or np.shape(action) == ():
-                        action = [action]
-                    obs, rewards, dones, infos = env.step(action)
-                    reward = float(rewards[0])
-                    done = bool(dones[0])
-                    info = infos[0]
-                    truncated = False
-                else:
-                    obs, reward, done, truncated, info = env.step(action)
-                    reward = float(reward)
-                ep_reward += reward
-                ep_steps += 1
-
-                ego_vehicle = eval_env.unwrapped.vehicle
-                ego_pos = ego_vehicle.position
-                ego_speed = ego_vehicle.speed
-                ep_speed_sum += ego_speed
-
-                acc = ego_speed - previous_speed
-                jerk = acc - previous_acc
-                jerk_values.append(abs(jerk))
-                previous_speed = ego_speed
-                previous_acc = acc
-
-                min_ttc = float("inf")
-                for other in eval_env.unwrapped.road.vehicles:
-                    if other is ego_vehicle:
-                        continue
-                    if ego_vehicle.lane_index is None or other.lane_index is None:
-                        continue
-                    if ego_vehicle.lane_index[2] != other.lane_index[2]:
-                        continue
-                    rel_x = other.position[0] - ego_pos[0]
-                    if rel_x <= 0:
-                        continue
-                    rel_v = ego_speed - other.speed
-                    if rel_v > 0.01:
-                        ttc = rel_x / rel_v
-                        min_ttc = min(min_ttc, ttc)
-
-                if min_ttc != float("inf"):
-                    ttc_values.append(min_ttc)
-
-                current_lane_index = (
-                    ego_vehicle.lane_index[2]
-                    if ego_vehicle.lane_index is not None
-                    else None
+
+def evaluate_batched(args: argparse.Namespace, agent_dir: str, model) -> None:
+    tasks = [
+        ((run_idx, ep), episode_seed_for(args.seed, run_idx, ep))
+        for run_idx in range(args.runs)
+        for ep in range(args.episodes)
+        if (run_idx, ep) not in args.completed
+    ]
+    n_envs = max(min(args.n_envs, len(tasks)), 1)
+    # Round-robin so every slot gets a near-equal share of episodes.
+    slots = [tasks[i::n_envs] for i in range(n_envs)]
+    vec_env = make_batched_env(
+        args.agent,
+        agent_dir,
+        slots,
+        args.vec_backend,
+        args.record_trajectories,
+        normalize_obs=not args.fast_policy,
+        profiled=args.profile,
+        scenario_cache=args.scenario_cache,
+        capture=args.capture_options,
+    )
+    trajectories = {}
+    try:
+        results = run_batched(
+            model,
+            vec_env,
+            len(tasks),
+            trajectories,
+            on_episode=lambda key, stats: stream_episode(args, *key, stats),
+        )
+    finally:
+        vec_env.close()
+    results.update(args.completed)
+
+    for run_idx in range(args.runs):
+        print(f"\nRun {run_idx + 1}/{args.runs}")
+        all_episode_stats = []
+        for ep in range(args.episodes):
+            stats = results[(run_idx, ep)]
+            all_episode_stats.append({"episode": ep + 1, **stats})
+            print_episode(ep, args.episodes, stats)
+        run_trajectories = [
+            (ep + 1, *trajectories[(run_idx, ep)])
+            for ep in range(args.episodes)
+            if (run_idx, ep) in trajectories
+        ]
+        save_run(args, agent_dir, run_idx, all_episode_stats, run_trajectories)
+
+
+def evaluate_adaptive(args: argparse.Namespace, agent_dir: str, model, env, eval_env) -> None:
+    """
+    Add seeded episodes in batches until the target CI widths are met.
+
+    Episode seeds are the same as those of a fixed-length run with the same
+    --seed. Batches run in the worker pool when --workers > 1. The episodes
+    are saved as one run, and the per-batch intervals go to
+    <agent_dir>/adaptive/.
+    """
+    import json
+
+    import pandas as pd
+    from sequential import SequentialStopper
+
+    stopper = SequentialStopper(
+        args.target_width, args.confidence, args.min_episodes, args.max_episodes
+    )
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                args.agent,
+                agent_dir,
+                args.record_trajectories,
+                args.fast_policy,
+                args.profile,
+                args.scenario_cache,
+                args.capture_options,
+            ),
+        )
+        run_tasks = pool.map
+    else:
+        _WORKER_STATE.update(
+            agent_type=args.agent,
+            model=model,
+            env=env,
+            eval_env=eval_env,
+            record=args.record_trajectories,
+        )
+        run_tasks = map
+
+    print(f"\nAdaptive run: targets {args.target_width}, budget {args.max_episodes} episodes")
+    all_episode_stats = []
+    trajectories = []
+    trace = []
+    try:
+        while True:
+            start = len(all_episode_stats)
+            size = min(args.batch_size, args.max_episodes - start)
+            tasks = [
+                (0, ep, episode_seed_for(args.seed, 0, ep)) for ep in range(start, start + size)
+            ]
+            for _, ep, stats, trajectory, samples in run_tasks(_run_episode_task, tasks):
+                if samples is not None:
+                    from step_profiler import active
+
+                    active().merge(samples)
+                stream_episode(args, 0, ep, stats)
+                all_episode_stats.append({"episode": ep + 1, **stats})
+                if trajectory is not None:
+                    trajectories.append((ep + 1, *trajectory))
+                print_episode(ep, args.max_episodes, stats)
+
+            reason, intervals = stopper.check(pd.DataFrame(all_episode_stats))
+            trace.append({"episodes": len(all_episode_stats), "intervals": intervals})
+            print(f"📏 {len(all_episode_stats)} episodes:")
+            for metric, width in args.target_width.items():
+                interval = intervals[metric]
+                mark = "✅" if interval["width"] <= width else "…"
+                print(
+                    f"   {mark} {metric:<14}{interval['estimate']:>9.4f} "
+                    f"[{interval['ci_low']:.4f}, {interval['ci_high']:.4f}] "
+                    f"width {interval['width']:.4f} (target {width})"
                 )
-                if (
-                    previous_lane_index is not None
-                    and current_lane_index is not None
-                    and current_lane_index != previous_lane_index
-                ):
-                    ep_lane_changes += 1
-                previous_lane_index = current_lane_index
-
-            avg_speed = ep_speed_sum / (ep_steps + 1e-6)
-            avg_jerk = float(np.mean(jerk_values)) if jerk_values else 0.0
-            max_jerk = float(np.max(jerk_values)) if jerk_values else 0.0
-            avg_ttc = float(np.mean(ttc_values)) if ttc_values else -1.0
-            min_ttc = float(np.min(ttc_values)) if ttc_values else -1.0
-            ttc_violations = sum(t < SAFE_TTC_THRESHOLD for t in ttc_values)
-            ttc_violation_rate = ttc_violations / (ep_steps + 1e-6)
-
-            all_episode_stats.append(
-                {
-                    "episode": ep + 1,
-                    "total_reward": ep_reward,
-                    "steps": ep_steps,
-                    "avg_speed_ms": avg_speed,
-                    "lane_changes": ep_lane_changes,
-                    "avg_jerk": avg_jerk,
-                    "max_jerk": max_jerk,
-                    "avg_ttc": avg_ttc,
-                    "min_ttc": min_ttc,
-                    "ttc_violation_rate": ttc_violation_rate,
-                    "collision": info.get("crashed", False),
-                    "success": not info.get("crashed", False),
-                }
-            )
+            if reason is not None:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-            print(
-                f"Episode {ep+1}/{args.episodes}: Reward={ep_reward:.2f}, "
-                f"Steps={ep_steps}, Crashed={info.get('crashed', False)}"
-            )
+    n = len(all_episode_stats)
+    if reason == "converged":
+        print(f"🎯 Converged after {n} episodes")
+    else:
+        print(f"⚠️  Budget of {args.max_episodes} episodes spent before all targets were met")
+    args.episodes = n
+    save_run(args, agent_dir, 0, all_episode_stats, trajectories)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    trace_path = os.path.join(agent_dir, "adaptive", f"run1_adaptive_{timestamp}.json")
+    os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+    with open(trace_path, "w") as handle:
+        json.dump(
+            {
+                "agent": args.agent,
+                "seed": args.seed,
+                "targets": args.target_width,
+                "confidence": args.confidence,
+                "stopped": reason,
+                "episodes": n,
+                "batches": trace,
+            },
+            handle,
+            indent=2,
+        )
+    print(f"📁 Convergence trace saved to: {trace_path}")
+
+
+def save_profile(args: argparse.Namespace, agent_dir: str, profiler) -> None:
+    """Print the step profile and save it as JSON and TensorBoard scalars."""
+    import step_profiler
+
+    summary = profiler.summary()
+    summary.update(agent=args.agent, workers=args.workers, n_envs=args.n_envs)
+    step_profiler.print_summary(summary, f"{args.agent.upper()} eval profile")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    json_path = os.path.join(agent_dir, "profiles", f"eval_{timestamp}.json")
+    step_profiler.write_json(summary, json_path)
+    print(f"📁 Profile saved to: {json_path}")
+    tb_dir = os.path.join(agent_dir, "tensorboard", f"eval_profile_{timestamp}")
+    if step_profiler.write_tensorboard(summary, tb_dir):
+        print(f"📈 TensorBoard scalars written to: {tb_dir}")
+
+
+def save_captures(args: argparse.Namespace) -> None:
+    """Wait for this process's frame writer, then index and trim the captured episodes."""
+    import frame_capture
+
+    # Worker processes have drained their writers by the time they exit.
+    frame_capture.active()["writer"].flush()
+    out_dir = args.capture_options["out_dir"]
+    index = frame_capture.finalize(out_dir, frame_capture.active()["rules"])
+    print(f"🎥 Captured {len(index)} episodes ({', '.join(args.capture)}) to: {out_dir}")
+
+
+def main() -> None:
+    args = parse_args()
+
+    agent_dir = AGENT_DIRS[args.agent]
+    profiler = None
+    if args.profile:
+        from step_profiler import enable
+
+        profiler = enable()
+    if args.scenario_cache is not None:
+        import scenario_cache
+
+        scenario_cache.enable(args.scenario_cache)
+    args.capture_options = None
+    if args.capture:
+        import frame_capture
 
-        df = pd.DataFrame(all_episode_stats)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        run_tag = f"run{run_idx + 1}_"
+        args.capture_options = {
+            "out_dir": os.path.join(agent_dir, "captures", timestamp),
+            "rules": args.capture,
+            "fmt": args.capture_format,
+        }
+        frame_capture.enable(**args.capture_options)
+    args.episode_stream = None
+    args.completed = {}
+    if args.stream is not None:
+        from episode_stream import EpisodeStream, completed_episodes
 
-        df.to_csv(f"{agent_dir}/instant_runs/{run_tag}run_{timestamp}.csv", index=False)
-        df.mean(numeric_only=True).to_frame("Value").to_csv(
-            f"{agent_dir}/summary/{run_tag}summary_{timestamp}.csv"
+        if args.stream == "auto":
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            args.stream = os.path.join(agent_dir, "streams", f"stream_{timestamp}.jsonl")
+        if args.resume and os.path.exists(args.stream):
+            header, args.completed = completed_episodes(args.stream)
+            if header is not None and (header["agent"], header["seed"]) != (args.agent, args.seed):
+                raise SystemExit(
+                    f"{args.stream} was written for agent={header['agent']} "
+                    f"seed={header['seed']}; resume with the same --agent and --seed"
+                )
+            print(f"⏯️  Resuming: {len(args.completed)} episodes already in {args.stream}")
+        elif os.path.exists(args.stream):
+            raise SystemExit(f"{args.stream} already exists; pass --resume to continue it")
+        args.episode_stream = EpisodeStream(
+            args.stream,
+            {"agent": args.agent, "seed": args.seed, "runs": args.runs, "episodes": args.episodes},
         )
 
-        print(f"\n{'='*70}")
-        print(f"✅ {args.agent.upper()} Run {run_idx + 1} Complete!")
-        print(
-            f"📁 Results saved to: {agent_dir}/instant_runs/{run_tag}run_{timestamp}.csv"
+    os.makedirs(f"{agent_dir}/instant_runs", exist_ok=True)
+    os.makedirs(f"{agent_dir}/summary", exist_ok=True)
+
+    if args.fast_policy and args.workers == 1:
+        import torch
+
+        # The TorchScript MLPs are fastest single-threaded (workers set this too).
+        torch.set_num_threads(1)
+
+    if args.workers > 1:
+        model = env = eval_env = None
+        config = agent_env_config(args.agent)
+    elif args.n_envs > 1:
+        model = load_policy(args.agent, agent_dir, args.fast_policy)
+        env = eval_env = None
+        config = agent_env_config(args.agent)
+    else:
+        model = load_policy(args.agent, agent_dir, args.fast_policy)
+        env, eval_env, config = make_eval_env(
+            args.agent, agent_dir, args.render, normalize_obs=not args.fast_policy
         )
-        print(f"{'='*70}")
 
-    if args.agent == "ppo":
-        env.close()
+    print("\n" + "=" * 70)
+    print(f"🚗 Evaluating {args.agent.upper()} Agent")
+    print("=" * 70)
+    print("Environment: highway-v0")
+    print(
+        f"Action Space: {'Continuous (Box)' if args.agent in ('sac', 'td3') else 'Discrete(5)'}"
+    )
+    print(f"Vehicles: {config['vehicles_count']}")
+    print(f"Duration: {config['duration']}s")
+    print(f"Policy frequency: {config['policy_frequency']} Hz")
+    if args.workers > 1:
+        print(f"Workers: {args.workers}")
+    if args.n_envs > 1:
+        print(f"Batched envs: {args.n_envs} ({args.vec_backend})")
+    if args.fast_policy:
+        print(f"Policy: TorchScript fast path ({agent_dir}/policy_fast.pt)")
+    print("=" * 70 + "\n")
+
+    if args.adaptive:
+        evaluate_adaptive(args, agent_dir, model, env, eval_env)
+        if env is not None:
+            env.close()
+    elif args.workers > 1:
+        evaluate_parallel(args, agent_dir)
+    elif args.n_envs > 1:
+        evaluate_batched(args, agent_dir, model)
     else:
+        evaluate_serial(args, agent_dir, model, env, eval_env)
         env.close()
 
+    if profiler is not None:
+        save_profile(args, agent_dir, profiler)
+    if args.scenario_cache is not None and args.workers == 1 and args.vec_backend == "dummy":
+        import scenario_cache
+
+        print(f"🗂️  Scenario cache: {scenario_cache.active().stats()}")
+    if args.capture_options is not None:
+        save_captures(args)
+    if args.episode_stream is not None:
+        args.episode_stream.close()
+        print(f"📡 Episode stream: {args.stream}")
+
     print(f"\n✅ {args.agent.upper()} Evaluation Complete!")
 
 
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Long-lived local evaluation server.
+
+Keeps loaded models and built eval envs warm per (agent, agent_dir,
+env_overrides) so repeated evaluations skip Python startup, the
+highway_env / stable_baselines3 / torch imports, Model.load and env
+construction. Jobs are posted as JSON over localhost HTTP and per-episode
+stats are streamed back as NDJSON, one line per episode, followed by a
+summary line. Seeds follow eval.py, so `--seed S` gives the same episodes.
+
+    python scripts/eval_server.py serve --port 8765
+    python scripts/eval_server.py run --agent dqn --episodes 20 --seed 0
+
+From Python (e.g. model_evaluation.ipynb):
+
+    from eval_server import EvalClient
+    client = EvalClient()
+    df = client.evaluate_df("ppo", episodes=20, seed=0)
+
+Endpoints: GET /health, POST /eval, POST /evict.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Warm evaluation server and client.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Start the server.")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="Bind address.")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port.")
+    serve.add_argument(
+        "--preload",
+        nargs="*",
+        default=[],
+        choices=["dqn", "ppo", "sac", "td3"],
+        help="Agents to load before accepting jobs.",
+    )
+
+    run = sub.add_parser("run", help="Submit one eval job and print its episodes.")
+    run.add_argument("--host", default=DEFAULT_HOST, help="Server address.")
+    run.add_argument("--port", type=int, default=DEFAULT_PORT, help="Server port.")
+    run.add_argument(
+        "--agent",
+        choices=["dqn", "ppo", "sac", "td3"],
+        required=True,
+        help="Agent type to evaluate.",
+    )
+    run.add_argument("--episodes", type=int, default=20, help="Number of episodes.")
+    run.add_argument("--seed", type=int, default=None, help="Random seed for evaluation.")
+    run.add_argument("--run", type=int, default=0, help="Run index used to derive seeds.")
+    return parser.parse_args()
+
+
+def _jsonable(value):
+    """Plain Python value for numpy scalars in the episode stats."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def _int_field(job: dict, name: str, default: int | None, minimum: int | None = None):
+    """Integer job field (None stays None), or ValueError with a client-facing message."""
+    value = job.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {value}")
+    return value
+
+
+class ModelCache:
+    """
+    Loaded model + eval env per (agent, agent_dir, env_overrides).
+
+    Each entry has its own lock: jobs for the same entry run one at a time
+    (they share an env), jobs for different agents run concurrently. An
+    entry is rebuilt when its model.zip changes on disk.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(agent: str, agent_dir: str, env_overrides: dict) -> tuple:
+        return agent, agent_dir, json.dumps(env_overrides, sort_keys=True)
+
+    def acquire(self, agent: str, agent_dir: str, env_overrides: dict) -> dict:
+        """
+        Up-to-date entry for the key, returned with entry["lock"] held.
+
+        The caller runs its episodes and then releases the lock, so neither
+        /evict nor a rebuild can close the env while a job is using it.
+        """
+        key = self._key(agent, agent_dir, env_overrides)
+        while True:
+            with self._lock:
+                entry = self._entries.setdefault(key, {"lock": threading.Lock(), "mtime": None})
+            entry["lock"].acquire()
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    break
+            # Evicted (and closed) while we waited for the lock: start over.
+            entry["lock"].release()
+        model_path = os.path.join(agent_dir, "model.zip")
+        try:
+            mtime = os.path.getmtime(model_path)
+            if entry["mtime"] != mtime:
+                self._build(entry, agent, agent_dir, env_overrides)
+                entry["mtime"] = mtime
+        except Exception:
+            # Drop the entry: a missing model or a failed (re)build must
+            # not be listed in /health as loaded.
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry["lock"].release()
+            raise
+        return entry
+
+    def get(self, agent: str, agent_dir: str, env_overrides: dict) -> dict:
+        """Load (or refresh) an entry without keeping it locked, e.g. to preload it."""
+        entry = self.acquire(agent, agent_dir, env_overrides)
+        entry["lock"].release()
+        return entry
+
+    @staticmethod
+    def _build(entry: dict, agent: str, agent_dir: str, env_overrides: dict) -> None:
+        from eval import load_model, make_eval_env
+
+        start = time.perf_counter()
+        env, eval_env, config = make_eval_env(agent, agent_dir, render=False)
+        if env_overrides:
+            eval_env.unwrapped.config.update(env_overrides)
+        model = load_model(agent, agent_dir)
+        if entry.get("env") is not None:
+            entry["env"].close()
+        entry.update(
+            model=model,
+            env=env,
+            eval_env=eval_env,
+            config={**config, **env_overrides},
+        )
+        print(f"🔥 Loaded {agent} from {agent_dir} in {time.perf_counter() - start:.2f}s")
+
+    def keys(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"agent": agent, "agent_dir": agent_dir, "env_overrides": json.loads(overrides)}
+                for (agent, agent_dir, overrides), entry in self._entries.items()
+                if entry["mtime"] is not None
+            ]
+
+    def evict(self, agent: str | None = None) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if agent is None or key[0] == agent]
+            entries = [self._entries.pop(key) for key in keys]
+        for entry in entries:
+            with entry["lock"]:
+                if entry.get("env") is not None:
+                    entry["env"].close()
+        return len(entries)
+
+
+CACHE = ModelCache()
+
+
+class EvalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _write_chunk(self, payload: dict) -> None:
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json({"status": "ok", "cached": CACHE.keys()})
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    def do_POST(self) -> None:
+        try:
+            job = self._read_json()
+        except ValueError as exc:
+            self._send_json({"error": f"invalid JSON: {exc}"}, status=400)
+            return
+        if self.path == "/evict":
+            self._send_json({"evicted": CACHE.evict(job.get("agent"))})
+        elif self.path == "/eval":
+            self._eval(job)
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    def _eval(self, job: dict) -> None:
+        from eval import AGENT_DIRS
+
+        agent = job.get("agent")
+        if agent not in AGENT_DIRS:
+            self._send_json({"error": f"unknown agent {agent!r}"}, status=400)
+            return
+        agent_dir = job.get("agent_dir") or AGENT_DIRS[agent]
+        try:
+            episodes = _int_field(job, "episodes", 20, minimum=1)
+            seed = _int_field(job, "seed", None)
+            run_idx = _int_field(job, "run", 0, minimum=0)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        try:
+            entry = CACHE.acquire(agent, agent_dir, job.get("env_overrides") or {})
+        except (OSError, ValueError) as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        try:
+            self._stream_episodes(entry, agent, episodes, seed, run_idx)
+        finally:
+            entry["lock"].release()
+
+    def _stream_episodes(
+        self, entry: dict, agent: str, episodes: int, seed: int | None, run_idx: int
+    ) -> None:
+        from eval import episode_seed_for, run_episode
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        start = time.perf_counter()
+        all_stats = []
+        try:
+            for ep in range(episodes):
+                stats = run_episode(
+                    entry["model"],
+                    entry["env"],
+                    entry["eval_env"],
+                    agent,
+                    episode_seed_for(seed, run_idx, ep),
+                )
+                stats = {"episode": ep + 1, **{k: _jsonable(v) for k, v in stats.items()}}
+                all_stats.append(stats)
+                self._write_chunk({"episode": stats})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; there is nobody left to answer.
+            self.close_connection = True
+            return
+        except Exception as exc:
+            # The 200 is already sent: report the failure in-band and still
+            # end the chunked body so the client is not left waiting.
+            self._write_chunk(
+                {"error": f"{type(exc).__name__}: {exc}", "episodes": len(all_stats)}
+            )
+        else:
+            summary = {
+                key: sum(float(stats[key]) for stats in all_stats) / len(all_stats)
+                for key in all_stats[0]
+            } if all_stats else {}
+            self._write_chunk(
+                {"done": True, "summary": summary, "elapsed_s": time.perf_counter() - start}
+            )
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class EvalClient:
+    """Minimal client for the eval server (stdlib only, no heavy imports)."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        self.base_url = f"http://{host}:{port}"
+
+    def _post(self, path: str, payload: dict):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        return urllib.request.urlopen(request)
+
+    def health(self) -> dict:
+        with urllib.request.urlopen(self.base_url + "/health") as response:
+            return json.load(response)
+
+    def evict(self, agent: str | None = None) -> int:
+        with self._post("/evict", {"agent": agent}) as response:
+            return json.load(response)["evicted"]
+
+    def stream(
+        self,
+        agent: str,
+        episodes: int = 20,
+        seed: int | None = None,
+        run: int = 0,
+        agent_dir: str | None = None,
+        env_overrides: dict | None = None,
+    ):
+        """Yield each episode's stats dict as the server finishes it."""
+        job = {
+            "agent": agent,
+            "episodes": episodes,
+            "seed": seed,
+            "run": run,
+            "agent_dir": agent_dir,
+            "env_overrides": env_overrides or {},
+        }
+        with self._post("/eval", job) as response:
+            for line in response:
+                message = json.loads(line)
+                if "error" in message:
+                    raise RuntimeError(f"eval server: {message['error']}")
+                if "episode" in message:
+                    yield message["episode"]
+
+    def evaluate(self, agent: str, episodes: int = 20, seed: int | None = None, **kwargs) -> list[dict]:
+        return list(self.stream(agent, episodes, seed, **kwargs))
+
+    def evaluate_df(self, agent: str, episodes: int = 20, seed: int | None = None, **kwargs):
+        import pandas as pd
+
+        return pd.DataFrame(self.evaluate(agent, episodes, seed, **kwargs))
+
+
+def serve(args: argparse.Namespace) -> None:
+    from eval import AGENT_DIRS
+
+    for agent in args.preload:
+        CACHE.get(agent, AGENT_DIRS[agent], {})
+    server = ThreadingHTTPServer((args.host, args.port), EvalHandler)
+    server.daemon_threads = True
+    print(f"🚀 Eval server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        CACHE.evict()
+
+
+def run(args: argparse.Namespace) -> None:
+    client = EvalClient(args.host, args.port)
+    start = time.perf_counter()
+    for stats in client.stream(args.agent, args.episodes, args.seed, run=args.run):
+        print(
+            f"Episode {stats['episode']}/{args.episodes}: Reward={stats['total_reward']:.2f}, "
+            f"Steps={stats['steps']}, Crashed={bool(stats['collision'])}"
+        )
+    print(f"✅ {args.agent.upper()} done in {time.perf_counter() - start:.2f}s")
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "serve":
+        serve(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Export trained policies to TorchScript for a fast CPU inference path.
+
+For each agent the deterministic action path of the SB3 policy is rebuilt
+as a plain torch module and traced:
+
+    DQN  obs -> Q-network -> argmax
+    PPO  obs -> VecNormalize (folded in) -> policy MLP -> argmax
+    SAC  obs -> actor MLP -> tanh(mu) -> action-space scaling
+    TD3  obs -> actor MLP (tanh) -> action-space scaling
+
+and saved as <agent>_agent/policy_fast.pt. The model.zip sha1 is stored with
+it so stale exports are detected. FastPolicy loads the file and exposes an
+SB3-compatible predict() that is NumPy in, NumPy out, without SB3's
+preprocessing, tensor conversion and device checks. Because PPO's observation
+normalization is part of the export, it takes raw env observations.
+
+    python scripts/export_policy.py --agents dqn ppo sac td3
+    python scripts/eval.py --agent ppo --episodes 20 --fast-policy
+
+Every export is checked against the SB3 model on the observations of a few
+seeded eval episodes before it replaces policy_fast.pt. Discrete actions
+must match exactly and continuous ones within --atol. The per-call latency
+of both paths is reported. An export that fails the check is discarded and
+the script exits non-zero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+FAST_POLICY_FILE = "policy_fast.pt"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export policies to TorchScript.")
+    parser.add_argument(
+        "--agents",
+        nargs="+",
+        default=["dqn", "ppo", "sac", "td3"],
+        choices=["dqn", "ppo", "sac", "td3"],
+        help="Agents to export.",
+    )
+    parser.add_argument(
+        "--check-episodes",
+        type=int,
+        default=2,
+        help="Seeded eval episodes whose observations are used for the parity check.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the parity-check episodes.")
+    parser.add_argument(
+        "--atol",
+        type=float,
+        default=1e-5,
+        help="Max abs difference allowed for continuous actions.",
+    )
+    args = parser.parse_args()
+    if args.check_episodes < 1:
+        parser.error("--check-episodes must be >= 1 (the parity check is mandatory)")
+    return args
+
+
+def _policy_network(agent_type: str, policy):
+    """torch.nn.Sequential computing the pre-head output of the deterministic policy."""
+    from torch import nn
+
+    policy = copy.deepcopy(policy).cpu().eval()
+    if agent_type == "dqn":
+        return nn.Sequential(nn.Flatten(), *policy.q_net.q_net)
+    if agent_type == "ppo":
+        return nn.Sequential(nn.Flatten(), *policy.mlp_extractor.policy_net, policy.action_net)
+    if agent_type == "sac":
+        return nn.Sequential(nn.Flatten(), *policy.actor.latent_pi, policy.actor.mu, nn.Tanh())
+    if agent_type == "td3":
+        return nn.Sequential(nn.Flatten(), *policy.actor.mu)
+    raise ValueError(f"Unsupported agent: {agent_type}")
+
+
+def build_export_module(
+    agent_type: str, model, obs_rms=None, clip_obs: float = 10.0, epsilon: float = 1e-8
+):
+    """Torch module mapping a float32 observation batch to actions."""
+    import torch
+    from torch import nn
+
+    class ExportedPolicy(nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.net = _policy_network(agent_type, model.policy)
+            self.discrete = agent_type in ("dqn", "ppo")
+            self.normalize = obs_rms is not None
+            if self.normalize:
+                # VecNormalize works in float64; keep that for bit-level parity.
+                mean = torch.as_tensor(obs_rms.mean, dtype=torch.float64)
+                var = torch.as_tensor(obs_rms.var, dtype=torch.float64)
+                self.register_buffer("obs_mean", mean)
+                self.register_buffer("obs_std", torch.sqrt(var + epsilon))
+                self.clip_obs = float(clip_obs)
+            if not self.discrete:
+                space = model.action_space
+                self.register_buffer("low", torch.as_tensor(space.low, dtype=torch.float32))
+                self.register_buffer("high", torch.as_tensor(space.high, dtype=torch.float32))
+
+        def forward(self, obs):
+            if self.normalize:
+                obs = (obs.double() - self.obs_mean) / self.obs_std
+                obs = torch.clamp(obs, -self.clip_obs, self.clip_obs)
+            out = self.net(obs.float())
+            if self.discrete:
+                return torch.argmax(out, dim=1)
+            # SB3 unscale_action for squashed [-1, 1] outputs.
+            return self.low + 0.5 * (out + 1.0) * (self.high - self.low)
+
+    return ExportedPolicy().eval()
+
+
+def export_policy(
+    agent_type: str, agent_dir: str, episodes: int = 2, seed: int = 0, atol: float = 1e-5
+) -> str:
+    """
+    Trace the agent's policy and save it as <agent_dir>/policy_fast.pt.
+
+    The traced policy only replaces policy_fast.pt once it passes
+    check_parity(); otherwise it is deleted and RuntimeError is raised.
+    """
+    import torch
+    from eval import load_model
+    from results_store import file_sha1
+
+    model = load_model(agent_type, agent_dir)
+    obs_rms = None
+    clip_obs, epsilon = 10.0, 1e-8
+    if agent_type == "ppo":
+        import pickle
+
+        with open(os.path.join(agent_dir, "vec_normalize.pkl"), "rb") as handle:
+            vec_normalize = pickle.load(handle)
+        if vec_normalize.norm_obs:
+            obs_rms = vec_normalize.obs_rms
+            clip_obs, epsilon = vec_normalize.clip_obs, vec_normalize.epsilon
+
+    module = build_export_module(agent_type, model, obs_rms, clip_obs, epsilon)
+    example = torch.zeros((1, *model.observation_space.shape), dtype=torch.float32)
+    # TorchScript is deprecated in favour of torch.export but still the
+    # simplest self-contained CPU artifact; silence the FutureWarnings.
+    with torch.no_grad(), warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        traced = torch.jit.trace(module, example)
+    meta = {
+        "agent": agent_type,
+        "obs_shape": list(model.observation_space.shape),
+        "discrete": agent_type in ("dqn", "ppo"),
+        "normalized_obs": obs_rms is not None,
+        "model_sha1": file_sha1(os.path.join(agent_dir, "model.zip")),
+    }
+    path = os.path.join(agent_dir, FAST_POLICY_FILE)
+    tmp_path = f"{path}.tmp"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        torch.jit.save(traced, tmp_path, _extra_files={"meta.json": json.dumps(meta)})
+    try:
+        ok = check_parity(agent_type, agent_dir, model, FastPolicy(tmp_path), episodes, seed, atol)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if not ok:
+        os.remove(tmp_path)
+        raise RuntimeError(
+            f"{agent_type.upper()} export failed the parity check; {path} not written"
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+class FastPolicy:
+    """
+    TorchScript policy with an SB3-style predict(): NumPy in, NumPy out.
+
+    Observations are raw env observations (normalization, if any, is part
+    of the exported module); single observations and batches are accepted.
+    Loading it leaves torch's thread count alone: small MLPs are fastest
+    single-threaded, so CLI entry points call torch.set_num_threads(1).
+    """
+
+    def __init__(self, path: str) -> None:
+        import torch
+
+        extra = {"meta.json": ""}
+        self._torch = torch
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            self.module = torch.jit.load(path, map_location="cpu", _extra_files=extra)
+        self.module.eval()
+        self.meta = json.loads(extra["meta.json"])
+        self.obs_shape = tuple(self.meta["obs_shape"])
+
+    @classmethod
+    def load(cls, agent_dir: str) -> "FastPolicy":
+        path = os.path.join(agent_dir, FAST_POLICY_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Missing {path}; run: python scripts/export_policy.py --agents <agent>"
+            )
+        policy = cls(path)
+        from results_store import file_sha1
+
+        if policy.meta["model_sha1"] != file_sha1(os.path.join(agent_dir, "model.zip")):
+            print(f"⚠️  {path} was exported from a different model.zip; re-export it.")
+        return policy
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = True):
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.shape == self.obs_shape
+        if single:
+            obs = obs[None]
+        with self._torch.inference_mode():
+            actions = self.module(self._torch.from_numpy(obs)).numpy()
+        return (actions[0] if single else actions), state
+
+
+def collect_observations(agent_type: str, agent_dir: str, model, episodes: int, seed: int):
+    """(raw_obs, policy_obs) pairs from seeded eval episodes driven by the SB3 model."""
+    from eval import episode_seed_for, make_eval_env
+
+    env, _, _ = make_eval_env(agent_type, agent_dir, render=False)
+    raw, normalized = [], []
+    try:
+        for ep in range(episodes):
+            episode_seed = episode_seed_for(seed, 0, ep)
+            if agent_type == "ppo":
+                env.seed(episode_seed)
+                obs = env.reset()
+            else:
+                obs, _ = env.reset(seed=episode_seed)
+            done = False
+            while not done:
+                if agent_type == "ppo":
+                    raw.append(env.get_original_obs()[0])
+                    normalized.append(obs[0])
+                    action, _ = model.predict(obs, deterministic=True)
+                    obs, _, dones, _ = env.step(action)
+                    done = bool(dones[0])
+                else:
+                    raw.append(obs)
+                    normalized.append(obs)
+                    action, _ = model.predict(obs, deterministic=True)
+                    obs, _, terminated, truncated, _ = env.step(action)
+                    done = terminated or truncated
+    finally:
+        env.close()
+    return np.asarray(raw, dtype=np.float32), np.asarray(normalized, dtype=np.float32)
+
+
+def median_latency(fn, observations, repeats: int = 3) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for obs in observations:
+            fn(obs)
+        times.append((time.perf_counter() - start) / len(observations))
+    return float(np.median(times))
+
+
+def check_parity(
+    agent_type: str, agent_dir: str, model, fast: FastPolicy, episodes: int, seed: int, atol: float
+) -> bool:
+    """Compare the SB3 model and its export on the observations of seeded eval episodes."""
+    raw, normalized = collect_observations(agent_type, agent_dir, model, episodes, seed)
+
+    sb3_actions = np.asarray(
+        [model.predict(obs, deterministic=True)[0] for obs in normalized]
+    )
+    fast_actions = np.asarray([fast.predict(obs)[0] for obs in raw])
+    batch_actions = fast.predict(raw)[0]
+
+    if fast.meta["discrete"]:
+        mismatches = int(np.count_nonzero(sb3_actions != fast_actions))
+        mismatches += int(np.count_nonzero(batch_actions != fast_actions))
+        ok = mismatches == 0
+        detail = f"{mismatches} mismatched actions"
+    else:
+        diff = max(
+            float(np.max(np.abs(sb3_actions - fast_actions))),
+            float(np.max(np.abs(batch_actions - fast_actions))),
+        )
+        ok = diff <= atol
+        detail = f"max |Δaction| = {diff:.2e}"
+
+    sb3_latency = median_latency(lambda obs: model.predict(obs, deterministic=True), normalized)
+    fast_latency = median_latency(fast.predict, raw)
+    status = "✅" if ok else "❌"
+    print(
+        f"{status} {agent_type.upper()} parity on {len(raw)} observations: {detail}; "
+        f"predict {sb3_latency * 1e6:.0f}µs -> {fast_latency * 1e6:.0f}µs "
+        f"({sb3_latency / fast_latency:.1f}x)"
+    )
+    return ok
+
+
+def main() -> None:
+    args = parse_args()
+    import torch
+    from eval import AGENT_DIRS
+
+    # Time both predict paths single-threaded, as --fast-policy runs them.
+    torch.set_num_threads(1)
+
+    failed = []
+    for agent in args.agents:
+        try:
+            path = export_policy(
+                agent, AGENT_DIRS[agent], args.check_episodes, args.seed, args.atol
+            )
+        except RuntimeError as exc:
+            print(f"❌ {exc}")
+            failed.append(agent)
+            continue
+        print(f"📦 Exported {agent.upper()} policy to {path}")
+    if failed:
+        raise SystemExit(f"Parity check failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
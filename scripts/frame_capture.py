@@ -0,0 +1,282 @@
+"""
+Headless frame capture of selected evaluation episodes (eval.py --capture).
+
+Envs are built with render_mode="rgb_array", so pygame draws offscreen and
+no display is needed. FrameCaptureWrapper keeps one frame per policy step of
+the current episode in memory. When the episode ends, the episode is kept if
+it matches one of the capture rules:
+
+    all               every episode
+    collision         episodes that ended in a crash
+    min-ttc:SECONDS   episodes whose minimum TTC fell below SECONDS
+    worst-ttc:K       the K episodes with the lowest minimum TTC
+
+Kept episodes are written by a background FrameWriter thread, so compression
+and encoding never run in the stepping loop. The output is a compressed
+frame archive (.npz, frames of shape (steps + 1, H, W, 3)) or, with imageio
+and ffmpeg installed, an .mp4 video. Every process (pool worker, SubprocVecEnv
+worker) has its own writer and appends what it wrote to index_<pid>.jsonl.
+finalize() merges these files into index.csv. For worst-ttc it also deletes
+the files that are not in the global top K, because each worker can only
+rank the episodes it has seen itself.
+"""
+
+from __future__ import annotations
+
+import glob
+import heapq
+import json
+import os
+import queue
+import threading
+
+import gymnasium as gym
+import numpy as np
+
+from step_profiler import profile
+
+CAPTURE_FORMATS = ("npz", "mp4")
+RULES = ("all", "collision", "min-ttc", "worst-ttc")
+
+
+def parse_rules(items: list[str]) -> dict[str, float | None]:
+    """{rule: parameter} from RULE or RULE:VALUE strings."""
+    rules = {}
+    for item in items:
+        name, sep, value = item.partition(":")
+        if name not in RULES:
+            raise ValueError(f"Unknown capture rule {name!r} (expected one of {', '.join(RULES)})")
+        if name in ("min-ttc", "worst-ttc"):
+            if not sep:
+                raise ValueError(f"Capture rule {name!r} needs a value, e.g. {name}:3")
+            rules[name] = int(value) if name == "worst-ttc" else float(value)
+        else:
+            rules[name] = None
+    return rules
+
+
+def _min_ttc(stats: dict) -> float:
+    # EpisodeMetrics reports -1 when no vehicle was ahead during the episode.
+    return stats["min_ttc"] if stats.get("min_ttc", -1.0) >= 0 else np.inf
+
+
+class CaptureSelector:
+    """Decide which finished episodes to keep, from their eval.py stats."""
+
+    def __init__(self, rules: dict[str, float | None]) -> None:
+        self.rules = rules
+        self._worst: list[float] = []  # max-heap (negated) of the K lowest min TTCs
+
+    def reasons(self, stats: dict) -> list[str]:
+        reasons = []
+        min_ttc = _min_ttc(stats)
+        if "all" in self.rules:
+            reasons.append("all")
+        if "collision" in self.rules and stats["collision"]:
+            reasons.append("collision")
+        if "min-ttc" in self.rules and min_ttc < self.rules["min-ttc"]:
+            reasons.append("min-ttc")
+        k = self.rules.get("worst-ttc")
+        if k and np.isfinite(min_ttc):
+            if len(self._worst) < k:
+                heapq.heappush(self._worst, -min_ttc)
+                reasons.append("worst-ttc")
+            elif min_ttc < -self._worst[0]:
+                heapq.heapreplace(self._worst, -min_ttc)
+                reasons.append("worst-ttc")
+        return reasons
+
+
+class FrameWriter:
+    """
+    Background thread that writes captured episodes.
+
+    submit() only queues the frames. It blocks when `max_pending` episodes
+    are already waiting, which bounds the memory held by captured frames.
+    The thread drains the queue before the process exits.
+    """
+
+    def __init__(self, out_dir: str, fmt: str = "npz", max_pending: int = 8) -> None:
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format: {fmt}")
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._index_path = os.path.join(out_dir, f"index_{os.getpid()}.jsonl")
+        os.makedirs(out_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=False)
+        self._thread.start()
+
+    def submit(self, name: str, frames: list[np.ndarray], fps: float, meta: dict) -> None:
+        self._queue.put((name, frames, fps, meta))
+
+    def flush(self) -> None:
+        """Block until every submitted episode is written."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                name, frames, fps, meta = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                # Exit once the main thread is done and nothing is left to write.
+                if not threading.main_thread().is_alive():
+                    return
+                continue
+            try:
+                path = os.path.join(self.out_dir, f"{name}.{self.fmt}")
+                self._write(path, np.stack(frames), fps)
+                self.written += 1
+                with open(self._index_path, "a") as handle:
+                    handle.write(json.dumps({"file": os.path.basename(path), **meta}) + "\n")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: str, frames: np.ndarray, fps: float) -> None:
+        tmp_path = f"{path}.tmp"
+        if self.fmt == "npz":
+            with open(tmp_path, "wb") as handle:
+                np.savez_compressed(handle, frames=frames, fps=fps)
+        else:
+            import imageio.v2 as imageio
+
+            imageio.mimwrite(tmp_path, frames, format="FFMPEG", fps=fps, macro_block_size=1)
+        os.replace(tmp_path, path)
+
+
+class FrameCaptureWrapper(gym.Wrapper):
+    """
+    Record an rgb_array frame after every reset and step.
+
+    The frames of the last finished episode are kept until the next episode
+    finishes, so they survive a VecEnv auto-reset. finish() then hands them
+    to the writer if the selector keeps the episode.
+    """
+
+    def __init__(self, env: gym.Env, selector: CaptureSelector, writer: FrameWriter) -> None:
+        super().__init__(env)
+        self.selector = selector
+        self.writer = writer
+        self._frames: list[np.ndarray] = []
+        self._finished: list[np.ndarray] = []
+
+    def _capture(self) -> None:
+        base = self.env.unwrapped
+        with profile("render"):
+            self._frames.append(base.render())
+        # render() turns on rendering of the intermediate simulation frames,
+        # which would be drawn and thrown away on every sub-step.
+        base.enable_auto_render = False
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._frames = []
+        self._capture()
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._capture()
+        if terminated or truncated:
+            self._finished, self._frames = self._frames, []
+        return obs, reward, terminated, truncated, info
+
+    def finish(self, key: tuple[int, int], stats: dict, seed: int | None = None) -> None:
+        """Select (and queue for writing) the episode that just finished."""
+        frames, self._finished = self._finished, []
+        reasons = self.selector.reasons(stats)
+        if not reasons or not frames:
+            return
+        run_idx, ep = key
+        meta = {
+            "run": run_idx + 1,
+            "episode": ep + 1,
+            "seed": seed,
+            "reasons": ";".join(reasons),
+            "frames": len(frames),
+            "collision": bool(stats["collision"]),
+            "min_ttc": stats.get("min_ttc"),
+            "total_reward": stats["total_reward"],
+        }
+        fps = self.env.unwrapped.config["policy_frequency"]
+        self.writer.submit(f"run{run_idx + 1}_ep{ep + 1:03d}", frames, fps, meta)
+
+
+def finish_episode(env, key: tuple[int, int], stats: dict, seed: int | None = None) -> None:
+    """FrameCaptureWrapper.finish() on the first capture wrapper in env's chain, if any."""
+    while isinstance(env, gym.Wrapper):
+        if isinstance(env, FrameCaptureWrapper):
+            env.finish(key, stats, seed)
+            return
+        env = env.env
+
+
+def finalize(out_dir: str, rules: dict[str, float | None]):
+    """Merge the per-process indexes into index.csv and apply the global worst-ttc cut."""
+    import pandas as pd
+
+    parts = sorted(glob.glob(os.path.join(out_dir, "index_*.jsonl")))
+    records = []
+    for part in parts:
+        with open(part) as handle:
+            records.extend(json.loads(line) for line in handle if line.strip())
+    index = pd.DataFrame(
+        records,
+        columns=[
+            "file", "run", "episode", "seed", "reasons", "frames", "collision", "min_ttc",
+            "total_reward",
+        ],
+    )
+    k = rules.get("worst-ttc")
+    if k and not index.empty:
+        is_worst = index["reasons"].str.split(";").apply(lambda r: "worst-ttc" in r)
+        ttc = index["min_ttc"].where(index["min_ttc"] >= 0, np.inf)
+        keep = ttc[is_worst].nsmallest(k).index
+        dropped = is_worst & ~index.index.isin(keep)
+        index.loc[dropped, "reasons"] = index.loc[dropped, "reasons"].apply(
+            lambda r: ";".join(x for x in r.split(";") if x != "worst-ttc")
+        )
+        for path in index.loc[dropped & (index["reasons"] == ""), "file"]:
+            os.remove(os.path.join(out_dir, path))
+        index = index[index["reasons"] != ""]
+    index = index.sort_values(["run", "episode"]).reset_index(drop=True)
+    index.to_csv(os.path.join(out_dir, "index.csv"), index=False)
+    for part in parts:
+        os.remove(part)
+    return index
+
+
+_ACTIVE: dict | None = None
+
+
+def enable(out_dir: str, rules: list[str], fmt: str = "npz") -> dict:
+    """Make envs built by eval.build_env in this process capture frames."""
+    global _ACTIVE
+    if fmt == "mp4":
+        try:
+            import imageio_ffmpeg  # noqa: F401
+        except ImportError as exc:
+            raise SystemExit(
+                "mp4 capture requires imageio and ffmpeg: pip install imageio imageio-ffmpeg"
+            ) from exc
+    # Without a display, pick SDL's offscreen driver up front instead of
+    # letting pygame probe for X11/Wayland.
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    _ACTIVE = {
+        "out_dir": out_dir,
+        "rules": parse_rules(rules),
+        "fmt": fmt,
+        "writer": FrameWriter(out_dir, fmt),
+    }
+    return _ACTIVE
+
+
+def active() -> dict | None:
+    return _ACTIVE
+
+
+def wrap(env: gym.Env) -> gym.Env:
+    """Wrap env with a FrameCaptureWrapper bound to the active writer."""
+    return FrameCaptureWrapper(env, CaptureSelector(_ACTIVE["rules"]), _ACTIVE["writer"])
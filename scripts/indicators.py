@@ -0,0 +1,156 @@
+"""
+Driving performance indicators (SI/EI/CI/RCI/GPS) computed from the
+eval.py summary metrics.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+
+SPEED_LIMIT_MS = 32.0
+SAFE_TTC_THRESHOLD = 2.0
+MAX_EXPECTED_JERK = 10.0
+MAX_EXPECTED_LANE_CHANGES = 20.0
+
+# Summary columns compute_indicators reads.
+INDICATOR_INPUTS = [
+    "collision",
+    "avg_ttc",
+    "ttc_violation_rate",
+    "avg_speed_ms",
+    "success",
+    "avg_jerk",
+    "lane_changes",
+]
+
+INDICATOR_NAMES = ["SI", "EI", "CI", "RCI", "GPS"]
+
+WEIGHTS = {
+    "safety": {"collision": 0.4, "ttc": 0.4, "ttc_violations": 0.2},
+    "efficiency": {"speed": 0.5, "success": 0.5},
+    "comfort": {"jerk": 0.6, "lane_changes": 0.4},
+    "global": {"safety": 0.40, "efficiency": 0.30, "comfort": 0.15, "compliance": 0.15},
+}
+
+
+def compute_indicators_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    SI/EI/CI/RCI/GPS for every row of `df`, computed column-wise.
+
+    Rows can be run summaries (means over episodes) or single episodes from
+    the instant_runs CSVs, giving per-episode indicators. Boolean columns
+    (collision, success) are treated as 0/1.
+    """
+    values = {
+        column: np.asarray(df[column], dtype=float) for column in INDICATOR_INPUTS
+    }
+    avg_ttc = values["avg_ttc"]
+
+    ttc_norm = np.where(avg_ttc > 0, np.minimum(avg_ttc / SAFE_TTC_THRESHOLD, 1.0), 0.0)
+    speed_ratio = np.minimum(values["avg_speed_ms"] / SPEED_LIMIT_MS, 1.0)
+
+    jerk_norm = np.minimum(values["avg_jerk"] / MAX_EXPECTED_JERK, 1.0)
+    lane_norm = np.minimum(values["lane_changes"] / MAX_EXPECTED_LANE_CHANGES, 1.0)
+
+    si = (
+        WEIGHTS["safety"]["collision"] * (1 - values["collision"])
+        + WEIGHTS["safety"]["ttc"] * ttc_norm
+        + WEIGHTS["safety"]["ttc_violations"] * (1 - values["ttc_violation_rate"])
+    )
+    ei = (
+        WEIGHTS["efficiency"]["speed"] * speed_ratio
+        + WEIGHTS["efficiency"]["success"] * values["success"]
+    )
+    ci = 1 - (
+        WEIGHTS["comfort"]["jerk"] * jerk_norm
+        + WEIGHTS["comfort"]["lane_changes"] * lane_norm
+    )
+    ci = np.maximum(ci, 0.0)
+    rci = speed_ratio
+    gps = (
+        WEIGHTS["global"]["safety"] * si
+        + WEIGHTS["global"]["efficiency"] * ei
+        + WEIGHTS["global"]["comfort"] * ci
+        + WEIGHTS["global"]["compliance"] * rci
+    )
+    return pd.DataFrame(
+        {"SI": si, "EI": ei, "CI": ci, "RCI": rci, "GPS": gps},
+        index=df.index,
+    )
+
+
+def compute_indicators(row: pd.Series) -> dict[str, float]:
+    """Indicators of a single summary row (Series or dict)."""
+    frame = compute_indicators_frame(pd.DataFrame([dict(row)]))
+    return {name: float(value) for name, value in frame.iloc[0].items()}
+
+
+def bootstrap_ci(
+    episodes: pd.DataFrame,
+    n_boot: int = 1000,
+    confidence: float = 0.95,
+    seed: int | None = 0,
+    by: str | None = "agent",
+    chunk: int = 200,
+) -> pd.DataFrame:
+    """
+    Bootstrap confidence intervals of the summary-level indicators.
+
+    Each resample draws the episodes of a group with replacement, averages
+    the indicator inputs and scores the means, exactly as a summary CSV is
+    scored. Resamples are drawn as multinomial episode counts, so a whole
+    chunk of them is one matrix product. Returns one row per group and
+    indicator with the point estimate and the percentile interval.
+    """
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    groups = episodes.groupby(by, sort=True) if by is not None else [(None, episodes)]
+
+    rows = []
+    for key, group in groups:
+        values = group[INDICATOR_INPUTS].to_numpy(dtype=float)
+        n = len(values)
+        if n == 0:
+            continue
+        point = compute_indicators_frame(
+            pd.DataFrame([values.mean(axis=0)], columns=INDICATOR_INPUTS)
+        ).iloc[0]
+
+        boot = []
+        for start in range(0, n_boot, chunk):
+            size = min(chunk, n_boot - start)
+            counts = rng.multinomial(n, np.full(n, 1.0 / n), size=size)
+            means = counts @ values / n
+            boot.append(
+                compute_indicators_frame(pd.DataFrame(means, columns=INDICATOR_INPUTS))
+            )
+        boot_df = pd.concat(boot, ignore_index=True)
+        low = boot_df.quantile(alpha)
+        high = boot_df.quantile(1 - alpha)
+        for name in INDICATOR_NAMES:
+            row = {} if by is None else {by: key}
+            row.update(
+                {
+                    "indicator": name,
+                    "estimate": float(point[name]),
+                    "ci_low": float(low[name]),
+                    "ci_high": float(high[name]),
+                    "episodes": n,
+                }
+            )
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def indicators_version() -> str:
+    """Hash of the normalisation constants and weights behind compute_indicators."""
+    payload = json.dumps(
+        [SPEED_LIMIT_MS, SAFE_TTC_THRESHOLD, MAX_EXPECTED_JERK, MAX_EXPECTED_LANE_CHANGES, WEIGHTS],
+        sort_keys=True,
+    ).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
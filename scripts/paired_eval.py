@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Paired comparison of agents on common random numbers (identical seeds).
+
+Every agent drives the same seeded episodes (the seeds of `eval.py --seed`),
+so each episode gives one paired difference per agent pair. Traffic variance
+that hits both agents alike cancels in the difference. Episodes of all agents
+run interleaved in one process pool; each worker loads every model it is
+asked for once.
+
+    python scripts/paired_eval.py --agents dqn ppo sac td3 --episodes 30 --workers 4
+
+For each agent pair and metric the script reports:
+
+- the mean paired difference (a - b) and its normal confidence interval;
+- a two-sided sign-flip permutation p-value, and a Holm-adjusted p-value
+  over all tests;
+- `equiv_unpaired_episodes`, the number of independent (unpaired) episodes
+  per agent that would give the same interval width.
+
+Indicators (SI/EI/CI/RCI/GPS) are tested on per-episode scores. They are
+reported at summary level, like the other comparison tables. Discrete and
+continuous agents use different env configs, so for them a shared seed
+means the same initial traffic, not identical dynamics.
+
+Outputs in model_comparison/:
+    comparison_<timestamp>.csv         per-agent table (same columns as the notebook's)
+    paired_<timestamp>.csv             pairwise differences and significance
+    paired_<timestamp>_episodes.csv    per-episode eval.py stats of every agent
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+
+import numpy as np
+
+DEFAULT_METRICS = [
+    "GPS",
+    "SI",
+    "EI",
+    "CI",
+    "collision",
+    "avg_speed_ms",
+    "avg_ttc",
+    "avg_jerk",
+    "lane_changes",
+    "total_reward",
+]
+# model_comparison/comparison_*.csv columns, as written by model_evaluation.ipynb.
+COMPARISON_COLUMNS = {
+    "GPS": "GPS",
+    "SI": "Safety (SI)",
+    "EI": "Efficiency (EI)",
+    "CI": "Comfort (CI)",
+    "RCI": "Compliance (RCI)",
+    "collision": "Collision Rate",
+    "success": "Success Rate",
+    "avg_speed_ms": "Avg Speed (m/s)",
+    "avg_ttc": "Avg TTC (s)",
+    "avg_jerk": "Avg Jerk",
+    "lane_changes": "Lane Changes",
+    "total_reward": "Avg Reward",
+}
+
+_AGENTS: dict = {}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Paired CRN comparison of agents.")
+    parser.add_argument(
+        "--agents",
+        nargs="+",
+        default=["dqn", "ppo", "sac", "td3"],
+        choices=["dqn", "ppo", "sac", "td3"],
+        help="Agents to compare (at least two).",
+    )
+    parser.add_argument("--episodes", type=int, default=30, help="Shared episodes per agent.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed (as in eval.py).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (1 = serial, in-process).",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        default=DEFAULT_METRICS,
+        help="Metrics / indicators to compare.",
+    )
+    parser.add_argument(
+        "--permutations", type=int, default=10000, help="Sign-flip permutations per test."
+    )
+    parser.add_argument("--confidence", type=float, default=0.95, help="Interval level.")
+    parser.add_argument(
+        "--out-dir", default="model_comparison", help="Directory for the output CSVs."
+    )
+    args = parser.parse_args()
+    if len(set(args.agents)) < 2:
+        parser.error("--agents needs at least two agents")
+    if args.episodes < 2:
+        parser.error("--episodes must be >= 2 (paired intervals need two differences)")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    from eval import EPISODE_STATS
+    from indicators import INDICATOR_NAMES
+
+    known = [*EPISODE_STATS, *INDICATOR_NAMES]
+    unknown = [metric for metric in args.metrics if metric not in known]
+    if unknown:
+        parser.error(f"unknown --metrics {', '.join(unknown)} (expected any of {', '.join(known)})")
+    return args
+
+
+def _init_worker() -> None:
+    # One BLAS/torch thread per worker; parallelism comes from the pool.
+    import torch
+
+    torch.set_num_threads(1)
+
+
+def _agent_state(agent_type: str) -> dict:
+    if agent_type not in _AGENTS:
+        from eval import AGENT_DIRS, load_model, make_eval_env
+
+        env, eval_env, _ = make_eval_env(agent_type, AGENT_DIRS[agent_type], render=False)
+        _AGENTS[agent_type] = {
+            "model": load_model(agent_type, AGENT_DIRS[agent_type]),
+            "env": env,
+            "eval_env": eval_env,
+        }
+    return _AGENTS[agent_type]
+
+
+def _run_task(task: tuple[str, int, int]):
+    from eval import run_episode
+
+    agent_type, ep, episode_seed = task
+    state = _agent_state(agent_type)
+    stats = run_episode(state["model"], state["env"], state["eval_env"], agent_type, episode_seed)
+    return agent_type, ep, episode_seed, stats
+
+
+def run_paired_episodes(agents, episodes: int, seed: int, workers: int):
+    """Per-episode stats of every agent on the shared seeds, as a DataFrame."""
+    import pandas as pd
+    from eval import episode_seed_for
+
+    # Episode-major order, so all agents progress through the seeds together.
+    tasks = [
+        (agent, ep, episode_seed_for(seed, 0, ep)) for ep in range(episodes) for agent in agents
+    ]
+    rows = []
+    if workers == 1:
+        results = map(_run_task, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context("spawn"), initializer=_init_worker
+        )
+        results = pool.map(_run_task, tasks)
+    try:
+        for agent, ep, episode_seed, stats in results:
+            rows.append({"agent": agent, "episode": ep + 1, "seed": episode_seed, **stats})
+            print(
+                f"[{agent}] Episode {ep + 1}/{episodes} (seed {episode_seed}): "
+                f"Reward={stats['total_reward']:.2f}, Crashed={stats['collision']}"
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return pd.DataFrame(rows)
+
+
+def sign_flip_pvalue(diffs: np.ndarray, permutations: int, rng) -> float:
+    """Two-sided p-value of mean(diffs) == 0 under random sign flips."""
+    n = diffs.size
+    if n == 0 or not np.any(diffs):
+        return 1.0
+    observed = abs(diffs.mean())
+    exceed = 0
+    for start in range(0, permutations, 1000):
+        size = min(1000, permutations - start)
+        signs = rng.choice((-1.0, 1.0), size=(size, n))
+        exceed += int(np.count_nonzero(np.abs(signs @ diffs) / n >= observed - 1e-12))
+    return (exceed + 1) / (permutations + 1)
+
+
+def holm_adjust(p_values: np.ndarray) -> np.ndarray:
+    order = np.argsort(p_values)
+    m = p_values.size
+    adjusted = np.empty(m)
+    running = 0.0
+    for rank, idx in enumerate(order):
+        running = max(running, (m - rank) * p_values[idx])
+        adjusted[idx] = min(running, 1.0)
+    return adjusted
+
+
+def paired_differences(
+    episodes, agents, metrics, permutations: int = 10000, confidence: float = 0.95, seed: int = 0
+):
+    """One row per (agent pair, metric) with the paired difference and its significance."""
+    import pandas as pd
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rng = np.random.default_rng(seed)
+    wide = {
+        agent: group.set_index("seed").sort_index()
+        for agent, group in episodes.groupby("agent")
+    }
+    rows = []
+    for a, b in itertools.combinations(agents, 2):
+        seeds = wide[a].index.intersection(wide[b].index)
+        for metric in metrics:
+            x = wide[a].loc[seeds, metric].to_numpy(dtype=float)
+            y = wide[b].loc[seeds, metric].to_numpy(dtype=float)
+            diffs = x - y
+            n = diffs.size
+            paired_se = diffs.std(ddof=1) / np.sqrt(n) if n > 1 else np.inf
+            unpaired_se = np.sqrt((x.var(ddof=1) + y.var(ddof=1)) / n) if n > 1 else np.inf
+            if paired_se > 0:
+                equivalent = n * (unpaired_se / paired_se) ** 2
+            else:
+                equivalent = np.inf if unpaired_se > 0 else float(n)
+            rows.append(
+                {
+                    "agent_a": a,
+                    "agent_b": b,
+                    "metric": metric,
+                    "episodes": n,
+                    "mean_a": float(x.mean()),
+                    "mean_b": float(y.mean()),
+                    "mean_diff": float(diffs.mean()),
+                    "ci_low": float(diffs.mean() - z * paired_se),
+                    "ci_high": float(diffs.mean() + z * paired_se),
+                    "p_value": sign_flip_pvalue(diffs, permutations, rng),
+                    "paired_se": float(paired_se),
+                    "unpaired_se": float(unpaired_se),
+                    "equiv_unpaired_episodes": float(equivalent),
+                }
+            )
+    df = pd.DataFrame(rows)
+    df["p_holm"] = holm_adjust(df["p_value"].to_numpy())
+    return df
+
+
+def comparison_table(episodes, agents):
+    """Per-agent summary in the model_comparison/comparison_*.csv layout."""
+    import pandas as pd
+    from indicators import compute_indicators
+
+    rows = []
+    for agent in agents:
+        means = episodes[episodes["agent"] == agent].mean(numeric_only=True)
+        scores = {**means.to_dict(), **compute_indicators(means)}
+        row = {"Model": agent.upper()}
+        row.update({column: scores[key] for key, column in COMPARISON_COLUMNS.items()})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main() -> None:
+    from indicators import INDICATOR_NAMES, compute_indicators_frame
+
+    args = parse_args()
+    agents = list(dict.fromkeys(args.agents))
+    print(
+        f"🔀 Paired evaluation: {', '.join(a.upper() for a in agents)} on "
+        f"{args.episodes} shared seeds (base seed {args.seed}, {args.workers} workers)"
+    )
+    episodes = run_paired_episodes(agents, args.episodes, args.seed, args.workers)
+    scores = compute_indicators_frame(episodes)
+    for name in INDICATOR_NAMES:
+        episodes[name] = scores[name].to_numpy()
+
+    paired = paired_differences(
+        episodes, agents, args.metrics, args.permutations, args.confidence, args.seed
+    )
+    comparison = comparison_table(episodes.drop(columns=INDICATOR_NAMES), agents)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    paths = {
+        "comparison": os.path.join(args.out_dir, f"comparison_{timestamp}.csv"),
+        "paired": os.path.join(args.out_dir, f"paired_{timestamp}.csv"),
+        "episodes": os.path.join(args.out_dir, f"paired_{timestamp}_episodes.csv"),
+    }
+    comparison.to_csv(paths["comparison"], index=False)
+    paired.to_csv(paths["paired"], index=False)
+    episodes.to_csv(paths["episodes"], index=False)
+
+    print("\n" + "=" * 80)
+    print("📊 PAIRED DIFFERENCES (a - b)")
+    print("=" * 80)
+    for row in paired.to_dict("records"):
+        mark = "✱" if row["p_holm"] < 1 - args.confidence else " "
+        print(
+            f"{mark} {row['agent_a'].upper()}-{row['agent_b'].upper():<4} {row['metric']:<14}"
+            f"{row['mean_diff']:>+10.4f} [{row['ci_low']:+.4f}, {row['ci_high']:+.4f}] "
+            f"p={row['p_value']:.4f} (Holm {row['p_holm']:.4f}) "
+            f"≈{row['equiv_unpaired_episodes']:.0f} unpaired episodes"
+        )
+    print(f"\n✱ significant at {1 - args.confidence:g} after Holm correction")
+    for path in paths.values():
+        print(f"📁 Saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,20 +9,19 @@ import argparse
 import glob
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
 
-
-SPEED_LIMIT_MS = 32.0
-SAFE_TTC_THRESHOLD = 2.0
-MAX_EXPECTED_JERK = 10.0
-MAX_EXPECTED_LANE_CHANGES = 20.0
-
-WEIGHTS = {
-    "safety": {"collision": 0.4, "ttc": 0.4, "ttc_violations": 0.2},
-    "efficiency": {"speed": 0.5, "success": 0.5},
-    "comfort": {"jerk": 0.6, "lane_changes": 0.4},
-    "global": {"safety": 0.40, "efficiency": 0.30, "comfort": 0.15, "compliance": 0.15},
-}
+from indicators import (  # noqa: F401  (re-exported for existing importers)
+    INDICATOR_INPUTS,
+    INDICATOR_NAMES,
+    MAX_EXPECTED_JERK,
+    MAX_EXPECTED_LANE_CHANGES,
+    SAFE_TTC_THRESHOLD,
+    SPEED_LIMIT_MS,
+    WEIGHTS,
+    bootstrap_ci,
+    compute_indicators,
+    compute_indicators_frame,
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -38,6 +37,34 @@ def parse_args() -> argparse.Namespace:
         default="run*_summary_*.csv",
         help="Glob pattern for summary files inside each agent summary dir.",
     )
+    parser.add_argument(
+        "--store",
+        default=None,
+        metavar="DIR",
+        help="Read runs from the Parquet results store in DIR instead of summary CSVs.",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="Summary cache file (default: .summary_cache.json).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-read every summary CSV instead of using the cache.",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Also write bootstrap CIs from N resamples of the per-episode rows.",
+    )
+    parser.add_argument(
+        "--episode-pattern",
+        default="run*_run_*.csv",
+        help="Glob pattern for per-episode files inside each agent instant_runs dir.",
+    )
     parser.add_argument(
         "--out",
         default="results_indicators_plot.png",
@@ -46,77 +73,72 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def compute_indicators(row: pd.Series) -> dict[str, float]:
-    collision_rate = float(row["collision"])
-    avg_ttc = float(row["avg_ttc"])
-    ttc_violation_rate = float(row["ttc_violation_rate"])
-    avg_speed = float(row["avg_speed_ms"])
-    success_rate = float(row["success"])
-    avg_jerk = float(row["avg_jerk"])
-    lane_changes = float(row["lane_changes"])
+def load_summaries(agents, pattern: str) -> pd.DataFrame:
+    frames = []
+    for agent in agents:
+        summary_dir = f"{agent}_agent/summary"
+        for path in glob.glob(os.path.join(summary_dir, pattern)):
+            row = pd.read_csv(path, index_col=0)["Value"]
+            frames.append({**row.to_dict(), "agent": agent})
+    return pd.DataFrame(frames)
 
-    ttc_norm = min(avg_ttc / SAFE_TTC_THRESHOLD, 1.0) if avg_ttc > 0 else 0.0
-    speed_ratio = min(avg_speed / SPEED_LIMIT_MS, 1.0)
 
-    jerk_norm = min(avg_jerk / MAX_EXPECTED_JERK, 1.0)
-    lane_norm = min(lane_changes / MAX_EXPECTED_LANE_CHANGES, 1.0)
+def load_episodes(agents, pattern: str, store: str | None) -> pd.DataFrame:
+    if store is not None:
+        from results_store import ResultsStore
 
-    si = (
-        WEIGHTS["safety"]["collision"] * (1 - collision_rate)
-        + WEIGHTS["safety"]["ttc"] * ttc_norm
-        + WEIGHTS["safety"]["ttc_violations"] * (1 - ttc_violation_rate)
-    )
-    ei = (
-        WEIGHTS["efficiency"]["speed"] * speed_ratio
-        + WEIGHTS["efficiency"]["success"] * success_rate
-    )
-    ci = 1 - (
-        WEIGHTS["comfort"]["jerk"] * jerk_norm
-        + WEIGHTS["comfort"]["lane_changes"] * lane_norm
-    )
-    ci = max(ci, 0.0)
-    rci = speed_ratio
-    gps = (
-        WEIGHTS["global"]["safety"] * si
-        + WEIGHTS["global"]["efficiency"] * ei
-        + WEIGHTS["global"]["comfort"] * ci
-        + WEIGHTS["global"]["compliance"] * rci
-    )
-    return {
-        "SI": si,
-        "EI": ei,
-        "CI": ci,
-        "RCI": rci,
-        "GPS": gps,
-    }
+        return ResultsStore(store).load_episodes(agents, columns=INDICATOR_INPUTS)
+    frames = []
+    for agent in agents:
+        run_dir = f"{agent}_agent/instant_runs"
+        for path in glob.glob(os.path.join(run_dir, pattern)):
+            frames.append(pd.read_csv(path, usecols=INDICATOR_INPUTS).assign(agent=agent))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
 def main() -> None:
     args = parse_args()
-    rows = []
 
-    for agent in args.agents:
-        summary_dir = f"{agent}_agent/summary"
-        for path in glob.glob(os.path.join(summary_dir, args.pattern)):
-            df = pd.read_csv(path, index_col=0)
-            row = df["Value"]
-            indicators = compute_indicators(row)
-            indicators["agent"] = agent
-            rows.append(indicators)
-
-    if not rows:
+    if args.store is not None:
+        from results_store import ResultsStore
+
+        # Only the indicator inputs are read from the Parquet files.
+        summaries = ResultsStore(args.store).run_summaries(
+            args.agents, columns=INDICATOR_INPUTS
+        )
+        df_all = compute_indicators_frame(summaries)
+        df_all["agent"] = summaries["agent"]
+    elif not args.no_cache:
+        from summary_cache import DEFAULT_CACHE, SummaryCache
+
+        cache = SummaryCache(args.cache or DEFAULT_CACHE)
+        rows = []
+        for entry in cache.collect(args.agents, args.pattern):
+            if entry["indicators"] is None:
+                raise SystemExit(f"{entry['summary_path']} lacks indicator metrics.")
+            rows.append({**entry["indicators"], "agent": entry["agent"]})
+        print(f"Summary cache: {cache.hits} cached, {cache.misses} read")
+        df_all = pd.DataFrame(rows)
+    else:
+        summaries = load_summaries(args.agents, args.pattern)
+        df_all = compute_indicators_frame(summaries) if not summaries.empty else summaries
+        if not summaries.empty:
+            df_all["agent"] = summaries["agent"]
+
+    if df_all.empty:
         raise SystemExit("No summary CSVs found. Run evals first.")
 
-    df_all = pd.DataFrame(rows)
-    mean_df = df_all.groupby("agent")[["SI", "EI", "CI", "RCI", "GPS"]].mean()
-    std_df = df_all.groupby("agent")[["SI", "EI", "CI", "RCI", "GPS"]].std()
+    mean_df = df_all.groupby("agent")[INDICATOR_NAMES].mean()
+    std_df = df_all.groupby("agent")[INDICATOR_NAMES].std()
 
     mean_df.to_csv("results_indicators_mean.csv")
     std_df.to_csv("results_indicators_std.csv")
 
-    metrics = ["SI", "EI", "CI", "RCI", "GPS"]
+    metrics = INDICATOR_NAMES
     agents = mean_df.index.tolist()
 
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(9, 5))
     x = range(len(agents))
     width = 0.15
@@ -152,6 +174,15 @@ def main() -> None:
     plt.savefig(args.out, dpi=200)
     print(f"Saved indicator plot to {args.out}")
 
+    if args.bootstrap > 0:
+        episodes = load_episodes(args.agents, args.episode_pattern, args.store)
+        if episodes.empty:
+            raise SystemExit("No per-episode CSVs found for --bootstrap.")
+        ci_df = bootstrap_ci(episodes, n_boot=args.bootstrap)
+        ci_df.to_csv("results_indicators_ci.csv", index=False)
+        print(ci_df.to_string(index=False))
+        print("Saved bootstrap CIs to results_indicators_ci.csv")
+
 
 if __name__ == "__main__":
     main()
@@ -7,7 +7,6 @@ from __future__ import annotations
 
 import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 
 
 def parse_args() -> argparse.Namespace:
@@ -45,6 +44,8 @@ def main() -> None:
     if not metrics:
         raise SystemExit("No matching metrics found in mean CSV.")
 
+    import matplotlib.pyplot as plt
+
     fig, axes = plt.subplots(1, len(metrics), figsize=(4 * len(metrics), 4))
     if len(metrics) == 1:
         axes = [axes]
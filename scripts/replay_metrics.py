@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Recompute episode metrics from recorded trajectories, without simulating.
+
+Reads the trajectory runs written by `eval.py --record-trajectories`
+(<agent>_agent/trajectories/run<N>_<timestamp>/) and recomputes the eval.py
+metrics, plus the extra metrics registered in trajectory.py, for all
+episodes at once. Useful after adding a metric or changing a threshold:
+
+    python scripts/replay_metrics.py --ttc-threshold 3.0
+    python scripts/replay_metrics.py dqn_agent/trajectories --metrics avg_ttc min_gap_m
+    python scripts/replay_metrics.py --check   # compare with the instant_runs CSVs
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from driving_metrics import SAFE_TTC_THRESHOLD
+from trajectory import find_run_dirs, load_episode, replay_metrics
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay metrics from recorded trajectories.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Trajectory directories to scan (default: <agent>_agent/trajectories).",
+    )
+    parser.add_argument(
+        "--agents",
+        nargs="+",
+        default=["dqn", "ppo", "sac", "td3"],
+        help="Agents whose trajectories are scanned when no paths are given.",
+    )
+    parser.add_argument(
+        "--ttc-threshold",
+        type=float,
+        default=SAFE_TTC_THRESHOLD,
+        help="TTC threshold (s) for ttc_violation_rate.",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        default=None,
+        help="Metric columns to keep (default: all).",
+    )
+    parser.add_argument(
+        "--out",
+        default="replayed_metrics.csv",
+        help="Output CSV with one row per replayed episode.",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare replayed metrics with the matching instant_runs CSVs.",
+    )
+    return parser.parse_args()
+
+
+def instant_run_csv(run_dir: str) -> str:
+    """instant_runs CSV written together with a trajectory run directory."""
+    agent_dir = os.path.dirname(os.path.dirname(run_dir))
+    run_tag, timestamp = os.path.basename(run_dir).split("_", 1)
+    return os.path.join(agent_dir, "instant_runs", f"{run_tag}_run_{timestamp}.csv")
+
+
+def main() -> None:
+    args = parse_args()
+    paths = args.paths or [f"{agent}_agent/trajectories" for agent in args.agents]
+    run_dirs = find_run_dirs(paths)
+    if not run_dirs:
+        raise SystemExit("No recorded trajectories found. Run eval.py --record-trajectories.")
+
+    start = time.perf_counter()
+    episodes = []
+    index = []
+    for run_dir in run_dirs:
+        with open(os.path.join(run_dir, "meta.json")) as handle:
+            meta = json.load(handle)
+        for episode in meta["episodes"]:
+            episodes.append(load_episode(run_dir, episode))
+            index.append({"agent": meta["agent"], "run_dir": run_dir, "episode": episode})
+    metrics = replay_metrics(episodes, args.ttc_threshold)
+    elapsed = time.perf_counter() - start
+
+    df = pd.concat([pd.DataFrame(index), pd.DataFrame(metrics)], axis=1)
+    if args.metrics is not None:
+        unknown = sorted(set(args.metrics) - set(metrics))
+        if unknown:
+            raise SystemExit(f"Unknown metrics: {', '.join(unknown)}")
+        df = df[["agent", "run_dir", "episode", *args.metrics]]
+    df.to_csv(args.out, index=False)
+
+    print(f"Replayed {len(episodes)} episodes from {len(run_dirs)} runs in {elapsed:.3f}s")
+    print(df.drop(columns=["run_dir", "episode"]).groupby("agent").mean(numeric_only=True))
+    print(f"📁 Results saved to: {args.out}")
+
+    if args.check:
+        worst = 0.0
+        for run_dir, group in df.groupby("run_dir"):
+            csv_path = instant_run_csv(run_dir)
+            if not os.path.exists(csv_path):
+                print(f"⚠️  No instant_runs CSV for {run_dir}")
+                continue
+            recorded = pd.read_csv(csv_path).set_index("episode")
+            replayed = group.set_index("episode")
+            shared = [c for c in replayed.columns if c in recorded.columns]
+            diff = np.abs(
+                replayed[shared].astype(float) - recorded.loc[replayed.index, shared].astype(float)
+            )
+            worst = max(worst, float(diff.to_numpy().max()))
+        print(f"Max abs difference vs instant_runs CSVs: {worst:.3g}")
+
+
+if __name__ == "__main__":
+    main()
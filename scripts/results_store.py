@@ -0,0 +1,166 @@
+"""
+Columnar results store for evaluation episodes.
+
+Instead of one timestamped CSV pair per run, per-episode rows are appended to
+Parquet files partitioned by agent / config hash / seed:
+
+    <root>/agent=<agent>/config=<hash>/seed=<seed>/<run_id>.parquet
+    <root>/manifest.jsonl      one line per run file (agent, config, seed, ...)
+
+Readers select files through the manifest and read them as one dataset with
+column pruning, so aggregation does not parse thousands of small CSVs.
+Requires pyarrow (pip install pyarrow).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+
+DEFAULT_ROOT = "results_store"
+MANIFEST = "manifest.jsonl"
+# Columns added to every stored row on top of the eval.py episode stats.
+KEY_COLUMNS = ["agent", "config", "seed", "run_id", "run"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset as ds
+    except ImportError as exc:
+        raise SystemExit("The results store requires pyarrow: pip install pyarrow") from exc
+    return ds
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_hash(config: dict) -> str:
+    """Short stable hash of a JSON-serializable config dict."""
+    payload = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+class ResultsStore:
+    """Append-only Parquet store of per-episode evaluation results."""
+
+    def __init__(self, root: str = DEFAULT_ROOT) -> None:
+        self.root = root
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def append_run(
+        self,
+        agent: str,
+        episodes: pd.DataFrame,
+        config: dict,
+        seed: int | None,
+        run: int,
+    ) -> str:
+        """Write one run's episode rows and register them in the manifest."""
+        _require_pyarrow()
+        cfg_hash = config_hash(config)
+        seed_key = "none" if seed is None else str(seed)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        run_id = f"{timestamp}_run{run}"
+
+        part_dir = os.path.join(
+            self.root, f"agent={agent}", f"config={cfg_hash}", f"seed={seed_key}"
+        )
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"{run_id}.parquet")
+
+        table = episodes.copy()
+        for column in table.columns:
+            if table[column].dtype == bool:
+                table[column] = table[column].astype(float)
+        table["run_id"] = run_id
+        table["run"] = run
+        table.to_parquet(path, index=False)
+
+        entry = {
+            "agent": agent,
+            "config": cfg_hash,
+            "seed": seed_key,
+            "run_id": run_id,
+            "run": run,
+            "episodes": len(episodes),
+            "path": os.path.relpath(path, self.root),
+            "created": timestamp,
+            "config_detail": config,
+        }
+        with open(self.manifest_path, "a") as handle:
+            handle.write(json.dumps(entry, default=str) + "\n")
+        return path
+
+    def manifest(self, agents=None) -> pd.DataFrame:
+        """Manifest rows (one per stored run), optionally filtered by agent."""
+        if not os.path.exists(self.manifest_path):
+            return pd.DataFrame(columns=["agent", "config", "seed", "run_id", "path"])
+        with open(self.manifest_path) as handle:
+            df = pd.DataFrame([json.loads(line) for line in handle if line.strip()])
+        if agents is not None and not df.empty:
+            df = df[df["agent"].isin(list(agents))]
+        return df
+
+    def load_episodes(self, agents=None, columns=None, configs=None) -> pd.DataFrame:
+        """
+        Episode rows for the requested agents/config hashes.
+
+        `columns` prunes the metric columns read from disk; the key columns
+        (agent, config, seed, run_id, run) are always included.
+        """
+        ds = _require_pyarrow()
+        import pyarrow as pa
+
+        # The manifest is the index: select files first, then read only those.
+        manifest = self.manifest(agents)
+        if configs is not None and not manifest.empty:
+            manifest = manifest[manifest["config"].isin(list(configs))]
+        if manifest.empty:
+            return pd.DataFrame(columns=KEY_COLUMNS + list(columns or []))
+
+        partitioning = ds.partitioning(
+            pa.schema(
+                [("agent", pa.string()), ("config", pa.string()), ("seed", pa.string())]
+            ),
+            flavor="hive",
+        )
+        dataset = ds.dataset(
+            [os.path.join(self.root, path) for path in manifest["path"]],
+            format="parquet",
+            partitioning=partitioning,
+            partition_base_dir=self.root,
+        )
+        read_columns = None
+        if columns is not None:
+            read_columns = KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+        return dataset.to_table(columns=read_columns).to_pandas()
+
+    def run_summaries(self, agents=None, columns=None) -> pd.DataFrame:
+        """Per-run means: the same rows eval.py writes as summary CSVs."""
+        episodes = self.load_episodes(agents, columns)
+        if episodes.empty:
+            return episodes
+        metrics = [
+            c
+            for c in episodes.columns
+            if c not in KEY_COLUMNS and pd.api.types.is_numeric_dtype(episodes[c])
+        ]
+        return (
+            episodes.groupby(["agent", "config", "seed", "run_id"], observed=True)[metrics]
+            .mean()
+            .reset_index()
+        )
@@ -5,6 +5,10 @@ Reward shaping wrappers for highway-env.
 from __future__ import annotations
 
 import gymnasium as gym
+import numpy as np
+
+from driving_metrics import lane_id, road_snapshot
+from step_profiler import profile
 
 
 class LaneCenteringOvertakeReward(gym.Wrapper):
@@ -13,6 +17,11 @@ class LaneCenteringOvertakeReward(gym.Wrapper):
 
     - Lane-centering penalty encourages staying near the lane center.
     - Overtake bonus rewards clean passes when the ego goes ahead of another car.
+
+    Only vehicles within `track_window` metres (longitudinally) of the ego are
+    tracked for overtakes. The tracked set is rebuilt every step, so vehicles
+    that leave the window or the road are dropped and memory stays bounded by
+    traffic near the ego, not by episode length.
     """
 
     def __init__(
@@ -22,22 +31,25 @@ class LaneCenteringOvertakeReward(gym.Wrapper):
         overtake_reward: float = 0.2,
         steering_penalty_weight: float = 0.08,
         lane_change_penalty_weight: float = 0.0,
+        track_window: float = 100.0,
     ) -> None:
         super().__init__(env)
         self.lane_center_weight = lane_center_weight
         self.overtake_reward = overtake_reward
         self.steering_penalty_weight = steering_penalty_weight
         self.lane_change_penalty_weight = lane_change_penalty_weight
-        self._last_rel_x = {}
+        self.track_window = track_window
+        # Vehicles tracked last step and their relative x. Holding the objects
+        # keeps their id() unique, so a new vehicle can never inherit an entry.
+        self._tracked: list = []
+        self._tracked_rel_x = np.empty(0)
         self._previous_lane_index = None
 
     def reset(self, **kwargs):
         obs, info = self.env.reset(**kwargs)
-        self._last_rel_x = {}
-        ego = self.env.unwrapped.vehicle
-        self._previous_lane_index = (
-            ego.lane_index[2] if ego.lane_index is not None else None
-        )
+        self._tracked = []
+        self._tracked_rel_x = np.empty(0)
+        self._previous_lane_index = lane_id(self.env.unwrapped.vehicle)
         return obs, info
 
     def step(self, action):
@@ -46,26 +58,20 @@ class LaneCenteringOvertakeReward(gym.Wrapper):
         ego = self.env.unwrapped.vehicle
         road = self.env.unwrapped.road
 
-        lane_penalty = 0.0
-        if ego.lane_index is not None:
-            lane = road.network.get_lane(ego.lane_index)
-            longitudinal, lateral = lane.local_coordinates(ego.position)
-            width = lane.width_at(longitudinal)
-            if width > 0:
-                # Normalize lateral deviation by half-lane width.
-                lateral_ratio = abs(lateral) / (width / 2.0)
-                lane_penalty = -self.lane_center_weight * lateral_ratio
-
-        overtake_bonus = 0.0
-        for other in road.vehicles:
-            if other is ego:
-                continue
-            key = id(other)
-            rel_x = other.position[0] - ego.position[0]
-            prev_rel_x = self._last_rel_x.get(key)
-            if prev_rel_x is not None and prev_rel_x > 0 and rel_x <= 0:
-                overtake_bonus += self.overtake_reward
-            self._last_rel_x[key] = rel_x
+        with profile("reward.lane_center"):
+            lane_penalty = 0.0
+            if ego.lane_index is not None:
+                lane = road.network.get_lane(ego.lane_index)
+                longitudinal, lateral = lane.local_coordinates(ego.position)
+                width = lane.width_at(longitudinal)
+                if width > 0:
+                    # Normalize lateral deviation by half-lane width.
+                    lateral_ratio = abs(lateral) / (width / 2.0)
+                    lane_penalty = -self.lane_center_weight * lateral_ratio
+
+        with profile("reward.overtake"):
+            snapshot = road_snapshot(self.env)
+            overtake_bonus = self.overtake_reward * float(self._count_overtakes(snapshot))
 
         steering_penalty = 0.0
         if hasattr(self.env.unwrapped, "action_type"):
@@ -74,9 +80,7 @@ class LaneCenteringOvertakeReward(gym.Wrapper):
                 steering_penalty = -self.steering_penalty_weight * abs(last_action[1])
 
         lane_change_penalty = 0.0
-        current_lane_index = (
-            ego.lane_index[2] if ego.lane_index is not None else None
-        )
+        current_lane_index = snapshot.ego_lane
         if (
             self._previous_lane_index is not None
             and current_lane_index is not None
@@ -91,3 +95,26 @@ class LaneCenteringOvertakeReward(gym.Wrapper):
         info["steering_penalty"] = steering_penalty
         info["lane_change_penalty"] = lane_change_penalty
         return obs, reward, done, truncated, info
+
+    def _count_overtakes(self, snapshot) -> int:
+        """Count tracked vehicles that went from ahead of the ego to behind it."""
+        rel_x = snapshot.rel_x
+        in_window = np.flatnonzero(np.abs(rel_x) <= self.track_window)
+        current = [snapshot.vehicles[i] for i in in_window]
+        current_rel_x = rel_x[in_window]
+
+        previous_slot = {id(vehicle): i for i, vehicle in enumerate(self._tracked)}
+        slots = np.fromiter(
+            (previous_slot.get(id(vehicle), -1) for vehicle in current),
+            dtype=np.int64,
+            count=len(current),
+        )
+        seen = slots >= 0
+        # NaN (vehicle not tracked last step) compares False, so it never counts.
+        previous_rel_x = np.full(len(current), np.nan)
+        previous_rel_x[seen] = self._tracked_rel_x[slots[seen]]
+        passed = np.count_nonzero((previous_rel_x > 0) & (current_rel_x <= 0))
+
+        self._tracked = current
+        self._tracked_rel_x = current_rel_x
+        return int(passed)
@@ -1,12 +1,42 @@
 #!/usr/bin/env python3
 """
 Run evaluations for multiple agents and aggregate mean/std results.
+
+Agent evals run concurrently as child processes under a CPU budget (each
+child costs --workers CPUs), with their output streamed line by line under
+an [agent] prefix. Failed evals are retried. An agent is skipped when its
+model files, the eval sources and the eval arguments are unchanged since
+its last complete result set (tracked in .run_all_evals_state.json).
+With --adaptive, each agent runs `eval.py --adaptive` instead of a fixed
+--episodes x --runs: it stops on its own once its confidence intervals
+reach the target widths.
+
+Post-processing is a small dependency graph: aggregate_results.py and
+plot_indicators.py start once every eval has finished, plot_results.py
+as soon as aggregation has written its tables. With --paired-episodes,
+paired_eval.py compares the agents on common seeded scenarios alongside.
 """
 
 from __future__ import annotations
 
 import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
 import subprocess
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".run_all_evals_state.json"
+MODEL_FILES = ["model.zip", "vec_normalize.pkl"]
+
+_print_lock = threading.Lock()
 
 
 def parse_args() -> argparse.Namespace:
@@ -19,35 +49,332 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--episodes", type=int, default=50, help="Episodes per run.")
     parser.add_argument("--runs", type=int, default=3, help="Runs per agent.")
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Eval seed passed to eval.py; every agent sees the same seeded episodes.",
+    )
+    parser.add_argument(
+        "--paired-episodes",
+        type=int,
+        default=0,
+        help="Also run paired_eval.py on this many shared seeds (0 = off).",
+    )
     parser.add_argument(
         "--render",
         action="store_true",
-        help="Enable rendering (slower).",
+        help="Enable rendering (slower; evals then run one at a time).",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="CPU budget shared by the concurrently running jobs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="eval.py --workers for each agent (CPUs charged per eval).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=1,
+        help="Extra attempts for a failed eval.",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Per-agent sequential evaluation until the CI targets are met.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--target-width",
+        nargs="+",
+        default=None,
+        metavar="METRIC=WIDTH",
+        help="eval.py --target-width for --adaptive.",
+    )
+    parser.add_argument(
+        "--max-episodes", type=int, default=300, help="Per-agent budget for --adaptive."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run every agent even if its results are up to date.",
+    )
+    args = parser.parse_args()
+    if args.render:
+        args.workers = 1
+        args.cpus = 1
+    if args.adaptive:
+        args.runs = 1
+    return args
+
+
+def script(name: str) -> str:
+    return os.path.join(SCRIPTS_DIR, name)
+
+
+def local_imports(name: str, seen: set[str] | None = None) -> set[str]:
+    """`name` plus every scripts/ module it imports, directly or transitively."""
+    seen = set() if seen is None else seen
+    seen.add(name)
+    with open(script(name)) as handle:
+        tree = ast.parse(handle.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            source = f"{module.split('.')[0]}.py"
+            if source not in seen and os.path.exists(script(source)):
+                local_imports(source, seen)
+    return seen
+
+
+def agent_fingerprint(agent: str, args: argparse.Namespace) -> str:
+    """Hash of the model files, eval sources and result-affecting eval args."""
+    digest = hashlib.sha1()
+    paths = [os.path.join(f"{agent}_agent", name) for name in MODEL_FILES]
+    # Sources that define the eval environment and metrics: eval.py and its
+    # local imports, including the ones made inside functions.
+    paths += [script(name) for name in sorted(local_imports("eval.py"))]
+    for path in paths:
+        digest.update(path.encode())
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(chunk)
+    eval_args = [args.episodes, args.runs, args.seed]
+    if args.adaptive:
+        eval_args = ["adaptive", args.target_width, args.max_episodes, args.seed]
+    digest.update(json.dumps(eval_args).encode())
+    return digest.hexdigest()
+
+
+def load_state() -> dict:
+    if not os.path.exists(STATE_FILE):
+        return {}
+    try:
+        with open(STATE_FILE) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def summary_files(agent: str) -> set[str]:
+    return set(glob.glob(os.path.join(f"{agent}_agent", "summary", "run*_summary_*.csv")))
+
+
+def is_up_to_date(agent: str, fingerprint: str, state: dict) -> bool:
+    entry = state.get(agent)
+    if entry is None or entry.get("fingerprint") != fingerprint:
+        return False
+    return all(os.path.exists(path) for path in entry.get("summaries", []))
+
+
+def log(prefix: str, message: str) -> None:
+    with _print_lock:
+        print(f"[{prefix}] {message}", flush=True)
+
+
+@dataclass
+class Job:
+    name: str
+    cmd: list[str]
+    cpus: int = 1
+    deps: list[str] = field(default_factory=list)
+    retries: int = 0
+    attempts: int = 0
+    status: str = "pending"  # pending | running | done | failed | skipped
+    on_success: object = None
+    # Directories whose new files are removed when an attempt fails.
+    outputs: list[str] = field(default_factory=list)
+
+
+def output_files(job: Job) -> set[str]:
+    return {
+        os.path.join(directory, name)
+        for directory in job.outputs
+        if os.path.isdir(directory)
+        for name in os.listdir(directory)
+    }
+
+
+def discard_outputs(job: Job, before: set[str]) -> None:
+    """Remove what a failed attempt wrote, so it never mixes with a later run."""
+    for path in sorted(output_files(job) - before):
+        if os.path.isfile(path):
+            os.remove(path)
+            log(job.name, f"removed partial output {path}")
+
+
+def run_job(job: Job) -> int:
+    """Run one child process, streaming its output with a [name] prefix."""
+    job.attempts += 1
+    log(job.name, f"$ {' '.join(job.cmd)}")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        job.cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    for line in proc.stdout:
+        log(job.name, line.rstrip())
+    code = proc.wait()
+    log(job.name, f"exit {code} after {time.perf_counter() - start:.1f}s")
+    return code
+
+
+def run_graph(jobs: list[Job], cpus: int) -> bool:
+    """
+    Run jobs whose dependencies are done, as long as their CPU cost fits the
+    budget. A job larger than the whole budget runs alone.
+    """
+    by_name = {job.name: job for job in jobs}
+    finished = threading.Condition()
+    in_use = 0
+
+    def worker(job: Job) -> None:
+        nonlocal in_use
+        code = 1
+        try:
+            before = output_files(job)
+            code = run_job(job)
+            while code != 0:
+                discard_outputs(job, before)
+                if job.attempts > job.retries:
+                    break
+                log(job.name, f"retrying (attempt {job.attempts + 1}/{job.retries + 1})")
+                code = run_job(job)
+            if code == 0 and job.on_success is not None:
+                job.on_success()
+        except Exception:
+            log(job.name, f"failed:\n{traceback.format_exc().rstrip()}")
+            code = 1
+        finally:
+            # Always release the CPUs and wake the scheduler, or it waits forever.
+            with finished:
+                job.status = "done" if code == 0 else "failed"
+                in_use -= job.cpus
+                finished.notify()
+
+    with finished:
+        while True:
+            for job in jobs:
+                if job.status != "pending":
+                    continue
+                deps = [by_name[dep].status for dep in job.deps]
+                if any(status in ("failed", "skipped") for status in deps):
+                    job.status = "skipped"
+                    log(job.name, "skipped: a dependency failed")
+                    continue
+                if any(status != "done" for status in deps):
+                    continue
+                cost = min(job.cpus, cpus)
+                if in_use and in_use + cost > cpus:
+                    continue
+                job.cpus = cost
+                job.status = "running"
+                in_use += cost
+                threading.Thread(target=worker, args=(job,), daemon=True).start()
+
+            if all(job.status in ("done", "failed", "skipped") for job in jobs):
+                break
+            finished.wait()
+
+    return all(job.status == "done" for job in jobs)
 
 
 def main() -> None:
     args = parse_args()
+    state = load_state()
+    state_lock = threading.Lock()
+    jobs: list[Job] = []
+    eval_names = []
+
     for agent in args.agents:
-        cmd = [
-            "python",
-            "scripts/eval.py",
-            "--agent",
-            agent,
-            "--episodes",
-            str(args.episodes),
-            "--runs",
-            str(args.runs),
-        ]
+        fingerprint = agent_fingerprint(agent, args)
+        name = f"eval:{agent}"
+        eval_names.append(name)
+        if not args.force and is_up_to_date(agent, fingerprint, state):
+            log(name, "up to date, skipping")
+            jobs.append(Job(name, [], status="done"))
+            continue
+
+        cmd = [sys.executable, script("eval.py"), "--agent", agent]
+        if args.adaptive:
+            cmd += ["--adaptive", "--max-episodes", str(args.max_episodes)]
+            if args.target_width:
+                cmd += ["--target-width", *args.target_width]
+        else:
+            cmd += ["--episodes", str(args.episodes), "--runs", str(args.runs)]
+        cmd += ["--workers", str(args.workers), "--seed", str(args.seed)]
         if args.render:
             cmd.append("--render")
-        print(f"Running: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True)
 
-    subprocess.run(["python", "scripts/aggregate_results.py"], check=True)
-    subprocess.run(["python", "scripts/plot_results.py"], check=True)
-    subprocess.run(["python", "scripts/plot_indicators.py"], check=True)
+        before = summary_files(agent)
+
+        def record(agent=agent, fingerprint=fingerprint, before=before) -> None:
+            # Only the summaries written by this (complete) run count.
+            new = sorted(summary_files(agent) - before)
+            with state_lock:
+                state[agent] = {"fingerprint": fingerprint, "summaries": new[-args.runs :]}
+                save_state(state)
+
+        jobs.append(
+            Job(
+                name,
+                cmd,
+                cpus=args.workers,
+                retries=args.retries,
+                on_success=record,
+                outputs=[
+                    os.path.join(f"{agent}_agent", "summary"),
+                    os.path.join(f"{agent}_agent", "instant_runs"),
+                ],
+            )
+        )
+
+    if args.paired_episodes > 0:
+        paired_cmd = [
+            sys.executable,
+            script("paired_eval.py"),
+            "--agents",
+            *args.agents,
+            "--episodes",
+            str(args.paired_episodes),
+            "--seed",
+            str(args.seed),
+            "--workers",
+            str(args.workers),
+        ]
+        jobs.append(Job("paired", paired_cmd, cpus=args.workers, retries=args.retries))
+
+    jobs.append(Job("aggregate", [sys.executable, script("aggregate_results.py")], deps=eval_names))
+    jobs.append(Job("plot_indicators", [sys.executable, script("plot_indicators.py")], deps=eval_names))
+    jobs.append(Job("plot_results", [sys.executable, script("plot_results.py")], deps=["aggregate"]))
+
+    ok = run_graph(jobs, args.cpus)
+    failed = [job.name for job in jobs if job.status != "done"]
+    if not ok:
+        raise SystemExit(f"Failed or skipped: {', '.join(failed)}")
+    print("✅ All evaluations and plots finished.")
 
 
 if __name__ == "__main__":
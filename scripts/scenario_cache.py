@@ -0,0 +1,178 @@
+"""
+Cache of initial highway-env scenarios, keyed by (seed, env config).
+
+A seeded reset always builds the same road and spawns the same vehicles, but
+each reset regenerates them from scratch (plus a Kinematics observation,
+which is surprisingly slow). ScenarioCacheWrapper captures the state right
+after a seeded reset once:
+- the road and vehicles;
+- the env RNG state;
+- the initial observation.
+
+Later resets with the same seed and config restore this state instead. The
+compressed pickle is kept in an LRU-bounded in-memory tier and, optionally,
+an on-disk tier shared between processes and runs.
+
+Restored episodes are step-for-step identical to freshly reset ones: the
+RNG continues from the same state and the road keeps sharing the env's
+generator.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from collections import OrderedDict
+
+import gymnasium as gym
+
+# Bump when the snapshot layout changes.
+SNAPSHOT_VERSION = 1
+DEFAULT_CACHE_DIR = ".scenario_cache"
+
+
+def scenario_key(env_id: str, config: dict, seed: int) -> str:
+    """Hash of everything that determines the initial scenario."""
+    import highway_env
+
+    payload = json.dumps(
+        [SNAPSHOT_VERSION, highway_env.__version__, env_id, config, seed],
+        sort_keys=True,
+        default=str,
+    ).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+class ScenarioCache:
+    """Two-tier (LRU memory + optional disk) store of compressed scenario snapshots."""
+
+    def __init__(self, cache_dir: str | None = None, max_items: int = 256) -> None:
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl.z")
+
+    def get(self, key: str) -> bytes | None:
+        blob = self._memory.get(key)
+        if blob is not None:
+            self._memory.move_to_end(key)
+            self.hits["memory"] += 1
+            return blob
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as handle:
+                blob = handle.read()
+            self._remember(key, blob)
+            self.hits["disk"] += 1
+            return blob
+        self.misses += 1
+        return None
+
+    def put(self, key: str, blob: bytes) -> None:
+        self._remember(key, blob)
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic, so concurrent workers never read a partial file.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(blob)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> str:
+        total = self.misses + sum(self.hits.values())
+        return (
+            f"{self.hits['memory']} memory hits, {self.hits['disk']} disk hits, "
+            f"{self.misses} generated ({total} seeded resets)"
+        )
+
+
+class ScenarioCacheWrapper(gym.Wrapper):
+    """
+    Serve seeded resets of a highway-env env from a ScenarioCache.
+
+    Wrap the env returned by gym.make directly, below reward wrappers, so that
+    their reset() still runs. Unseeded resets, resets with options and the
+    first reset (which the gym.make checker wrappers must see) always go
+    through the env.
+    """
+
+    def __init__(self, env: gym.Env, cache: ScenarioCache) -> None:
+        super().__init__(env)
+        self.cache = cache
+        self._first_reset = True
+
+    def reset(self, *, seed: int | None = None, options: dict | None = None):
+        if seed is None or options:
+            return self.env.reset(seed=seed, options=options)
+        base = self.env.unwrapped
+        key = scenario_key(base.spec.id if base.spec else type(base).__name__, base.config, seed)
+        blob = None if self._first_reset else self.cache.get(key)
+        self._first_reset = False
+        if blob is None:
+            obs, info = self.env.reset(seed=seed)
+            self.cache.put(key, self._snapshot(obs))
+            return obs, info
+        return self._restore(blob, seed)
+
+    def _snapshot(self, obs) -> bytes:
+        base = self.env.unwrapped
+        state = {
+            "road": base.road,
+            "controlled_vehicles": base.controlled_vehicles,
+            "rng_state": base.np_random.bit_generator.state,
+            "obs": obs,
+        }
+        return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    def _restore(self, blob: bytes, seed: int):
+        base = self.env.unwrapped
+        state = pickle.loads(zlib.decompress(blob))
+        # What AbstractEnv.reset does, with _reset() replaced by the snapshot.
+        gym.Env.reset(base, seed=seed)
+        base.update_metadata()
+        base.time = base.steps = 0
+        base.done = False
+        base.road = state["road"]
+        base.controlled_vehicles = state["controlled_vehicles"]
+        base.np_random.bit_generator.state = state["rng_state"]
+        # Vehicles draw from road.np_random; keep it the env's generator.
+        base.road.np_random = base.np_random
+        base.road.neighbour_vehicles_connected_lanes = base.config[
+            "neighbour_vehicles_connected_lanes"
+        ]
+        base.define_spaces()
+        obs = state["obs"]
+        info = base._info(obs, action=base.action_space.sample())
+        if base.render_mode == "human":
+            base.render()
+        return obs, info
+
+
+_ACTIVE: ScenarioCache | None = None
+
+
+def enable(cache_dir: str | None = None, max_items: int = 256) -> ScenarioCache:
+    """Make envs built by eval.build_env in this process use a ScenarioCache."""
+    global _ACTIVE
+    _ACTIVE = ScenarioCache(cache_dir, max_items)
+    return _ACTIVE
+
+
+def active() -> ScenarioCache | None:
+    return _ACTIVE
@@ -0,0 +1,135 @@
+"""
+Sequential stopping rule for adaptive evaluation (eval.py --adaptive).
+
+Episodes are added in batches until the confidence interval of every target
+metric is narrower than its target width, or the episode budget is spent.
+Intervals are computed according to the metric type:
+
+    collision, success   Wilson score interval of the rate
+    SI/EI/CI/RCI/GPS     bootstrap percentile interval (indicators.bootstrap_ci)
+    other columns        normal interval of the episode mean
+
+Checking after every batch is a sequential test. With very small samples
+the intervals are unreliable, so min_episodes should not be set too low.
+"""
+
+from __future__ import annotations
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_NAMES, bootstrap_ci
+
+# Full interval widths (high - low).
+DEFAULT_TARGETS = {"collision": 0.10, "GPS": 0.03, "avg_speed_ms": 0.5}
+BINARY_METRICS = ("collision", "success")
+
+
+def parse_targets(items: list[str] | None, known=None) -> dict[str, float]:
+    """
+    {metric: width} from METRIC=WIDTH strings (DEFAULT_TARGETS when empty).
+
+    With `known`, metric names outside it are rejected.
+    """
+    if not items:
+        return dict(DEFAULT_TARGETS)
+    targets = {}
+    for item in items:
+        metric, sep, width = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected METRIC=WIDTH, got {item!r}")
+        metric = metric.strip()
+        if known is not None and metric not in known:
+            raise ValueError(f"Unknown metric {metric!r} (expected one of {', '.join(known)})")
+        targets[metric] = float(width)
+    return targets
+
+
+def wilson_interval(successes: float, n: int, z: float) -> tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return float(center - half), float(center + half)
+
+
+def mean_interval(values: np.ndarray, z: float) -> tuple[float, float]:
+    n = values.size
+    if n < 2:
+        return -np.inf, np.inf
+    half = z * values.std(ddof=1) / np.sqrt(n)
+    mean = float(values.mean())
+    return mean - half, mean + half
+
+
+def metric_intervals(
+    episodes: pd.DataFrame, metrics, confidence: float = 0.95, seed: int | None = 0
+) -> dict[str, dict[str, float]]:
+    """{metric: {estimate, ci_low, ci_high, width}} for the episodes so far."""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    intervals = {}
+    indicators = [m for m in metrics if m in INDICATOR_NAMES]
+    if indicators:
+        ci = bootstrap_ci(episodes, confidence=confidence, seed=seed, by=None)
+        for row in ci[ci["indicator"].isin(indicators)].to_dict("records"):
+            intervals[row["indicator"]] = {
+                "estimate": row["estimate"],
+                "ci_low": row["ci_low"],
+                "ci_high": row["ci_high"],
+            }
+    for metric in metrics:
+        if metric in INDICATOR_NAMES:
+            continue
+        if metric not in episodes.columns:
+            raise KeyError(f"Unknown metric: {metric}")
+        values = episodes[metric].to_numpy(dtype=float)
+        if metric in BINARY_METRICS:
+            low, high = wilson_interval(values.sum(), values.size, z)
+        else:
+            low, high = mean_interval(values, z)
+        intervals[metric] = {
+            "estimate": float(values.mean()),
+            "ci_low": float(low),
+            "ci_high": float(high),
+        }
+    for interval in intervals.values():
+        interval["width"] = interval["ci_high"] - interval["ci_low"]
+    return intervals
+
+
+class SequentialStopper:
+    """Decide after each batch whether the target metrics are estimated precisely enough."""
+
+    def __init__(
+        self,
+        targets: dict[str, float],
+        confidence: float = 0.95,
+        min_episodes: int = 20,
+        max_episodes: int = 300,
+    ) -> None:
+        self.targets = targets
+        self.confidence = confidence
+        self.min_episodes = min_episodes
+        self.max_episodes = max_episodes
+
+    def check(self, episodes: pd.DataFrame) -> tuple[str | None, dict]:
+        """
+        (reason, intervals) for the episodes so far.
+
+        reason is None while more episodes are needed, otherwise "converged"
+        or "budget".
+        """
+        intervals = metric_intervals(episodes, self.targets, self.confidence)
+        n = len(episodes)
+        converged = all(
+            intervals[metric]["width"] <= width for metric, width in self.targets.items()
+        )
+        if n >= min(self.min_episodes, self.max_episodes) and converged:
+            return "converged", intervals
+        if n >= self.max_episodes:
+            return "budget", intervals
+        return None, intervals
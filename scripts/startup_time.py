@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Measure and track startup time of the scripts/ CLIs.
+
+Runs each CLI with --help (argument parsing only, no work) several times in
+fresh interpreters and records the median wall time. Results are appended
+to a history CSV together with the git revision, and each CLI is compared
+with its previous entry so import-time regressions show up.
+
+    python scripts/startup_time.py
+    python scripts/startup_time.py --scripts eval.py --importtime
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_SCRIPTS = [
+    "eval.py",
+    "aggregate_results.py",
+    "plot_results.py",
+    "plot_indicators.py",
+    "run_all_evals.py",
+    "eval_server.py",
+    "benchmark.py",
+]
+FIELDS = ["timestamp", "git_rev", "script", "median_s", "min_s", "repeats"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure CLI startup time.")
+    parser.add_argument(
+        "--scripts",
+        nargs="+",
+        default=CLI_SCRIPTS,
+        help="Scripts (in scripts/) to measure.",
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per script.")
+    parser.add_argument(
+        "--history",
+        default="startup_times.csv",
+        help="CSV the measurements are appended to.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown vs the previous entry that is flagged.",
+    )
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="Also print the slowest imports of each script (python -X importtime).",
+    )
+    return parser.parse_args()
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=SCRIPTS_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def time_startup(script: str, repeats: int) -> list[float]:
+    cmd = [sys.executable, os.path.join(SCRIPTS_DIR, script), "--help"]
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def slowest_imports(script: str, top: int = 8) -> list[tuple[float, str]]:
+    """(cumulative seconds, module) of the top-level imports that cost most."""
+    cmd = [sys.executable, "-X", "importtime", os.path.join(SCRIPTS_DIR, script), "--help"]
+    stderr = subprocess.run(cmd, capture_output=True, text=True).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        # Only top-level imports (no leading spaces in the module column).
+        if cumulative.strip().isdigit() and not module.startswith("  "):
+            entries.append((int(cumulative) / 1e6, module.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def previous_entries(path: str) -> dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as handle:
+        return {row["script"]: float(row["median_s"]) for row in csv.DictReader(handle)}
+
+
+def main() -> None:
+    args = parse_args()
+    previous = previous_entries(args.history)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rev = git_rev()
+
+    rows = []
+    regressions = []
+    print(f"{'script':<24}{'median':>10}{'min':>10}{'previous':>12}")
+    for script in args.scripts:
+        times = time_startup(script, args.repeats)
+        median = statistics.median(times)
+        rows.append(
+            {
+                "timestamp": timestamp,
+                "git_rev": rev,
+                "script": script,
+                "median_s": f"{median:.4f}",
+                "min_s": f"{min(times):.4f}",
+                "repeats": args.repeats,
+            }
+        )
+        before = previous.get(script)
+        flag = ""
+        if before is not None and median > before * (1 + args.threshold):
+            flag = "  ⚠️ slower"
+            regressions.append(script)
+        before_text = f"{before:.3f}s" if before is not None else "-"
+        print(f"{script:<24}{median:>9.3f}s{min(times):>9.3f}s{before_text:>12}{flag}")
+
+        if args.importtime:
+            for seconds, module in slowest_imports(script):
+                print(f"    {seconds:8.3f}s  {module}")
+
+    write_header = not os.path.exists(args.history)
+    with open(args.history, "a", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+    print(f"\n📁 Appended to {args.history}")
+    if regressions:
+        raise SystemExit(f"Startup regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
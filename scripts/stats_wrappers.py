@@ -0,0 +1,111 @@
+"""
+Env wrappers used by batched evaluation and step profiling.
+"""
+
+from __future__ import annotations
+
+import gymnasium as gym
+
+from driving_metrics import SAFE_TTC_THRESHOLD, EpisodeMetrics, road_snapshot
+from frame_capture import finish_episode
+from step_profiler import active, enable, profile
+
+
+class EpisodeStatsWrapper(gym.Wrapper):
+    """
+    Compute eval.py episode stats inside the env.
+
+    Used for batched evaluation: the stats are attached to the final step's
+    info as info["episode_stats"], so they survive VecEnv auto-reset and
+    SubprocVecEnv process boundaries. Each reset takes the next
+    (episode_key, seed) from `episodes`; once the queue is empty, resets are
+    unseeded and the resulting episodes are tagged with key None. With
+    record=True the episode's (steps, traffic) trajectory arrays are attached
+    as well, under "trajectory". Keyed episodes are also handed to a
+    FrameCaptureWrapper below, if there is one. With profiled=True each step's phase
+    timings are moved into info["profile"].
+    """
+
+    def __init__(
+        self, env: gym.Env, episodes, record: bool = False, profiled: bool = False
+    ) -> None:
+        super().__init__(env)
+        self._profiler = (active() or enable()) if profiled else None
+        self._recorder = None
+        if record:
+            from trajectory import TrajectoryRecorder
+
+            self._recorder = TrajectoryRecorder()
+        self._queue = list(episodes)
+        self._episode_key = None
+        self._seed = None
+        self._metrics = EpisodeMetrics(SAFE_TTC_THRESHOLD)
+        self._reward = 0.0
+        self._steps = 0
+
+    def reset(self, **kwargs):
+        episode_key, seed = self._queue.pop(0) if self._queue else (None, None)
+        if kwargs.get("seed") is None:
+            kwargs["seed"] = seed
+        obs, info = self.env.reset(**kwargs)
+        self._episode_key = episode_key
+        self._seed = kwargs["seed"]
+        self._reward = 0.0
+        self._steps = 0
+        self._metrics.reset(self.env.unwrapped.vehicle)
+        if self._recorder is not None:
+            self._recorder.reset(self.env.unwrapped.vehicle, road_snapshot(self.env))
+        return obs, info
+
+    def step(self, action):
+        with profile("env.step"):
+            obs, reward, done, truncated, info = self.env.step(action)
+        self._reward += float(reward)
+        self._steps += 1
+        with profile("metrics"):
+            snapshot = road_snapshot(self.env)
+            self._metrics.update(snapshot)
+        if self._recorder is not None:
+            self._recorder.record(
+                self.env.unwrapped.vehicle, snapshot, action, reward, info.get("crashed", False)
+            )
+        if done or truncated:
+            info["episode_stats"] = {
+                "key": self._episode_key,
+                "stats": {
+                    "total_reward": self._reward,
+                    "steps": self._steps,
+                    **self._metrics.summary(),
+                    "collision": info.get("crashed", False),
+                    "success": not info.get("crashed", False),
+                },
+            }
+            if self._recorder is not None:
+                info["episode_stats"]["trajectory"] = self._recorder.arrays()
+            if self._episode_key is not None:
+                finish_episode(
+                    self.env, self._episode_key, info["episode_stats"]["stats"], self._seed
+                )
+        if self._profiler is not None:
+            info["profile"] = self._profiler.drain()
+        return obs, reward, done, truncated, info
+
+
+class ProfiledEnv(gym.Wrapper):
+    """
+    Time env.step (and the nested reward.* phases) inside the env process.
+
+    Enables a process-wide StepProfiler and moves the samples of each step
+    into info["profile"], so they reach the trainer through any VecEnv,
+    including SubprocVecEnv workers.
+    """
+
+    def __init__(self, env: gym.Env) -> None:
+        super().__init__(env)
+        self._profiler = active() or enable()
+
+    def step(self, action):
+        with profile("env.step"):
+            obs, reward, done, truncated, info = self.env.step(action)
+        info["profile"] = self._profiler.drain()
+        return obs, reward, done, truncated, info
@@ -0,0 +1,163 @@
+"""
+Opt-in per-step phase timing for evaluation and training.
+
+Code marks phases with `with profile("env.step"): ...`. While no profiler
+is enabled, profile() returns a shared no-op context manager, so the
+instrumentation costs a global lookup per phase. With one enabled, every
+phase duration is kept and summarized as count / total / share of wall time
+and mean / p50 / p90 / p99 per call, plus env-steps/sec.
+
+Phases nest: "env.step" includes the reward wrapper's "reward.*" terms.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+_NULL = contextlib.nullcontext()
+_ACTIVE: "StepProfiler | None" = None
+
+
+class _Section:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "StepProfiler", name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._profiler.add(self._name, time.perf_counter() - self._start)
+
+
+class StepProfiler:
+    """Collects per-call durations (seconds) for named phases."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.started = time.perf_counter()
+
+    def section(self, name: str) -> _Section:
+        return _Section(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples[name].append(seconds)
+
+    def merge(self, samples: dict[str, list[float]] | None) -> None:
+        for name, values in (samples or {}).items():
+            self.samples[name].extend(values)
+
+    def drain(self) -> dict[str, list[float]]:
+        """Samples collected since the last drain (and forget them)."""
+        samples = dict(self.samples)
+        self.samples = defaultdict(list)
+        return samples
+
+    def summary(self, wall_s: float | None = None, step_phase: str = "env.step") -> dict:
+        wall = wall_s if wall_s is not None else time.perf_counter() - self.started
+        env_steps = len(self.samples.get(step_phase, []))
+        phases = {}
+        for name in sorted(self.samples):
+            values = np.asarray(self.samples[name]) * 1e3
+            if values.size == 0:
+                continue
+            total_s = float(values.sum()) / 1e3
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            phases[name] = {
+                "count": int(values.size),
+                "total_s": total_s,
+                "share": total_s / wall if wall > 0 else 0.0,
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+            }
+        return {
+            "wall_s": wall,
+            "env_steps": env_steps,
+            "env_steps_per_sec": env_steps / wall if wall > 0 else 0.0,
+            "phases": phases,
+        }
+
+
+def enable(profiler: StepProfiler | None = None) -> StepProfiler:
+    """Make `profiler` (or a new one) the process-wide active profiler."""
+    global _ACTIVE
+    _ACTIVE = profiler or StepProfiler()
+    return _ACTIVE
+
+
+def disable() -> None:
+    global _ACTIVE
+    _ACTIVE = None
+
+
+def active() -> StepProfiler | None:
+    return _ACTIVE
+
+
+@contextlib.contextmanager
+def paused():
+    """Suspend the active profiler, e.g. around in-training evaluation."""
+    global _ACTIVE
+    saved, _ACTIVE = _ACTIVE, None
+    try:
+        yield
+    finally:
+        _ACTIVE = saved
+
+
+def profile(name: str):
+    """Context manager timing phase `name` when profiling is enabled."""
+    if _ACTIVE is None:
+        return _NULL
+    return _ACTIVE.section(name)
+
+
+def print_summary(summary: dict, title: str = "Step profile") -> None:
+    print(
+        f"\n⏱️  {title}: {summary['env_steps']} env steps in {summary['wall_s']:.2f}s "
+        f"({summary['env_steps_per_sec']:.1f} steps/s)"
+    )
+    print(f"{'phase':<24}{'share':>8}{'mean':>12}{'p50':>12}{'p90':>12}{'p99':>12}")
+    for name, stats in summary["phases"].items():
+        print(
+            f"{name:<24}{stats['share']:>8.1%}{stats['mean_ms']:>10.2f}ms"
+            f"{stats['p50_ms']:>10.2f}ms{stats['p90_ms']:>10.2f}ms{stats['p99_ms']:>10.2f}ms"
+        )
+
+
+def write_json(summary: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(summary, handle, indent=2)
+
+
+def scalars(summary: dict, prefix: str = "profile") -> dict[str, float]:
+    """Flat {tag: value} view of a summary for TensorBoard / the SB3 logger."""
+    values = {f"{prefix}/env_steps_per_sec": summary["env_steps_per_sec"]}
+    for name, stats in summary["phases"].items():
+        for key in ("share", "mean_ms", "p50_ms", "p99_ms"):
+            values[f"{prefix}/{name}/{key}"] = stats[key]
+    return values
+
+
+def write_tensorboard(summary: dict, log_dir: str, step: int = 0) -> bool:
+    """Write the summary scalars to a TensorBoard run dir; False if unavailable."""
+    try:
+        from torch.utils.tensorboard import SummaryWriter
+    except ImportError:
+        return False
+    writer = SummaryWriter(log_dir)
+    for tag, value in scalars(summary).items():
+        writer.add_scalar(tag, value, step)
+    writer.close()
+    return True
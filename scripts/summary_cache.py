@@ -0,0 +1,139 @@
+"""
+Persistent cache of parsed eval.py summary CSVs.
+
+aggregate_results.py and plot_indicators.py both need every
+<agent>_agent/summary/*.csv. The cache keeps, per summary file, its metric
+row and the SI/EI/CI/RCI/GPS values, keyed by path and validated by
+size + mtime (with a content hash fallback when only the mtime changed).
+Unchanged files are never re-read; new runs only add their own entries.
+
+The cache is a single JSON file, rewritten atomically after each update.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+
+import pandas as pd
+
+from indicators import compute_indicators, indicators_version
+from results_store import file_sha1
+
+DEFAULT_CACHE = ".summary_cache.json"
+CACHE_FORMAT = 1
+
+
+def read_summary(path: str) -> dict[str, float]:
+    """Metric -> value row of one eval.py summary CSV."""
+    df = pd.read_csv(path, index_col=0)
+    return {metric: float(value) for metric, value in df["Value"].items()}
+
+
+def summary_indicators(metrics: dict[str, float]) -> dict[str, float] | None:
+    try:
+        return compute_indicators(metrics)
+    except KeyError:
+        # Old summaries without the full metric set have no indicators.
+        return None
+
+
+class SummaryCache:
+    """Path-keyed cache of summary metric rows and their indicators."""
+
+    def __init__(self, path: str | None = DEFAULT_CACHE) -> None:
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if data.get("format") != CACHE_FORMAT:
+            return
+        self.entries = data.get("entries", {})
+        if data.get("indicators_version") != indicators_version():
+            # Weights changed: recompute indicators from the cached metrics.
+            for entry in self.entries.values():
+                entry["indicators"] = summary_indicators(entry["metrics"])
+            self._dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        data = {
+            "format": CACHE_FORMAT,
+            "indicators_version": indicators_version(),
+            "entries": self.entries,
+        }
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as handle:
+            json.dump(data, handle)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get(self, path: str) -> dict:
+        """Cache entry for one summary file, parsing it only if it changed."""
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None:
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                self.hits += 1
+                return entry
+            sha1 = file_sha1(path)
+            if entry["sha1"] == sha1:
+                # Touched but not modified (copy, checkout): refresh the stat key.
+                entry["mtime_ns"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                self._dirty = True
+                self.hits += 1
+                return entry
+        else:
+            sha1 = file_sha1(path)
+
+        metrics = read_summary(path)
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": sha1,
+            "metrics": metrics,
+            "indicators": summary_indicators(metrics),
+        }
+        self.entries[path] = entry
+        self._dirty = True
+        self.misses += 1
+        return entry
+
+    def collect(self, agents, pattern: str) -> list[dict]:
+        """
+        Entries for every <agent>_agent/summary/<pattern> file, as dicts with
+        agent, summary_path, metrics and indicators. Entries of deleted files
+        are dropped and the cache is saved.
+        """
+        rows = []
+        for agent in agents:
+            summary_dir = f"{agent}_agent/summary"
+            for path in sorted(glob.glob(os.path.join(summary_dir, pattern))):
+                entry = self.get(path)
+                rows.append(
+                    {
+                        "agent": agent,
+                        "summary_path": path,
+                        "metrics": entry["metrics"],
+                        "indicators": entry["indicators"],
+                    }
+                )
+        for path in [path for path in self.entries if not os.path.exists(path)]:
+            del self.entries[path]
+            self._dirty = True
+        self.save()
+        return rows
@@ -0,0 +1,290 @@
+"""
+Compact per-episode trajectory logs and vectorized offline metric replay.
+
+During evaluation a TrajectoryRecorder keeps what the metrics read every
+step: ego position, speed, lane, action, reward and crash flag, plus the
+x/y/speed/lane of the surrounding traffic. Each episode is stored as two
+NumPy structured arrays (.npy, loadable memory-mapped):
+
+    <run dir>/ep0001_steps.npy     one row per step, row 0 = state after reset
+    <run dir>/ep0001_traffic.npy   one row per (step, other vehicle)
+    <run dir>/meta.json            agent, seeds, env config, episode list
+
+replay_metrics() recomputes the eval.py metrics, plus any metric added with
+@register_metric, for thousands of recorded episodes at once: all episodes
+are concatenated and every metric is a grouped array reduction, no
+simulator involved.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+
+import numpy as np
+
+from driving_metrics import MIN_CLOSING_SPEED, NO_LANE, SAFE_TTC_THRESHOLD
+
+STEP_FIELDS = [
+    ("t", np.int32),
+    ("ego_x", np.float64),
+    ("ego_y", np.float64),
+    ("ego_speed", np.float64),
+    ("ego_lane", np.int16),
+    ("reward", np.float64),
+    ("crashed", np.bool_),
+]
+TRAFFIC_DTYPE = np.dtype(
+    [
+        ("t", np.int32),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("speed", np.float64),
+        ("lane", np.int16),
+    ]
+)
+
+
+def step_dtype(action_dim: int) -> np.dtype:
+    return np.dtype(STEP_FIELDS + [("action", np.float32, (action_dim,))])
+
+
+class TrajectoryRecorder:
+    """
+    Collect one episode's ego and traffic state.
+
+    Call reset(ego, snapshot) after env.reset() and record(...) after every
+    env.step(), passing driving_metrics.road_snapshot(env) so the road is
+    read only once per step.
+    """
+
+    def __init__(self) -> None:
+        self._steps: list[tuple] = []
+        self._actions: list[np.ndarray] = []
+        self._traffic: list[np.ndarray] = []
+
+    def reset(self, ego, snapshot) -> None:
+        self._steps = []
+        self._actions = []
+        self._traffic = []
+        self._append(ego, snapshot, None, 0.0, False)
+
+    def record(self, ego, snapshot, action, reward: float, crashed: bool) -> None:
+        self._append(ego, snapshot, action, reward, crashed)
+
+    def _append(self, ego, snapshot, action, reward: float, crashed: bool) -> None:
+        t = len(self._steps)
+        lane = NO_LANE if snapshot.ego_lane is None else snapshot.ego_lane
+        self._steps.append(
+            (t, snapshot.ego_x, float(ego.position[1]), snapshot.ego_speed, lane, reward, crashed)
+        )
+        self._actions.append(None if action is None else np.ravel(action).astype(np.float32))
+
+        traffic = np.empty(snapshot.x.size, dtype=TRAFFIC_DTYPE)
+        traffic["t"] = t
+        traffic["x"] = snapshot.x
+        traffic["y"] = np.fromiter(
+            (v.position[1] for v in snapshot.vehicles), dtype=float, count=snapshot.x.size
+        )
+        traffic["speed"] = snapshot.speed
+        traffic["lane"] = snapshot.lane
+        self._traffic.append(traffic)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """(steps, traffic) structured arrays for the recorded episode."""
+        action_dim = max(
+            (action.size for action in self._actions if action is not None), default=1
+        )
+        steps = np.empty(len(self._steps), dtype=step_dtype(action_dim))
+        for name, values in zip([field for field, _ in STEP_FIELDS], zip(*self._steps)):
+            steps[name] = values
+        steps["action"] = 0.0
+        for t, action in enumerate(self._actions):
+            if action is not None:
+                steps["action"][t] = action
+        traffic = (
+            np.concatenate(self._traffic) if self._traffic else np.empty(0, TRAFFIC_DTYPE)
+        )
+        return steps, traffic
+
+
+def save_trajectories(run_dir: str, trajectories: list, meta: dict) -> None:
+    """Write (episode, steps, traffic) tuples plus meta.json into run_dir."""
+    os.makedirs(run_dir, exist_ok=True)
+    episodes = []
+    for episode, steps, traffic in trajectories:
+        np.save(os.path.join(run_dir, f"ep{episode:04d}_steps.npy"), steps)
+        np.save(os.path.join(run_dir, f"ep{episode:04d}_traffic.npy"), traffic)
+        episodes.append(episode)
+    with open(os.path.join(run_dir, "meta.json"), "w") as handle:
+        json.dump({**meta, "episodes": episodes}, handle, indent=2, default=str)
+
+
+def load_episode(run_dir: str, episode: int, mmap: bool = True):
+    mode = "r" if mmap else None
+    steps = np.load(os.path.join(run_dir, f"ep{episode:04d}_steps.npy"), mmap_mode=mode)
+    traffic = np.load(os.path.join(run_dir, f"ep{episode:04d}_traffic.npy"), mmap_mode=mode)
+    return steps, traffic
+
+
+def find_run_dirs(paths) -> list[str]:
+    """Trajectory run directories (those holding a meta.json) under `paths`."""
+    run_dirs = []
+    for path in paths:
+        for meta in glob.glob(os.path.join(path, "**", "meta.json"), recursive=True):
+            run_dirs.append(os.path.dirname(meta))
+    return sorted(set(run_dirs))
+
+
+class EpisodeBatch:
+    """
+    Many recorded episodes concatenated into flat arrays.
+
+    Step rows carry their episode index (`episode_idx`); `step_row` maps each
+    traffic row to the global index of the step it belongs to. Row 0 of each
+    episode (`is_reset`) is the post-reset state and is not a policy step.
+    """
+
+    def __init__(self, episodes: list[tuple[np.ndarray, np.ndarray]]) -> None:
+        lengths = np.array([len(steps) for steps, _ in episodes], dtype=np.int64)
+        self.n_episodes = len(episodes)
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        self.episode_idx = np.repeat(np.arange(self.n_episodes), lengths)
+
+        def column(name):
+            return np.concatenate([np.asarray(steps[name]) for steps, _ in episodes])
+
+        self.t = column("t").astype(np.int64)
+        self.ego_x = column("ego_x")
+        self.ego_speed = column("ego_speed")
+        self.ego_lane = column("ego_lane").astype(np.int64)
+        self.reward = column("reward")
+        self.crashed = column("crashed")
+        self.is_reset = self.t == 0
+        self.last_row = self.offsets + lengths - 1
+
+        traffic = [traffic for _, traffic in episodes]
+        traffic_counts = np.array([len(rows) for rows in traffic], dtype=np.int64)
+        self.traffic_x = np.concatenate([np.asarray(rows["x"]) for rows in traffic])
+        self.traffic_speed = np.concatenate([np.asarray(rows["speed"]) for rows in traffic])
+        self.traffic_lane = np.concatenate(
+            [np.asarray(rows["lane"]) for rows in traffic]
+        ).astype(np.int64)
+        traffic_t = np.concatenate([np.asarray(rows["t"]) for rows in traffic]).astype(np.int64)
+        self.step_row = np.repeat(self.offsets, traffic_counts) + traffic_t
+
+    def per_episode_sum(self, values, mask=None) -> np.ndarray:
+        weights = np.where(mask, values, 0.0) if mask is not None else values
+        return np.bincount(self.episode_idx, weights=weights, minlength=self.n_episodes)
+
+    def per_episode_reduce(self, ufunc, values, mask, initial: float) -> np.ndarray:
+        out = np.full(self.n_episodes, initial)
+        ufunc.at(out, self.episode_idx[mask], values[mask])
+        return out
+
+    def leader_ttc(self) -> np.ndarray:
+        """Per-step min TTC to same-lane vehicles ahead (inf when none)."""
+        rows = self.step_row
+        ego_lane = self.ego_lane[rows]
+        rel_x = self.traffic_x - self.ego_x[rows]
+        rel_v = self.ego_speed[rows] - self.traffic_speed
+        mask = (
+            (ego_lane != NO_LANE)
+            & (self.traffic_lane == ego_lane)
+            & (rel_x > 0)
+            & (rel_v > MIN_CLOSING_SPEED)
+        )
+        ttc = np.full(len(self.t), np.inf)
+        np.minimum.at(ttc, rows[mask], rel_x[mask] / rel_v[mask])
+        return ttc
+
+    def jerk(self) -> np.ndarray:
+        """Per-step |jerk| from ego speeds, starting from rest each episode."""
+        prev_speed = np.concatenate([[0.0], self.ego_speed[:-1]])
+        acc = np.where(self.is_reset, 0.0, self.ego_speed - prev_speed)
+        # The first policy step (t == 1) starts from v=0, a=0.
+        acc = np.where(self.t == 1, self.ego_speed, acc)
+        prev_acc = np.concatenate([[0.0], acc[:-1]])
+        prev_acc[self.t <= 1] = 0.0
+        return np.abs(acc - prev_acc)
+
+
+# name -> fn(batch, step_mask) -> per-episode array, for metrics beyond eval.py's.
+EXTRA_METRICS: dict = {}
+
+
+def register_metric(name: str):
+    """Decorator registering an extra per-episode replay metric."""
+
+    def decorator(fn):
+        EXTRA_METRICS[name] = fn
+        return fn
+
+    return decorator
+
+
+@register_metric("min_gap_m")
+def min_gap(batch: EpisodeBatch, step: np.ndarray) -> np.ndarray:
+    """Smallest longitudinal gap to a same-lane vehicle ahead (inf when none)."""
+    rows = batch.step_row
+    ego_lane = batch.ego_lane[rows]
+    rel_x = batch.traffic_x - batch.ego_x[rows]
+    mask = step[rows] & (ego_lane != NO_LANE) & (batch.traffic_lane == ego_lane) & (rel_x > 0)
+    out = np.full(batch.n_episodes, np.inf)
+    np.minimum.at(out, batch.episode_idx[rows[mask]], rel_x[mask])
+    return out
+
+
+def replay_metrics(
+    episodes: list[tuple[np.ndarray, np.ndarray]],
+    ttc_threshold: float = SAFE_TTC_THRESHOLD,
+) -> dict[str, np.ndarray]:
+    """
+    eval.py's per-episode columns recomputed from recorded trajectories.
+
+    Matches EpisodeMetrics.summary() (plus total_reward, steps, collision,
+    success) and adds the registered EXTRA_METRICS; every metric is
+    computed for all episodes at once.
+    """
+    batch = EpisodeBatch(episodes)
+    step = ~batch.is_reset
+    steps = np.bincount(batch.episode_idx, weights=step, minlength=batch.n_episodes)
+
+    ttc = batch.leader_ttc()
+    has_ttc = step & np.isfinite(ttc)
+    ttc_count = np.bincount(batch.episode_idx, weights=has_ttc, minlength=batch.n_episodes)
+    ttc_sum = batch.per_episode_sum(ttc, has_ttc)
+    ttc_min = batch.per_episode_reduce(np.minimum, ttc, has_ttc, np.inf)
+    violations = batch.per_episode_sum(ttc < ttc_threshold, has_ttc)
+
+    jerk = batch.jerk()
+    jerk_sum = batch.per_episode_sum(jerk, step)
+    jerk_max = batch.per_episode_reduce(np.maximum, jerk, step, 0.0)
+
+    prev_lane = np.concatenate([[NO_LANE], batch.ego_lane[:-1]])
+    lane_change = (
+        step & (prev_lane != NO_LANE) & (batch.ego_lane != NO_LANE) & (prev_lane != batch.ego_lane)
+    )
+
+    # Like eval.py: the crash flag of the final step.
+    crashed = batch.crashed[batch.last_row]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics = {
+            "total_reward": batch.per_episode_sum(batch.reward, step),
+            "steps": steps.astype(np.int64),
+            "avg_speed_ms": batch.per_episode_sum(batch.ego_speed, step) / (steps + 1e-6),
+            "lane_changes": np.bincount(
+                batch.episode_idx, weights=lane_change, minlength=batch.n_episodes
+            ).astype(np.int64),
+            "avg_jerk": np.where(steps > 0, jerk_sum / np.maximum(steps, 1), 0.0),
+            "max_jerk": jerk_max,
+            "avg_ttc": np.where(ttc_count > 0, ttc_sum / np.maximum(ttc_count, 1), -1.0),
+            "min_ttc": np.where(ttc_count > 0, ttc_min, -1.0),
+            "ttc_violation_rate": violations / (steps + 1e-6),
+            "collision": crashed,
+            "success": ~crashed,
+        }
+    for name, fn in EXTRA_METRICS.items():
+        metrics[name] = fn(batch, step)
+    return metrics
@@ -1,58 +1,16 @@
-from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-import gymnasium as gym
-import highway_env
-import os
-import sys
-
-# Import shared environment config
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from env_config import get_env_config, get_ppo_env_config
-from reward_wrappers import LaneCenteringOvertakeReward
-
-# Training configuration
-TOTAL_TIMESTEPS = 400_000  # 400k timesteps for better continuous-style shaping
-AGENT_NAME = "ppo_agent"
-os.makedirs(AGENT_NAME, exist_ok=True)
+"""
+PPO Training - Discrete actions with VecNormalize and lane-centering/overtake
+reward shaping (overtake_reward=0.7).
 
-def make_env():
-    env = gym.make("highway-v0")
-    # Use shared config to ensure training/evaluation consistency
-    env.unwrapped.config.update(get_ppo_env_config())
-    env = LaneCenteringOvertakeReward(env, overtake_reward=0.7)
-    return env
+Thin wrapper around the unified trainer: equivalent to
+`python training/train.py --agent ppo [options]`. Hyperparameters and reward
+settings live in training/configs/ppo.json.
+"""
 
-# Vectorized + normalization
-env = DummyVecEnv([make_env])
-env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
-
-# === Improved PPO hyperparameters ===
-model = PPO(
-    "MlpPolicy",
-    env,
-    verbose=1,  # Show training progress
-    n_steps=2048,
-    batch_size=256,
-    gae_lambda=0.95,
-    gamma=0.99,
-    n_epochs=10,
-    learning_rate=3e-4,
-    clip_range=0.2,
-    ent_coef=0.01,
-    policy_kwargs=dict(
-        net_arch=[256, 256]  # Simplified network for faster training
-    ),
-)
+import sys
 
-# Train
-model.learn(total_timesteps=TOTAL_TIMESTEPS)
+from train import main
 
-# Save
-model.save(os.path.join(AGENT_NAME, "model"))
-env.save(os.path.join(AGENT_NAME, "vec_normalize.pkl"))
 
-print("\n" + "="*70)
-print("✅ PPO training complete!")
-print(f"📁 Model saved to: {AGENT_NAME}/model.zip")
-print(f"📁 Normalizer saved to: {AGENT_NAME}/vec_normalize.pkl")
-print("="*70)
+if __name__ == "__main__":
+    main(["--agent", "ppo", *sys.argv[1:]])
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweep with successive halving.
+
+A sweep spec (JSON/YAML) names the agent, a search space over dotted config
+keys (anything train.py's --set accepts: hyperparameters.*, env_overrides.*,
+reward_wrapper.*) and a list of rung budgets in timesteps. All trials are
+trained to the first rung on a local process pool, evaluated with the
+eval.py metrics, and only the best 1/eta advance to the next rung, resuming
+from their saved model. Losing trials are stopped at the rung where they
+fall behind.
+
+Example spec:
+
+    {
+      "agent": "td3",
+      "search": "random",
+      "num_samples": 9,
+      "space": {
+        "env_overrides.collision_reward": [-4, -6, -8],
+        "env_overrides.high_speed_reward": {"low": 0.3, "high": 0.8},
+        "reward_wrapper.overtake_reward": {"low": 0.05, "high": 0.5, "log": true}
+      },
+      "rungs": [50000, 150000, 400000],
+      "eta": 3
+    }
+
+    python training/sweep.py training/sweeps/td3_rewards.json --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import math
+import multiprocessing as mp
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+# Importing train also puts scripts/ on sys.path (eval.py, indicators.py).
+from train import load_config, read_config_file, set_by_path, train_agent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a successive-halving sweep.")
+    parser.add_argument("spec", help="Sweep spec file (JSON/YAML).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent trials (default: spec 'workers' or 1).",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default=None,
+        help="Sweep directory (default: spec 'out_dir' or sweeps/<spec name>).",
+    )
+    return parser.parse_args()
+
+
+def sample_value(domain, rng: random.Random):
+    """Draw one value: a list is a categorical choice, a dict a numeric range."""
+    if isinstance(domain, list):
+        return rng.choice(domain)
+    low, high = domain["low"], domain["high"]
+    if domain.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if domain.get("int") else value
+
+
+def generate_trials(spec: dict) -> list[dict]:
+    """Expand the search space into a list of {dotted_key: value} dicts."""
+    space = spec["space"]
+    if spec.get("search", "grid") == "grid":
+        for key, domain in space.items():
+            if not isinstance(domain, list):
+                raise SystemExit(f"Grid search needs a list of values for {key!r}")
+        keys = list(space)
+        return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+    rng = random.Random(spec.get("seed", 0))
+    return [
+        {key: sample_value(domain, rng) for key, domain in space.items()}
+        for _ in range(spec.get("num_samples", 10))
+    ]
+
+
+def run_trial_rung(
+    agent: str,
+    config: dict,
+    seed: int | None,
+    trial_dir: str,
+    eval_episodes: int,
+    eval_seed: int,
+) -> dict:
+    """Train (or continue) one trial to config['total_timesteps'] and evaluate it."""
+    import torch
+    from eval import evaluate_model
+    from training_utils import score_episodes
+
+    torch.set_num_threads(1)
+    train_agent(agent, config, seed, trial_dir, resume=True)
+    return score_episodes(evaluate_model(agent, trial_dir, eval_episodes, eval_seed))
+
+
+def write_results(path: str, rows: list[dict]) -> None:
+    import pandas as pd
+
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def main() -> None:
+    args = parse_args()
+    spec = read_config_file(args.spec)
+    agent = spec["agent"]
+    eta = spec.get("eta", 3)
+    rungs = sorted(spec["rungs"])
+    metric = spec.get("metric", "GPS")
+    workers = args.workers or spec.get("workers", 1)
+    spec_name = os.path.splitext(os.path.basename(args.spec))[0]
+    out_dir = args.out_dir or spec.get("out_dir") or os.path.join("sweeps", spec_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    base_config = load_config(agent, spec.get("base_config"))
+    # Promoted trials resume from disk, so off-policy buffers must be kept.
+    base_config["save_replay_buffer"] = True
+    trials = generate_trials(spec)
+    print(f"Sweep {spec_name}: {len(trials)} trials, rungs={rungs}, eta={eta}")
+
+    alive = list(range(len(trials)))
+    rows: list[dict] = []
+    results_path = os.path.join(out_dir, "sweep_results.csv")
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for rung_idx, budget in enumerate(rungs):
+            futures = {}
+            for trial_id in alive:
+                config = copy.deepcopy(base_config)
+                for key, value in trials[trial_id].items():
+                    set_by_path(config, key, value)
+                config["total_timesteps"] = budget
+                futures[trial_id] = pool.submit(
+                    run_trial_rung,
+                    agent,
+                    config,
+                    spec.get("train_seed"),
+                    os.path.join(out_dir, f"trial{trial_id:03d}"),
+                    spec.get("eval_episodes", 10),
+                    spec.get("eval_seed", 1000),
+                )
+
+            scores = {}
+            for trial_id, future in futures.items():
+                result = future.result()
+                scores[trial_id] = result[metric]
+                rows.append(
+                    {
+                        "trial": trial_id,
+                        "rung": rung_idx,
+                        "timesteps": budget,
+                        **trials[trial_id],
+                        **result,
+                    }
+                )
+                print(
+                    f"  rung {rung_idx} ({budget:,} steps) trial {trial_id:03d}: "
+                    f"{metric}={result[metric]:.4f} {trials[trial_id]}"
+                )
+            write_results(results_path, rows)
+
+            if rung_idx == len(rungs) - 1:
+                break
+            keep = max(1, math.ceil(len(alive) / eta))
+            ranked = sorted(alive, key=lambda trial_id: scores[trial_id], reverse=True)
+            alive = ranked[:keep]
+            print(
+                f"Rung {rung_idx} done: promoting {keep}/{len(ranked)} trials "
+                f"{alive}, stopping {ranked[keep:]}"
+            )
+
+    best = max(alive, key=lambda trial_id: scores[trial_id])
+    print("\n" + "=" * 70)
+    print(f"🏁 Best trial {best:03d}: {metric}={scores[best]:.4f}")
+    print(f"   Params: {trials[best]}")
+    print(f"   Model: {os.path.join(out_dir, f'trial{best:03d}')}/model.zip")
+    print(f"📁 Results saved to: {results_path}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
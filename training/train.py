@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Unified, config-driven training entry point for DQN/PPO/SAC/TD3.
+
+Hyperparameters, reward-wrapper weights and env_config overrides come from
+training/configs/<agent>.json, optionally overridden by a JSON/YAML file
+(--config) and by --set key.path=value pairs. Several seeds can be trained in
+one invocation; with --parallel > 1 they run concurrently in separate
+processes.
+
+    python training/train.py --agent sac
+    python training/train.py --agent td3 --config sweep.yaml --seeds 0 1 2 3 4 --parallel 5
+    python training/train.py --agent dqn --set hyperparameters.gamma=0.9
+    python training/train.py --agent sac --resume --eval-freq 20000
+
+Checkpoints (model, replay buffer, VecNormalize) are written every
+checkpoint_freq timesteps to <out_dir>/checkpoints/; --resume continues from
+the most recent one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import multiprocessing as mp
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+)
+from env_config import get_continuous_env_config, get_env_config, get_ppo_env_config
+
+
+AGENTS = ("dqn", "ppo", "sac", "td3")
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+
+ENV_CONFIGS = {
+    "default": get_env_config,
+    "ppo": get_ppo_env_config,
+    "continuous": get_continuous_env_config,
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Train an agent from a config file.", allow_abbrev=False
+    )
+    parser.add_argument("--agent", choices=AGENTS, required=True, help="Agent type.")
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="JSON/YAML file merged over training/configs/<agent>.json.",
+    )
+    parser.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a config entry, e.g. hyperparameters.gamma=0.9 (repeatable).",
+    )
+    seeds = parser.add_mutually_exclusive_group()
+    seeds.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of a single run, trained in the output directory itself.",
+    )
+    seeds.add_argument(
+        "--seeds",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Seeds to train; each gets its own <agent_dir>/seeds/seed<N>/ directory.",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Number of seeds trained concurrently (one process each).",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default=None,
+        help="Output directory (default: agent_dir from the config).",
+    )
+    parser.add_argument("--timesteps", type=int, default=None, help="Total timesteps.")
+    parser.add_argument(
+        "--n-envs", type=int, default=None, help="Number of parallel environments."
+    )
+    parser.add_argument(
+        "--vec-backend",
+        choices=["dummy", "subproc"],
+        default=None,
+        help="dummy = all envs in this process, subproc = one worker process per env.",
+    )
+    parser.add_argument(
+        "--train-freq", type=int, default=None, help="Off-policy train_freq."
+    )
+    parser.add_argument(
+        "--gradient-steps", type=int, default=None, help="Off-policy gradient_steps."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the latest checkpoint (or saved model) in the output dir.",
+    )
+    parser.add_argument(
+        "--checkpoint-freq",
+        type=int,
+        default=None,
+        help="Timesteps between checkpoints of model/replay buffer/VecNormalize (0 = off).",
+    )
+    parser.add_argument(
+        "--eval-freq",
+        type=int,
+        default=None,
+        help="Timesteps between in-training evaluations (0 = off); best model is kept.",
+    )
+    parser.add_argument(
+        "--eval-episodes", type=int, default=None, help="Episodes per in-training evaluation."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time env.step / reward terms / rollout / train phases and save profile.json.",
+    )
+    args = parser.parse_args(argv)
+    if args.parallel < 1:
+        parser.error("--parallel must be >= 1")
+    return args
+
+
+def deep_update(base: dict, overrides: dict) -> dict:
+    """Recursively merge `overrides` into `base` (in place) and return it."""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            deep_update(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def read_config_file(path: str) -> dict:
+    with open(path) as handle:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise SystemExit("PyYAML is required for YAML configs: pip install pyyaml") from exc
+            return yaml.safe_load(handle) or {}
+        return json.load(handle)
+
+
+def set_by_path(config: dict, dotted_key: str, value) -> None:
+    """Set config['a']['b'] for dotted_key 'a.b', creating dicts as needed."""
+    *parents, leaf = dotted_key.split(".")
+    node = config
+    for key in parents:
+        if not isinstance(node.get(key), dict):
+            node[key] = {}
+        node = node[key]
+    node[leaf] = value
+
+
+def parse_override(item: str) -> tuple[str, object]:
+    key, sep, raw = item.partition("=")
+    if not sep:
+        raise SystemExit(f"--set expects KEY=VALUE, got {item!r}")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    return key.strip(), value
+
+
+def load_config(agent: str, path: str | None = None, overrides=()) -> dict:
+    """Agent defaults, then the optional config file, then KEY=VALUE overrides."""
+    config = read_config_file(os.path.join(CONFIG_DIR, f"{agent}.json"))
+    if path is not None:
+        deep_update(config, read_config_file(path))
+    for item in overrides:
+        set_by_path(config, *parse_override(item))
+    return config
+
+
+def build_env_config(config: dict) -> dict:
+    env_config = ENV_CONFIGS[config["env_config"]]()
+    env_config.update(config.get("env_overrides") or {})
+    return env_config
+
+
+def make_env(
+    env_id: str, env_config: dict, reward_wrapper: dict | None, profiled: bool = False
+):
+    import gymnasium as gym
+    import highway_env  # noqa: F401  (registers highway-v0)
+    from reward_wrappers import LaneCenteringOvertakeReward
+
+    env = gym.make(env_id)
+    env.unwrapped.config.update(env_config)
+    if reward_wrapper is not None:
+        env = LaneCenteringOvertakeReward(env, **reward_wrapper)
+    if profiled:
+        from stats_wrappers import ProfiledEnv
+
+        env = ProfiledEnv(env)
+    # highway-env only rebuilds its action/observation spaces on reset.
+    env.reset()
+    return env
+
+
+def model_class(agent: str):
+    from stable_baselines3 import DQN, PPO, SAC, TD3
+
+    return {"dqn": DQN, "ppo": PPO, "sac": SAC, "td3": TD3}[agent]
+
+
+def build_training_env(config: dict, seed: int | None, normalize_path: str | None = None):
+    """
+    Vectorized (and for PPO normalized) training env described by config.
+
+    When normalize_path points at saved VecNormalize statistics they are
+    restored instead of starting from scratch.
+    """
+    from stable_baselines3.common.vec_env import VecNormalize
+    from training_utils import build_vec_env
+
+    env_fn = partial(
+        make_env,
+        config["env_id"],
+        build_env_config(config),
+        config.get("reward_wrapper"),
+        bool(config.get("profile")),
+    )
+    env = build_vec_env(env_fn, config["n_envs"], config["vec_backend"], seed)
+    if config.get("normalize"):
+        if normalize_path is not None and os.path.exists(normalize_path):
+            env = VecNormalize.load(normalize_path, env)
+        else:
+            env = VecNormalize(env, **config["normalize"])
+    return env
+
+
+def build_model(agent: str, config: dict, env, seed: int | None, out_dir: str):
+    import numpy as np
+
+    kwargs = copy.deepcopy(config["hyperparameters"])
+    if agent == "ppo" and "n_steps" not in kwargs:
+        # Keep the rollout size fixed no matter how many envs collect it.
+        kwargs["n_steps"] = max(config.get("rollout_steps", 2048) // config["n_envs"], 1)
+    if config.get("action_noise_sigma"):
+        from stable_baselines3.common.noise import NormalActionNoise
+
+        n_actions = env.action_space.shape[-1]
+        kwargs["action_noise"] = NormalActionNoise(
+            mean=np.zeros(n_actions),
+            sigma=config["action_noise_sigma"] * np.ones(n_actions),
+        )
+    if config.get("tensorboard"):
+        kwargs["tensorboard_log"] = os.path.join(out_dir, "tensorboard")
+    return model_class(agent)(
+        kwargs.pop("policy", "MlpPolicy"), env, verbose=1, seed=seed, **kwargs
+    )
+
+
+def saved_timesteps(model_path: str) -> int:
+    """num_timesteps stored in an SB3 model zip, read without loading the model."""
+    with zipfile.ZipFile(model_path) as archive:
+        return int(json.loads(archive.read("data")).get("num_timesteps", 0))
+
+
+def find_resume_point(out_dir: str) -> dict | None:
+    """
+    Most advanced saved state in out_dir: the newest periodic checkpoint or
+    the final model.zip, whichever has trained more timesteps. On a tie the
+    one that also saved a replay buffer / VecNormalize stats wins. Returns
+    the timesteps and the model, replay_buffer and vecnormalize paths (None
+    when absent).
+    """
+    from training_utils import list_checkpoints
+
+    candidates = []
+    checkpoints = list_checkpoints(os.path.join(out_dir, "checkpoints"))
+    if checkpoints:
+        candidates.append(checkpoints[-1])
+    final_model = os.path.join(out_dir, "model.zip")
+    if os.path.exists(final_model):
+        extras = {
+            "replay_buffer": os.path.join(out_dir, "replay_buffer.pkl"),
+            "vecnormalize": os.path.join(out_dir, "vec_normalize.pkl"),
+        }
+        candidates.append(
+            {
+                "timesteps": saved_timesteps(final_model),
+                "model": final_model,
+                **{k: (v if os.path.exists(v) else None) for k, v in extras.items()},
+            }
+        )
+    if not candidates:
+        return None
+    return max(
+        candidates,
+        key=lambda candidate: (
+            candidate["timesteps"],
+            candidate["replay_buffer"] is not None,
+            candidate["vecnormalize"] is not None,
+        ),
+    )
+
+
+def load_model_for_resume(agent: str, config: dict, env, out_dir: str, resume_point: dict):
+    """Reload a saved model (and its replay buffer, if any) to keep training."""
+    kwargs = {}
+    if config.get("tensorboard"):
+        kwargs["tensorboard_log"] = os.path.join(out_dir, "tensorboard")
+    model = model_class(agent).load(resume_point["model"], env=env, **kwargs)
+    if hasattr(model, "load_replay_buffer"):
+        if resume_point.get("replay_buffer"):
+            model.load_replay_buffer(resume_point["replay_buffer"])
+        else:
+            print(
+                f"⚠️  No replay buffer saved with {resume_point['model']}: "
+                "resuming with an empty buffer."
+            )
+    return model
+
+
+def build_callbacks(agent: str, config: dict, out_dir: str) -> list:
+    from training_utils import (
+        MetricsEvalCallback,
+        ProfilerCallback,
+        PruningCheckpointCallback,
+    )
+
+    callbacks = []
+    if config.get("profile"):
+        callbacks.append(ProfilerCallback(os.path.join(out_dir, "profile.json")))
+    if config.get("checkpoint_freq"):
+        callbacks.append(
+            PruningCheckpointCallback(
+                # The callback counts vectorized steps, each worth n_envs timesteps.
+                max(config["checkpoint_freq"] // config["n_envs"], 1),
+                os.path.join(out_dir, "checkpoints"),
+                keep_last=config.get("keep_checkpoints", 2),
+            )
+        )
+    if config.get("eval_freq"):
+        callbacks.append(
+            MetricsEvalCallback(
+                agent,
+                out_dir,
+                config["eval_freq"],
+                episodes=config.get("eval_episodes", 5),
+            )
+        )
+    return callbacks
+
+
+def print_config(agent: str, config: dict, seed: int | None, out_dir: str) -> None:
+    env_config = build_env_config(config)
+    print("=" * 70)
+    print(f"🚗 {agent.upper()} Training (seed={seed})")
+    print("=" * 70)
+    print("\nEnvironment Configuration:")
+    print(f"  - Env: {config['env_id']} ({config['env_config']} config)")
+    print(f"  - Vehicles: {env_config['vehicles_count']}")
+    print(f"  - Duration: {env_config['duration']}s")
+    print(f"  - Policy Frequency: {env_config['policy_frequency']} Hz")
+    print(f"  - Collision Penalty: {env_config['collision_reward']}")
+    print(f"  - High Speed Reward: {env_config['high_speed_reward']}")
+    print(f"  - Reward wrapper: {config.get('reward_wrapper')}")
+    print(f"  - Envs: {config['n_envs']} ({config['vec_backend']})")
+    print(f"  - Output: {out_dir}")
+    print(f"\nStarting training for {config['total_timesteps']:,} timesteps...")
+    print("=" * 70)
+
+
+def train_agent(
+    agent: str, config: dict, seed: int | None, out_dir: str, resume: bool = False
+) -> dict:
+    """
+    Train one model, save it to out_dir and return throughput stats.
+
+    With resume=True and a checkpoint or model already in out_dir, training
+    continues from the most recent one (with its VecNormalize statistics and
+    replay buffer) up to config["total_timesteps"] in total.
+    """
+    from training_utils import ThroughputCallback
+
+    os.makedirs(out_dir, exist_ok=True)
+    print_config(agent, config, seed, out_dir)
+    with open(os.path.join(out_dir, "train_config.json"), "w") as handle:
+        json.dump({"agent": agent, "seed": seed, **config}, handle, indent=2)
+
+    normalize_path = os.path.join(out_dir, "vec_normalize.pkl")
+    resume_point = find_resume_point(out_dir) if resume else None
+    env = build_training_env(
+        config, seed, resume_point["vecnormalize"] if resume_point else None
+    )
+    if resume_point is not None:
+        model = load_model_for_resume(agent, config, env, out_dir, resume_point)
+        print(f"↪️  Resuming from {resume_point['model']} at {model.num_timesteps:,} timesteps")
+    else:
+        model = build_model(agent, config, env, seed, out_dir)
+
+    throughput = ThroughputCallback(os.path.join(out_dir, "training_curve.csv"))
+    remaining = config["total_timesteps"] - model.num_timesteps
+    if remaining > 0:
+        model.learn(
+            total_timesteps=remaining,
+            callback=[throughput, *build_callbacks(agent, config, out_dir)],
+            reset_num_timesteps=resume_point is None,
+        )
+
+    model.save(os.path.join(out_dir, "model"))
+    if config.get("normalize"):
+        env.save(normalize_path)
+    if config.get("save_replay_buffer") and hasattr(model, "save_replay_buffer"):
+        model.save_replay_buffer(os.path.join(out_dir, "replay_buffer.pkl"))
+    env.close()
+
+    print("\n" + "=" * 70)
+    print(f"✅ {agent.upper()} training complete (seed={seed})!")
+    print(
+        f"⏱️  Wall-clock: {throughput.wall_time / 60:.1f} min "
+        f"({throughput.env_steps_per_sec:.1f} env-steps/s)"
+    )
+    print(f"📁 Model saved to: {out_dir}/model.zip")
+    print("=" * 70)
+    return {
+        "seed": seed,
+        "out_dir": out_dir,
+        "wall_time_s": throughput.wall_time,
+        "env_steps_per_sec": throughput.env_steps_per_sec,
+    }
+
+
+def _train_seed_worker(
+    agent: str, config: dict, seed: int, out_dir: str, threads: int, resume: bool
+) -> dict:
+    import torch
+
+    torch.set_num_threads(threads)
+    return train_agent(agent, config, seed, out_dir, resume=resume)
+
+
+def apply_cli_overrides(config: dict, args: argparse.Namespace) -> dict:
+    if args.timesteps is not None:
+        config["total_timesteps"] = args.timesteps
+    if args.n_envs is not None:
+        config["n_envs"] = args.n_envs
+    if args.vec_backend is not None:
+        config["vec_backend"] = args.vec_backend
+    if args.train_freq is not None:
+        config["hyperparameters"]["train_freq"] = args.train_freq
+    if args.gradient_steps is not None:
+        config["hyperparameters"]["gradient_steps"] = args.gradient_steps
+    if args.checkpoint_freq is not None:
+        config["checkpoint_freq"] = args.checkpoint_freq
+    if args.eval_freq is not None:
+        config["eval_freq"] = args.eval_freq
+    if args.eval_episodes is not None:
+        config["eval_episodes"] = args.eval_episodes
+    if args.profile:
+        config["profile"] = True
+    return config
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    config = apply_cli_overrides(load_config(args.agent, args.config, args.overrides), args)
+    base_dir = args.out_dir or config["agent_dir"]
+
+    if args.seeds is None:
+        train_agent(args.agent, config, args.seed, base_dir, resume=args.resume)
+        return
+
+    jobs = [(seed, os.path.join(base_dir, "seeds", f"seed{seed}")) for seed in args.seeds]
+    parallel = min(args.parallel, len(jobs))
+    if parallel == 1:
+        results = [
+            train_agent(args.agent, config, seed, out_dir, resume=args.resume)
+            for seed, out_dir in jobs
+        ]
+    else:
+        threads = max((os.cpu_count() or 1) // parallel, 1)
+        with ProcessPoolExecutor(
+            max_workers=parallel, mp_context=mp.get_context("spawn")
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _train_seed_worker, args.agent, config, seed, out_dir, threads, args.resume
+                )
+                for seed, out_dir in jobs
+            ]
+            results = [future.result() for future in futures]
+
+    print("\nSeed summary:")
+    for result in results:
+        print(
+            f"  seed {result['seed']}: {result['wall_time_s'] / 60:.1f} min, "
+            f"{result['env_steps_per_sec']:.1f} env-steps/s -> {result['out_dir']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
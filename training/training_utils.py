@@ -0,0 +1,336 @@
+"""
+Shared helpers for the training scripts: vectorized env construction,
+throughput / training-curve reporting, checkpointing and periodic evaluation.
+"""
+
+from __future__ import annotations
+
+import copy
+import csv
+import glob
+import os
+import re
+import time
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback
+from stable_baselines3.common.vec_env import (
+    DummyVecEnv,
+    SubprocVecEnv,
+    VecMonitor,
+    VecNormalize,
+)
+
+CHECKPOINT_PREFIX = "model"
+
+
+def build_vec_env(make_env, n_envs: int, backend: str = "dummy", seed: int | None = None):
+    """Build N copies of make_env behind a VecEnv with episode monitoring."""
+    if n_envs < 1:
+        raise ValueError("n_envs must be >= 1")
+    vec_cls = SubprocVecEnv if backend == "subproc" else DummyVecEnv
+    env = VecMonitor(vec_cls([make_env for _ in range(n_envs)]))
+    if seed is not None:
+        env.seed(seed)
+    return env
+
+
+class ThroughputCallback(BaseCallback):
+    """
+    Report env-steps/sec and the training curve.
+
+    Logs time/env_steps_per_sec to the SB3 logger (TensorBoard when
+    configured) and writes a row every `every` timesteps to a CSV, so runs
+    with different --n-envs can be compared on both speed and sample
+    efficiency.
+    """
+
+    def __init__(
+        self, csv_path: str | None = None, every: int = 1000, verbose: int = 0
+    ) -> None:
+        super().__init__(verbose)
+        self.csv_path = csv_path
+        self.every = every
+        self.wall_time = 0.0
+        self._start = 0.0
+        self._start_timesteps = 0
+        self._last_row_at = 0
+        self._rows: list[dict] = []
+
+    def _on_training_start(self) -> None:
+        self._start = time.perf_counter()
+        # Resumed runs start from a non-zero count; rate only this session.
+        self._start_timesteps = self.num_timesteps
+        self._last_row_at = self.num_timesteps
+        if self.csv_path is not None and os.path.exists(self.csv_path):
+            with open(self.csv_path, newline="") as handle:
+                self._rows = [
+                    row
+                    for row in csv.DictReader(handle)
+                    if int(row["timesteps"]) <= self.num_timesteps
+                ]
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        elapsed = time.perf_counter() - self._start
+        steps_per_sec = self._session_steps / elapsed if elapsed > 0 else 0.0
+        self.logger.record("time/env_steps_per_sec", steps_per_sec)
+        if self.num_timesteps - self._last_row_at >= self.every:
+            self._add_row(elapsed)
+
+    def _on_training_end(self) -> None:
+        self.wall_time = time.perf_counter() - self._start
+        if self.num_timesteps != self._last_row_at:
+            self._add_row(self.wall_time)
+        if self.csv_path is None or not self._rows:
+            return
+        os.makedirs(os.path.dirname(self.csv_path) or ".", exist_ok=True)
+        with open(self.csv_path, "w", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(self._rows[0]))
+            writer.writeheader()
+            writer.writerows(self._rows)
+
+    def _add_row(self, elapsed: float) -> None:
+        ep_info = self.model.ep_info_buffer
+        ep_rew_mean = (
+            float(np.mean([ep["r"] for ep in ep_info])) if ep_info else float("nan")
+        )
+        self._last_row_at = self.num_timesteps
+        self._rows.append(
+            {
+                "timesteps": self.num_timesteps,
+                "wall_time_s": elapsed,
+                "env_steps_per_sec": self._session_steps / elapsed if elapsed > 0 else 0.0,
+                "ep_rew_mean": ep_rew_mean,
+            }
+        )
+
+    @property
+    def _session_steps(self) -> int:
+        return self.num_timesteps - self._start_timesteps
+
+    @property
+    def env_steps_per_sec(self) -> float:
+        return self._session_steps / self.wall_time if self.wall_time > 0 else 0.0
+
+
+class PruningCheckpointCallback(CheckpointCallback):
+    """
+    CheckpointCallback that also saves replay buffer and VecNormalize state,
+    and keeps only the `keep_last` most recent checkpoints on disk.
+    """
+
+    def __init__(self, save_freq: int, save_path: str, keep_last: int = 2, verbose: int = 0):
+        super().__init__(
+            save_freq,
+            save_path,
+            name_prefix=CHECKPOINT_PREFIX,
+            save_replay_buffer=True,
+            save_vecnormalize=True,
+            verbose=verbose,
+        )
+        self.keep_last = keep_last
+
+    def _on_step(self) -> bool:
+        result = super()._on_step()
+        if self.n_calls % self.save_freq == 0 and self.keep_last > 0:
+            for checkpoint in list_checkpoints(self.save_path)[: -self.keep_last]:
+                for path in checkpoint.values():
+                    if isinstance(path, str) and os.path.exists(path):
+                        os.remove(path)
+        return result
+
+
+def list_checkpoints(save_path: str) -> list[dict]:
+    """
+    Checkpoints in save_path, oldest first.
+
+    Each entry holds the timestep count and the model / replay_buffer /
+    vecnormalize paths (None when that file was not saved).
+    """
+    checkpoints = []
+    pattern = re.compile(rf"{CHECKPOINT_PREFIX}_(\d+)_steps\.zip$")
+    for model_path in glob.glob(os.path.join(save_path, f"{CHECKPOINT_PREFIX}_*_steps.zip")):
+        match = pattern.search(os.path.basename(model_path))
+        if match is None:
+            continue
+        steps = int(match.group(1))
+        extras = {}
+        for kind in ("replay_buffer", "vecnormalize"):
+            path = os.path.join(save_path, f"{CHECKPOINT_PREFIX}_{kind}_{steps}_steps.pkl")
+            extras[kind] = path if os.path.exists(path) else None
+        checkpoints.append({"timesteps": steps, "model": model_path, **extras})
+    return sorted(checkpoints, key=lambda checkpoint: checkpoint["timesteps"])
+
+
+def score_episodes(episode_stats: list[dict]) -> dict:
+    """Average eval.py episode stats and add the SI/EI/CI/RCI/GPS indicators."""
+    import pandas as pd
+    from indicators import compute_indicators
+
+    summary = pd.DataFrame(episode_stats).mean(numeric_only=True)
+    return {**summary.to_dict(), **compute_indicators(summary)}
+
+
+class MetricsEvalCallback(BaseCallback):
+    """
+    Periodically evaluate the policy with the eval.py metrics.
+
+    Runs `episodes` seeded episodes on a separate standard eval env every
+    `eval_freq` timesteps (using the current VecNormalize statistics for
+    PPO), logs the indicators under eval/, appends them to eval_log.csv and
+    saves the best-scoring model as best_model.zip.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        out_dir: str,
+        eval_freq: int,
+        episodes: int = 5,
+        seed: int = 10_000,
+        metric: str = "GPS",
+        verbose: int = 0,
+    ) -> None:
+        super().__init__(verbose)
+        self.agent = agent
+        self.out_dir = out_dir
+        self.eval_freq = eval_freq
+        self.episodes = episodes
+        self.seed = seed
+        self.metric = metric
+        self.best_score = -float("inf")
+        self._last_eval_at = 0
+        self._env = None
+        self._eval_env = None
+
+    def _init_callback(self) -> None:
+        from eval import build_env
+
+        base_env, _ = build_env(self.agent, render=False)
+        if self.model.get_vec_normalize_env() is not None:
+            self._env = VecNormalize(
+                DummyVecEnv([lambda: base_env]), training=False, norm_reward=False
+            )
+            self._eval_env = self._env.envs[0]
+        else:
+            self._env = self._eval_env = base_env
+        self._last_eval_at = self.model.num_timesteps
+        log_path = os.path.join(self.out_dir, "eval_log.csv")
+        if os.path.exists(log_path):
+            with open(log_path, newline="") as handle:
+                scores = [float(row[self.metric]) for row in csv.DictReader(handle)]
+            self.best_score = max(scores, default=self.best_score)
+
+    def _on_step(self) -> bool:
+        # Fire on every multiple of eval_freq crossed, also after a resume.
+        if self.num_timesteps // self.eval_freq > self._last_eval_at // self.eval_freq:
+            self._last_eval_at = self.num_timesteps
+            self._evaluate()
+        return True
+
+    def _evaluate(self) -> None:
+        from eval import episode_seed_for, run_episode
+        from step_profiler import paused
+
+        if isinstance(self._env, VecNormalize):
+            # Evaluate with the observation statistics learned so far.
+            self._env.obs_rms = copy.deepcopy(self.model.get_vec_normalize_env().obs_rms)
+        # Keep eval-env steps out of a training step profile.
+        with paused():
+            stats = [
+                run_episode(
+                    self.model,
+                    self._env,
+                    self._eval_env,
+                    self.agent,
+                    episode_seed_for(self.seed, 0, ep),
+                )
+                for ep in range(self.episodes)
+            ]
+        scores = score_episodes(stats)
+        for key in ("GPS", "SI", "EI", "CI", "RCI", "collision", "avg_speed_ms"):
+            self.logger.record(f"eval/{key}", scores[key])
+
+        log_path = os.path.join(self.out_dir, "eval_log.csv")
+        row = {"timesteps": self.num_timesteps, **scores}
+        write_header = not os.path.exists(log_path)
+        with open(log_path, "a", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(row))
+            if write_header:
+                writer.writeheader()
+            writer.writerow(row)
+
+        score = scores[self.metric]
+        if score > self.best_score:
+            self.best_score = score
+            self.model.save(os.path.join(self.out_dir, "best_model"))
+            vec_normalize = self.model.get_vec_normalize_env()
+            if vec_normalize is not None:
+                vec_normalize.save(os.path.join(self.out_dir, "best_vec_normalize.pkl"))
+        print(
+            f"📊 Eval @ {self.num_timesteps:,} steps: {self.metric}={score:.4f} "
+            f"(best {self.best_score:.4f})"
+        )
+
+    def _on_training_end(self) -> None:
+        if self._env is not None:
+            self._env.close()
+
+
+class ProfilerCallback(BaseCallback):
+    """
+    Break training wall time down into rollout / train / env phases.
+
+    Env-side phases (env.step and the reward.* terms) arrive per step in
+    info["profile"] from ProfiledEnv. Rollout collection and the training
+    phase in between rollouts are timed here. The summary is logged under
+    profile/ at every rollout end and written to `json_path` at the end.
+    """
+
+    def __init__(self, json_path: str, verbose: int = 0) -> None:
+        super().__init__(verbose)
+        self.json_path = json_path
+        self.profiler = None
+        self._rollout_start = None
+        self._train_start = None
+
+    def _on_training_start(self) -> None:
+        from step_profiler import StepProfiler
+
+        # Separate from the env-side profiler so DummyVecEnv drains don't
+        # move rollout/train samples into info["profile"].
+        self.profiler = StepProfiler()
+
+    def _on_rollout_start(self) -> None:
+        now = time.perf_counter()
+        if self._train_start is not None:
+            self.profiler.add("train", now - self._train_start)
+        self._rollout_start = now
+
+    def _on_step(self) -> bool:
+        for info in self.locals.get("infos", []):
+            self.profiler.merge(info.pop("profile", None))
+        return True
+
+    def _on_rollout_end(self) -> None:
+        from step_profiler import scalars
+
+        now = time.perf_counter()
+        self.profiler.add("rollout", now - self._rollout_start)
+        self._train_start = now
+        for tag, value in scalars(self.profiler.summary()).items():
+            self.logger.record(tag, value)
+
+    def _on_training_end(self) -> None:
+        from step_profiler import print_summary, write_json
+
+        if self._train_start is not None:
+            self.profiler.add("train", time.perf_counter() - self._train_start)
+            self._train_start = None
+        summary = self.profiler.summary()
+        print_summary(summary, "Training profile")
+        write_json(summary, self.json_path)
+        print(f"📁 Profile saved to: {self.json_path}")